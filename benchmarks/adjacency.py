@@ -0,0 +1,66 @@
+"""
+.. module:: adjacency.py
+   :platform: Linux
+   :synopsis: Benchmark of a vertex with many edges, with inline and paged edges
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.adjacency -i IP -p PORT -n EDGES
+
+A popular movie is rated by EDGES users. Edges are then added to and removed from it
+and all its edges are iterated, once with all edges inline and once with paged edges.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType, RequestVertex
+
+GRAPH = 'bench_adjacency'
+UPDATES = 200
+
+
+def measure(g, name, threshold, count):
+    storage = g._storage
+    storage.adjacency.threshold = threshold
+    movie = g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+    user = g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+    rates = g.create_edge_type(RequestEdgeType('rates'))
+    try:
+        m = g.insert_vertex(RequestVertex(movie, {'title' : 'Popular'}))
+        users = g.insert_vertices(user, [{'name' : 'User{}'.format(i)} for i in xrange(UPDATES)]).results
+        g.add_edges(rates, [(users[i % UPDATES], 'User', {m._uid : 'Movie'}, {}) for i in xrange(count)])
+        #the first read moves the edges to the pages
+        m.get_incoming_edges()
+        storage.hyperdex_client.reset()
+        edges = []
+        with Timer() as t:
+            for uid in users:
+                attributes = {'source_uid' : uid, 'source_vertex_type' : 'User', 'target' : {m._uid : 'Movie'}}
+                edges.append((storage.add_edge(uid, 'User', {m._uid : 'Movie'}, 'rates', attributes), 'rates'))
+        report('add_edge ({})'.format(name), UPDATES, t.elapsed, storage.hyperdex_client.total())
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            for edge in edges:
+                storage.rm_edges([edge])
+        report('rm_edge ({})'.format(name), UPDATES, t.elapsed, storage.hyperdex_client.total())
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            iterated = sum(1 for edge in m.iter_incoming_edges())
+        report('iterate edges ({})'.format(name), iterated, t.elapsed, storage.hyperdex_client.total())
+    finally:
+        rates.remove()
+        user.remove()
+        movie.remove()
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    storage.hyperdex_client = CountingClient(storage.hyperdex_client)
+    storage.requests.hyperdex_client = storage.hyperdex_client
+    threshold = storage.adjacency.threshold
+    measure(g, 'inline', args.count + UPDATES + 1, args.count)
+    measure(g, 'paged', threshold, args.count)
+
+
+if __name__ == '__main__':
+    run(parse_args('Inline and paged edges of a vertex with many edges.', count=100000))
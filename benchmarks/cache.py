@@ -0,0 +1,51 @@
+"""
+.. module:: cache.py
+   :platform: Linux
+   :synopsis: Benchmark of reading hot vertices through the element cache
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.cache -i IP -p PORT -n READS
+
+A worker handles each request with fresh vertex handles. READS properties of HOT
+vertices are read that way, by a graph without and with the element cache, and once
+more while every tenth read is preceded by a write.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.graphelement import Vertex
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestVertex
+
+GRAPH = 'bench_cache'
+HOT = 100
+
+
+def read(g, uids, count, write_every=None):
+    for i in xrange(count):
+        uid = uids[i % len(uids)]
+        if write_every is not None and i % write_every == 0:
+            Vertex(uid, 'Person', g._storage).set_property('age', i)
+        Vertex(uid, 'Person', g._storage).get_property('name')
+
+
+def run(args):
+    plain = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    cached = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH, cache=True)
+    person = plain.create_vertex_type(RequestVertexType('Person', ('string', 'name'), ('int', 'age')))
+    try:
+        uids = plain.insert_vertices(person, [{'name' : 'Person{}'.format(i), 'age' : i} for i in xrange(HOT)]).results
+        for name, g, write_every in [('no cache', plain, None), ('element cache', cached, None), 
+                                     ('element cache, 10% writes', cached, 10)]:
+            storage = g._storage
+            storage.requests.hyperdex_client = CountingClient(storage.requests.hyperdex_client)
+            with Timer() as t:
+                read(g, uids, args.count, write_every)
+            report(name, args.count, t.elapsed, storage.requests.hyperdex_client.total())
+            storage.requests.hyperdex_client = storage.requests.hyperdex_client.client
+        print(cached.get_cache_stats())
+    finally:
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Reads of hot vertices through the element cache.', count=10000))
@@ -0,0 +1,64 @@
+"""
+.. module:: cascade.py
+   :platform: Linux
+   :synopsis: Benchmark of removing a well-connected vertex
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.cascade -i IP -p PORT -n EDGES
+
+A vertex with EDGES incoming and outgoing edges to NEIGHBORS other vertices is removed
+edge by edge, as Vertex.remove used to do, and with the batched cascading delete.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType, RequestVertex
+
+GRAPH = 'bench_cascade'
+NEIGHBORS = 100
+
+
+def populate(g, person, knows, count):
+    v = g.insert_vertex(RequestVertex(person, {'name' : 'Popular'}))
+    neighbors = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(NEIGHBORS)]).results
+    edges = []
+    for i in xrange(count):
+        if i % 2:
+            edges.append((v._uid, 'Person', {neighbors[i % NEIGHBORS] : 'Person'}, {}))
+        else:
+            edges.append((neighbors[i % NEIGHBORS], 'Person', {v._uid : 'Person'}, {}))
+    g.add_edges(knows, edges)
+    return v
+
+
+def per_edge(storage, v):
+    for edge in v.get_incoming_edges() + v.get_outgoing_edges():
+        edge.remove()
+    storage.rm_vertex(v._uid, v._element_type)
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    storage.hyperdex_client = CountingClient(storage.hyperdex_client)
+    storage.requests.hyperdex_client = storage.hyperdex_client
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    knows = g.create_edge_type(RequestEdgeType('knows'))
+    try:
+        v = populate(g, person, knows, args.count)
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            per_edge(storage, v)
+        report('remove edge by edge', args.count, t.elapsed, storage.hyperdex_client.total())
+        v = populate(g, person, knows, args.count)
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            v.remove()
+        report('cascading remove', args.count, t.elapsed, storage.hyperdex_client.total())
+    finally:
+        knows.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Removal of a well-connected vertex.', count=10000))
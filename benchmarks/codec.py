@@ -0,0 +1,52 @@
+"""
+.. module:: codec.py
+   :platform: Linux
+   :synopsis: Benchmark of the codecs against cPickle
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.codec -n VALUES
+
+No HyperDex is needed, the codecs encode and decode typical unstructured vertex 
+properties in memory: a small per-key value, a bag of properties and a large list.
+"""
+import cPickle
+from benchmarks.common import Timer, parse_args, report
+from serialization import codec
+
+
+CODECS = ['pickle', 'binary', 'pickle+zlib', 'binary+zlib']
+
+
+def payloads():
+    return [('single property', 'Berlin'),
+            ('property bag', {'name' : 'Alice', 'age' : 42, 'score' : 0.75,
+                              'tags' : ['admin', 'staff'], 'active' : True,
+                              'city' : u'M\xfcnchen', 'friends' : (1, 2, 3)}),
+            ('large list', [{'id' : i, 'label' : 'item{}'.format(i)} for i in xrange(500)])]
+
+
+def measure(name, encode, decode, value, count):
+    with Timer() as t:
+        for i in xrange(count):
+            data = encode(value)
+    report('{} encode'.format(name), count, t.elapsed)
+    with Timer() as t:
+        for i in xrange(count):
+            decode(data)
+    report('{} decode'.format(name), count, t.elapsed)
+    print('{:<32} {:>8} bytes'.format(name, len(data)))
+
+
+def run(args):
+    for payload, value in payloads():
+        count = max(1, args.count // (100 if payload == 'large list' else 1))
+        print(payload)
+        measure('cPickle', lambda v: cPickle.dumps(v, cPickle.HIGHEST_PROTOCOL), cPickle.loads,
+                value, count)
+        for name in CODECS:
+            measure(name, codec.get_codec(name).encode, codec.decode, value, count)
+
+
+if __name__ == '__main__':
+    run(parse_args('Codecs against cPickle.', count=100000))
@@ -0,0 +1,67 @@
+"""
+.. module:: common.py
+   :platform: Linux
+   :synopsis: Helpers shared by the benchmarks
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+import argparse
+import time
+
+
+class CountingClient(object):
+    '''
+    Wraps a hyperdex.client.Client and counts the requests per hyperspace.
+    '''
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        def counted(space, *args):
+            self.requests[space] = self.requests.get(space, 0) + 1
+            return attr(space, *args)
+        return counted
+
+    def total(self, space=None):
+        if space is None:
+            return sum(self.requests.values())
+        return self.requests.get(space, 0)
+
+    def reset(self):
+        self.requests = {}
+
+
+class Timer(object):
+    '''
+    Measures the wall clock time of a with block.
+    '''
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed = time.time() - self.start
+
+
+def parse_args(description, **defaults):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-i", "--hyperdex-ip", type=str, dest='hyperdex_ip', default='127.0.0.1',
+                        help='The HyperDex coordinator IP address.')
+    parser.add_argument("-p", "--hyperdex-port", type=int, dest='hyperdex_port', default=1982,
+                        help="The HyperDex coordinator port number.")
+    parser.add_argument("-n", "--count", type=int, dest='count', default=defaults.get('count', 10000),
+                        help="The number of graph elements.")
+    return parser.parse_args()
+
+
+def report(name, count, elapsed, requests=None):
+    line = '{:<32} {:>8} ops {:>9.3f}s {:>10.1f} ops/s'.format(name, count, elapsed, count / max(elapsed, 1e-9))
+    if requests is not None:
+        line = '{} {:>8} requests'.format(line, requests)
+    print(line)
@@ -0,0 +1,63 @@
+"""
+.. module:: csr.py
+   :platform: Linux
+   :synopsis: Benchmark of the compressed sparse row export
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.csr -i IP -p PORT -n VERTICES
+
+A random graph of VERTICES vertices with DEGREE rated edges per vertex is exported into
+compressed sparse rows. The average stars of the incoming edges of every vertex are
+computed once through the Vertex and Edge API and once on the export, which takes a
+scan per space instead of a request per vertex and edge.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType
+import random
+
+GRAPH = 'bench_csr'
+DEGREE = 4
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    rates = g.create_edge_type(RequestEdgeType('rates', ('int', 'stars')))
+    try:
+        uids = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(args.count)]).results
+        random.seed(args.count)
+        g.add_edges(rates, [(uid, 'Person', {random.choice(uids) : 'Person'}, {'stars' : random.randint(1, 5)})
+                            for uid in uids for _ in xrange(DEGREE)])
+        storage.requests.hyperdex_client = CountingClient(storage.requests.hyperdex_client)
+        with Timer() as t:
+            api = {}
+            for uid in uids:
+                stars = [e.get_property('stars') for e in g.get_vertex(uid, 'Person').get_incoming_edges(rates)]
+                api[uid] = sum(stars) / float(len(stars)) if len(stars) > 0 else 0.0
+        report('get_incoming_edges per vertex', args.count, t.elapsed, storage.requests.hyperdex_client.total())
+        with Timer() as t:
+            graph = g.export_csr(edge_attributes={'rates' : ['stars']})
+        report('export_csr', args.count, t.elapsed)
+        with Timer() as t:
+            reverse = graph.reverse()
+            total, count = {}, {}
+            for entry, stars in zip(reverse.rows['rates'], reverse.columns['rates']['stars']):
+                total[entry] = stars
+            exported = {}
+            for dense in xrange(reverse.count_vertices()):
+                stars = [total[entry] for entry in xrange(reverse.offsets[dense], reverse.offsets[dense + 1])]
+                exported[reverse.uids[dense]] = sum(stars) / float(len(stars)) if len(stars) > 0 else 0.0
+        report('average stars on the export', args.count, t.elapsed)
+        assert all(abs(api[uid] - exported[uid]) < 1e-9 for uid in uids)
+    finally:
+        storage.requests.hyperdex_client = getattr(storage.requests.hyperdex_client, 'client',
+                                                   storage.requests.hyperdex_client)
+        rates.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Exporting a graph into compressed sparse rows.', count=2000))
@@ -0,0 +1,58 @@
+"""
+.. module:: deletes.py
+   :platform: Linux
+   :synopsis: Benchmark of a delete-heavy workload and the recycling of obsolete ids
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.deletes -i IP -p PORT -n COUNT
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestVertex
+
+GRAPH = 'bench_deletes'
+
+
+def legacy_add_obsolete_id(client, sysadmin, uid):
+    #the former behaviour: every id is added to one single set
+    try:
+        client.set_add(sysadmin._id_sys, sysadmin._obsolete_id, {'value' : uid})
+    except Exception:
+        client.put_if_not_exist(sysadmin._id_sys, sysadmin._obsolete_id, {'value' : set([uid])})
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    client = CountingClient(storage.hyperdex_client)
+    storage.sysadmin._id_pool.hyperdex_client = client
+    id_sys = storage.sysadmin._id_sys
+    user = g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+    try:
+        vertices = [g.insert_vertex(RequestVertex(user, {'name' : 'user' + str(i), 'age' : i}))
+                    for i in xrange(args.count)]
+        with Timer() as t:
+            for v in vertices[:args.count / 2]:
+                storage.hyperdex_client.delete('{}_{}'.format(GRAPH, 'User'), v._uid)
+                legacy_add_obsolete_id(client, storage.sysadmin, v._uid)
+        report('delete, single set', args.count / 2, t.elapsed, client.total(id_sys))
+        client.reset()
+        with Timer() as t:
+            for v in vertices[args.count / 2:]:
+                storage.hyperdex_client.delete('{}_{}'.format(GRAPH, 'User'), v._uid)
+                storage.sysadmin.add_obsolete_id(v._uid)
+            storage.sysadmin.flush_obsolete_ids()
+        report('delete, sharded pool', args.count - args.count / 2, t.elapsed, client.total(id_sys))
+        client.reset()
+        with Timer() as t:
+            uids = [g.insert_vertex(RequestVertex(user, {'name' : 'again' + str(i), 'age' : i}))._uid
+                    for i in xrange(args.count / 2)]
+        report('insert, recycled ids', args.count / 2, t.elapsed, client.total(id_sys))
+        print('recycled ids: {}'.format(len(set(uids) & set(v._uid for v in vertices))))
+    finally:
+        user.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Delete-heavy workload with recycled ids.'))
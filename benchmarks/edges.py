@@ -0,0 +1,53 @@
+"""
+.. module:: edges.py
+   :platform: Linux
+   :synopsis: Benchmark of single and batched edge creation
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.edges -i IP -p PORT -n EDGES
+
+The edges connect a fixed set of vertices at random, the batched creation merges
+the updates of the same vertex and needs fewer requests the denser the graph is.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType
+import random
+
+GRAPH = 'bench_edges'
+VERTICES = 1000
+
+
+def edge_list(uids, count):
+    rand = random.Random(42)
+    return [(rand.choice(uids), 'Person', {rand.choice(uids) : 'Person'}, {'weight' : i}) for i in xrange(count)]
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    storage.hyperdex_client = CountingClient(storage.hyperdex_client)
+    storage.requests.hyperdex_client = storage.hyperdex_client
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    knows = g.create_edge_type(RequestEdgeType('knows', ('int', 'weight')))
+    try:
+        uids = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(VERTICES)]).results
+        edges = edge_list(uids, args.count)
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            for src, src_type, targets, attributes in edges:
+                attributes = dict(attributes, source_uid=src, source_vertex_type=src_type, target=targets)
+                storage.add_edge(src, src_type, targets, 'knows', attributes)
+        report('add_edge', args.count, t.elapsed, storage.hyperdex_client.total())
+        storage.hyperdex_client.reset()
+        with Timer() as t:
+            g.add_edges(knows, edges)
+        report('add_edges', args.count, t.elapsed, storage.hyperdex_client.total())
+    finally:
+        knows.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Single and batched edge creation.', count=10000))
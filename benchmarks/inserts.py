@@ -0,0 +1,41 @@
+"""
+.. module:: inserts.py
+   :platform: Linux
+   :synopsis: Benchmark of single and batched vertex insertion
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.inserts -i IP -p PORT -n VERTICES
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestVertex
+
+GRAPH = 'bench_inserts'
+
+
+def properties(count):
+    for i in xrange(count):
+        yield {'first' : 'First{}'.format(i), 'last' : 'Last{}'.format(i), 'age' : i % 80, 'nick' : 'n{}'.format(i)}
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    vertex_type = g.create_vertex_type(RequestVertexType('Person', ('string', 'first'), ('string', 'last'), ('int', 'age')))
+    try:
+        with Timer() as t:
+            for vertex in properties(args.count):
+                g.insert_vertex(RequestVertex(vertex_type, vertex))
+        report('insert_vertex', args.count, t.elapsed)
+        for batch_size in [64, 1024]:
+            with Timer() as t:
+                result = g.insert_vertices(vertex_type, properties(args.count), batch_size)
+            report('insert_vertices ({})'.format(batch_size), args.count, t.elapsed)
+            if len(result.errors) > 0:
+                print('{} vertices failed, e.g. {}'.format(len(result.errors), result.errors.values()[0]))
+    finally:
+        vertex_type.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Single and batched vertex insertion.', count=10000))
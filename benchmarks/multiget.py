@@ -0,0 +1,50 @@
+"""
+.. module:: multiget.py
+   :platform: Linux
+   :synopsis: Benchmark of fetching many vertices at once
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.multiget -i IP -p PORT -n NEIGHBORS
+
+The NEIGHBORS targets of the outgoing edges of a vertex are fetched one after the other
+with get_vertex and at once with get_edges and get_vertices. The sequential gets wait
+for NEIGHBORS round trips each, the multi-gets keep up to MAX_IN_FLIGHT requests in
+flight.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType, RequestVertex
+
+GRAPH = 'bench_multiget'
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    knows = g.create_edge_type(RequestEdgeType('knows'))
+    try:
+        v = g.insert_vertex(RequestVertex(person, {'name' : 'Popular'}))
+        neighbors = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(args.count)]).results
+        g.add_edges(knows, [(v._uid, 'Person', {uid : 'Person'}, {}) for uid in neighbors])
+        storage.requests.hyperdex_client = CountingClient(storage.requests.hyperdex_client)
+        with Timer() as t:
+            names = [g.get_vertex(e.get_target()[0]._uid, 'Person').name for e in v.get_outgoing_edges()]
+        report('get_vertex one by one', args.count, t.elapsed, storage.requests.hyperdex_client.total())
+        storage.requests.hyperdex_client.reset()
+        with Timer() as t:
+            edges = g.get_edges([(e._uid, 'knows') for e in v.get_outgoing_edges()], snapshot=True)
+            targets = [e.get_target()[0] for e in edges]
+            names = [u.name for u in g.get_vertices([(u._uid, 'Person') for u in targets], snapshot=True)]
+        report('get_edges and get_vertices', args.count, t.elapsed, storage.requests.hyperdex_client.total())
+        assert len(names) == args.count
+    finally:
+        storage.requests.hyperdex_client = getattr(storage.requests.hyperdex_client, 'client', 
+                                                   storage.requests.hyperdex_client)
+        knows.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Fetching the neighbors of a vertex.', count=1000))
@@ -0,0 +1,106 @@
+"""
+.. module:: properties.py
+   :platform: Linux
+   :synopsis: Benchmark of property updates on a vertex with many edges
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.properties -i IP -p PORT -n UPDATES
+
+The updates are performed on a vertex with EDGES outgoing edges. Rewriting the whole
+vertex, as set_property used to, transfers the edge map twice for every update. Then
+single properties of a vertex with BAG unstructured properties are read and written,
+with the legacy blob and with the per-key layout. Reading a single property does not
+transfer the edge map, unlike reading the whole vertex. Reading two properties from a
+fresh handle costs three requests, a handle in snapshot mode needs one.
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestVertex
+from serialization import serializer
+
+GRAPH = 'bench_properties'
+EDGES = 100000
+#number of unstructured properties of a vertex with a large property bag
+BAG = 10000
+
+
+def rewrite(storage, vertex, key, value, structured):
+    #read, change and write back the whole vertex
+    props = storage.get_graph_element(vertex._uid, vertex._element_type)
+    if structured:
+        props[key] = value
+    else:
+        props['unstructured'][key] = serializer.serialize(value)
+    storage.put_graph_element(vertex._uid, vertex._element_type, props)
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name'), ('int', 'age')))
+    try:
+        v = g.insert_vertex(RequestVertex(person, {'name' : 'Gus', 'age' : 0, 'nick' : 'g'}))
+        #the edges are not stored, only the map of a popular vertex matters here
+        storage.hyperdex_client.map_add('{}_Person'.format(GRAPH), v._uid,
+                                        {'outgoing_edges' : dict((uid, 'knows') for uid in xrange(EDGES))})
+        for key, structured in [('age', True), ('nick', False)]:
+            with Timer() as t:
+                for i in xrange(args.count):
+                    rewrite(storage, v, key, i, structured)
+            report('rewrite vertex ({})'.format(key), args.count, t.elapsed)
+            with Timer() as t:
+                for i in xrange(args.count):
+                    v.set_property(key, i)
+            report('set_property ({})'.format(key), args.count, t.elapsed)
+        with Timer() as t:
+            for i in xrange(args.count):
+                v.set_properties({'age' : i, 'nick' : i})
+        report('set_properties (both)', args.count, t.elapsed)
+        with Timer() as t:
+            for i in xrange(args.count):
+                storage.get_graph_element(v._uid, v._element_type)
+        report('read vertex', args.count, t.elapsed)
+        for key in ['age', 'nick']:
+            with Timer() as t:
+                for i in xrange(args.count):
+                    v.get_property(key)
+            report('get_property ({})'.format(key), args.count, t.elapsed)
+        for snapshot in [False, True]:
+            with Timer() as t:
+                for i in xrange(args.count):
+                    handle = g.get_vertex(v._uid, 'Person', snapshot=snapshot)
+                    handle.name, handle.age
+            report('get_vertex and two properties ({})'.format('snapshot' if snapshot else 'plain'), 
+                   args.count, t.elapsed)
+    finally:
+        person.remove()
+    bag(g, args.count)
+
+
+def bag(g, count):
+    #the same vertex type with one blob for all unstructured properties, as created by older versions
+    g._storage.typeadmin.create_element_type('Legacy', [('string', 'name'), ('map(int, string)', 'incoming_edges'),
+                                                        ('map(int, string)', 'outgoing_edges')])
+    g._storage.sysadmin.add_vertex_type('Legacy')
+    legacy = g.get_vertex_type('Legacy')
+    per_key = g.create_vertex_type(RequestVertexType('PerKey', ('string', 'name')))
+    properties = dict(('key{}'.format(i), i) for i in xrange(BAG))
+    try:
+        for vertex_type in [legacy, per_key]:
+            v = g.insert_vertex(RequestVertex(vertex_type, dict(properties, name='Gus')))
+            with Timer() as t:
+                for i in xrange(count):
+                    v.set_property('key{}'.format(i), -i)
+            report('set in bag of {} ({})'.format(BAG, vertex_type.get_type_name()), count, t.elapsed)
+            with Timer() as t:
+                for i in xrange(count):
+                    v.get_property('key{}'.format(i))
+            report('get in bag of {} ({})'.format(BAG, vertex_type.get_type_name()), count, t.elapsed)
+    finally:
+        legacy.remove()
+        per_key.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Property updates on a vertex with many edges.', count=100))
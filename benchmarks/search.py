@@ -0,0 +1,61 @@
+"""
+.. module:: search.py
+   :platform: Linux
+   :synopsis: Benchmark of vertex searches with and without subspaces
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.search -i IP -p PORT -n VERTICES
+
+The type is populated and searched once without subspaces, the advisor's suggestions
+are then used to create the same type with subspaces and the searches are repeated.
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestVertex
+
+GRAPH = 'bench_search'
+SEARCHES = 200
+
+
+def populate(g, vertex_type, count):
+    for i in xrange(count):
+        g.insert_vertex(RequestVertex(vertex_type, {'first' : 'First{}'.format(i % 100),
+                                                    'last' : 'Last{}'.format(i % 1000),
+                                                    'age' : i % 80}))
+
+
+def search(g, vertex_type, name):
+    with Timer() as t:
+        for i in xrange(SEARCHES):
+            if i % 2:
+                g.search_vertex(vertex_type, ('age', i % 80))
+            else:
+                g.search_vertex(vertex_type, ('last', 'Last{}'.format(i % 1000)))
+    report(name, SEARCHES, t.elapsed)
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    attributes = (('string', 'first'), ('string', 'last'), ('int', 'age'))
+    vertex_type = g.create_vertex_type(RequestVertexType('Person', *attributes))
+    try:
+        populate(g, vertex_type, args.count)
+        search(g, vertex_type, 'search without subspaces')
+        subspaces = g.suggest_subspaces(vertex_type)
+        print('suggested subspaces: {}'.format(subspaces))
+    finally:
+        vertex_type.remove()
+    requested = RequestVertexType('Person', *attributes)
+    for subspace in subspaces:
+        requested.add_subspace(*subspace)
+    vertex_type = g.create_vertex_type(requested)
+    try:
+        populate(g, vertex_type, args.count)
+        search(g, vertex_type, 'search with subspaces')
+    finally:
+        vertex_type.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Vertex searches with and without subspaces.', count=10000))
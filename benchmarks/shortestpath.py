@@ -0,0 +1,75 @@
+"""
+.. module:: shortestpath.py
+   :platform: Linux
+   :synopsis: Benchmark of weighted shortest path searches
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.shortestpath -i IP -p PORT -n VERTICES
+
+The cheapest path between the corners of a grid of about VERTICES vertices with random
+edge weights is searched, once with a Dijkstra which reads the edges, their weights
+and targets element by element and once with HyperDexGraph.shortest_path, one-way and
+bidirectional. The element by element search waits for a round trip per edge, the
+batched one for a few round trips per wave of expanded vertices.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType
+import heapq
+import random
+
+GRAPH = 'bench_shortestpath'
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    place = g.create_vertex_type(RequestVertexType('Place', ('string', 'name')))
+    road = g.create_edge_type(RequestEdgeType('road', ('int', 'length')))
+    try:
+        side = max(2, int(args.count ** 0.5))
+        uids = g.insert_vertices(place, [{'name' : 'Place{}'.format(i)} for i in xrange(side * side)]).results
+        random.seed(side)
+        edges = []
+        for i in xrange(side * side):
+            if i % side + 1 < side:
+                edges.append((uids[i], 'Place', {uids[i + 1] : 'Place'}, {'length' : random.randint(1, 100)}))
+            if i + side < side * side:
+                edges.append((uids[i], 'Place', {uids[i + side] : 'Place'}, {'length' : random.randint(1, 100)}))
+        g.add_edges(road, edges)
+        source, target = g.get_vertex(uids[0], 'Place'), g.get_vertex(uids[-1], 'Place')
+        storage.requests.hyperdex_client = CountingClient(storage.requests.hyperdex_client)
+        with Timer() as t:
+            distances, queue = {source._uid : 0}, [(0, source._uid)]
+            while len(queue) > 0:
+                distance, uid = heapq.heappop(queue)
+                if uid == target._uid:
+                    break
+                if distance > distances[uid]:
+                    continue
+                for edge in g.get_vertex(uid, 'Place').get_outgoing_edges(road):
+                    length = edge.get_property('length')
+                    for neighbor in edge.get_target():
+                        if distance + length < distances.get(neighbor._uid, float('inf')):
+                            distances[neighbor._uid] = distance + length
+                            heapq.heappush(queue, (distance + length, neighbor._uid))
+        report('get_outgoing_edges and get_property', side * side, t.elapsed,
+               storage.requests.hyperdex_client.total())
+        for bidirectional in (False, True):
+            storage.requests.hyperdex_client.reset()
+            with Timer() as t:
+                path = g.shortest_path(source, target, road, 'length', bidirectional)
+            report('shortest_path{} ({} expanded, {} round trips)'.format(' bidirectional' if bidirectional else '',
+                                                                           path.expanded, path.round_trips),
+                   side * side, t.elapsed, storage.requests.hyperdex_client.total())
+            assert path.cost == distances[target._uid]
+    finally:
+        storage.requests.hyperdex_client = getattr(storage.requests.hyperdex_client, 'client',
+                                                   storage.requests.hyperdex_client)
+        road.remove()
+        place.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Searching the cheapest path through a grid.', count=1024))
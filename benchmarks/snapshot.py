@@ -0,0 +1,70 @@
+"""
+.. module:: snapshot.py
+   :platform: Linux
+   :synopsis: Benchmark of memory-mapped graph snapshots
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.snapshot -i IP -p PORT -n VERTICES
+
+A graph of VERTICES people, as many places and DEGREE edges of two types per person
+is written into a snapshot. Loading the snapshot maps its files instead of scanning
+the graph again. After a few visits have been added, a refresh scans the types
+with new elements only, while the people and the other edge type are copied from
+the snapshot.
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph import snapshot
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType
+import random
+import shutil
+import tempfile
+
+GRAPH = 'bench_snapshot'
+DEGREE = 4
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name'), ('int', 'age')))
+    place = g.create_vertex_type(RequestVertexType('Place', ('string', 'name')))
+    knows = g.create_edge_type(RequestEdgeType('knows'))
+    visits = g.create_edge_type(RequestEdgeType('visits', ('int', 'times')))
+    directory = tempfile.mkdtemp()
+    path = directory + '/' + GRAPH
+    try:
+        people = g.insert_vertices(person, [{'name' : 'Person{}'.format(i), 'age' : i % 90}
+                                            for i in xrange(args.count)]).results
+        places = g.insert_vertices(place, [{'name' : 'Place{}'.format(i)} for i in xrange(args.count)]).results
+        random.seed(args.count)
+        g.add_edges(knows, [(uid, 'Person', {random.choice(people) : 'Person'}, {})
+                            for uid in people for _ in xrange(DEGREE)])
+        g.add_edges(visits, [(uid, 'Person', {random.choice(places) : 'Place'}, {'times' : 1})
+                             for uid in people for _ in xrange(DEGREE)])
+        with Timer() as t:
+            g.create_snapshot(path, {'Person' : ['age']}, {'visits' : ['times']})
+        report('create_snapshot', args.count, t.elapsed)
+        with Timer() as t:
+            loaded = snapshot.load(path)
+        report('load', args.count, t.elapsed)
+        with Timer() as t:
+            degrees = [loaded.graph.out_degree(dense) for dense in xrange(loaded.graph.count_vertices())]
+        report('out degrees of the mapped snapshot', args.count, t.elapsed)
+        assert sum(degrees) == 2 * DEGREE * args.count
+        g.add_edges(visits, [(uid, 'Person', {random.choice(places) : 'Place'}, {'times' : 2})
+                             for uid in people[:10]])
+        with Timer() as t:
+            refreshed, scanned = g.refresh_snapshot(path)
+        report('refresh_snapshot ({})'.format(', '.join(scanned)), args.count, t.elapsed)
+        assert refreshed.graph.count_entries() == 2 * DEGREE * args.count + 10
+    finally:
+        shutil.rmtree(directory)
+        visits.remove()
+        knows.remove()
+        place.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Writing, loading and refreshing graph snapshots.', count=2000))
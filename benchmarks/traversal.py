@@ -0,0 +1,61 @@
+"""
+.. module:: traversal.py
+   :platform: Linux
+   :synopsis: Benchmark of breadth-first traversals
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.traversal -i IP -p PORT -n VERTICES
+
+A tree of VERTICES vertices with FANOUT children per vertex is traversed from its root,
+once with a loop of get_outgoing_edges and get_target per vertex and edge and once with
+HyperDexGraph.traverse. The loop waits for a round trip per vertex and edge, traverse
+requests the edges of a whole level and then their targets at once.
+"""
+from benchmarks.common import CountingClient, Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType
+
+GRAPH = 'bench_traversal'
+FANOUT = 8
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    knows = g.create_edge_type(RequestEdgeType('knows'))
+    try:
+        uids = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(args.count)]).results
+        g.add_edges(knows, [(uids[(i - 1) // FANOUT], 'Person', {uids[i] : 'Person'}, {})
+                            for i in xrange(1, args.count)])
+        root = g.get_vertex(uids[0], 'Person')
+        storage.requests.hyperdex_client = CountingClient(storage.requests.hyperdex_client)
+        with Timer() as t:
+            visited, frontier = set([root._uid]), [root]
+            while len(frontier) > 0:
+                reached = []
+                for vertex in frontier:
+                    for edge in vertex.get_outgoing_edges():
+                        for target in edge.get_target():
+                            if target._uid not in visited:
+                                visited.add(target._uid)
+                                reached.append(target)
+                frontier = reached
+        report('get_outgoing_edges and get_target', args.count, t.elapsed,
+               storage.requests.hyperdex_client.total())
+        assert len(visited) == args.count
+        storage.requests.hyperdex_client.reset()
+        with Timer() as t:
+            reached = sum(len(vertices) for _, vertices in g.traverse(root))
+        report('traverse', args.count, t.elapsed, storage.requests.hyperdex_client.total())
+        assert reached == args.count
+    finally:
+        storage.requests.hyperdex_client = getattr(storage.requests.hyperdex_client, 'client',
+                                                   storage.requests.hyperdex_client)
+        knows.remove()
+        person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Traversing a tree breadth-first.', count=1000))
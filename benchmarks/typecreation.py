@@ -0,0 +1,41 @@
+"""
+.. module:: typecreation.py
+   :platform: Linux
+   :synopsis: Benchmark of graph opening and type creation, including the cluster waits
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.typecreation -i IP -p PORT -n TYPES
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType
+from graphstore import readiness
+
+GRAPH = 'bench_typecreation'
+
+
+def run(args):
+    with Timer() as t:
+        g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    report('open new graph', 1, t.elapsed)
+    with Timer() as t:
+        HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    report('open existing graph', 1, t.elapsed)
+    with Timer() as t:
+        HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH, fast_open=True)
+    report('fast open existing graph', 1, t.elapsed)
+    types = []
+    try:
+        with Timer() as t:
+            for i in xrange(args.count):
+                types.append(g.create_vertex_type(RequestVertexType('Type{}'.format(i), ('string', 'name'), ('int', 'age'))))
+        report('create vertex type', args.count, t.elapsed)
+        print('cluster waits: {}'.format(readiness.STATISTICS))
+    finally:
+        for element_type in types:
+            element_type.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Graph opening and type creation.', count=10))
@@ -0,0 +1,53 @@
+"""
+.. module:: typedrop.py
+   :platform: Linux
+   :synopsis: Benchmark of removing whole element types
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Run from the repository root: python -m benchmarks.typedrop -i IP -p PORT -n EDGES
+
+EDGES edges between PEOPLE vertices are removed by dropping their type, which scans the
+edges with one and with several threads and removes them from their vertices. At last
+the vertex type is dropped together with the edges of another type.
+"""
+from benchmarks.common import Timer, parse_args, report
+from graph.hyperdexgraph import HyperDexGraph
+from graph.requestgraphelements import RequestVertexType, RequestEdgeType, RequestVertex
+
+GRAPH = 'bench_typedrop'
+PEOPLE = 1000
+PARALLELISM = 4
+
+
+def populate(g, knows, people, count):
+    edges = [(people[i % PEOPLE], 'Person', {people[(i * 7 + 1) % PEOPLE] : 'Person'}, {})
+             for i in xrange(count)]
+    g.add_edges(knows, edges)
+
+
+def run(args):
+    g = HyperDexGraph(args.hyperdex_ip, args.hyperdex_port, GRAPH)
+    storage = g._storage
+    person = g.create_vertex_type(RequestVertexType('Person', ('string', 'name')))
+    try:
+        people = g.insert_vertices(person, [{'name' : 'Person{}'.format(i)} for i in xrange(PEOPLE)]).results
+        for parallelism in (1, PARALLELISM):
+            knows = g.create_edge_type(RequestEdgeType('knows'))
+            populate(g, knows, people, args.count)
+            with Timer() as t:
+                storage.rm_edge_type('knows', parallelism=parallelism)
+            report('drop edge type, {} threads'.format(parallelism), args.count, t.elapsed)
+        likes = g.create_edge_type(RequestEdgeType('likes'))
+        populate(g, likes, people, args.count)
+        with Timer() as t:
+            storage.rm_vertex_type('Person', parallelism=PARALLELISM)
+        report('drop vertex type', PEOPLE + args.count, t.elapsed)
+        likes.remove()
+    finally:
+        if storage.vertex_type_exists('Person'):
+            person.remove()
+
+
+if __name__ == '__main__':
+    run(parse_args('Removal of whole element types.', count=10000))
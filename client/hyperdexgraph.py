@@ -9,7 +9,8 @@
 """
 import Pyro4
 from client.elementtype import VertexType, EdgeType
-from client.graphelement import Vertex
+from client.graphelement import Vertex, Edge
+from client.requestgraphelements import RequestVertexType, RequestEdgeType
 
 
 class HyperDexGraph(object):
@@ -55,6 +56,24 @@ class HyperDexGraph(object):
             #TODO duplicated type definition?
             raise Exception('Type was not created.')
     
+    def create_schema(self, requested_types):
+        type_defs = []
+        result = []
+        for requested_type in requested_types:
+            if isinstance(requested_type, RequestVertexType):
+                type_defs.append(('vertex', requested_type.get_element_type(), requested_type.get_structured_attr()))
+                result.append(VertexType(self._element_type_svr, requested_type.get_element_type(), self._graphname))
+            elif isinstance(requested_type, RequestEdgeType):
+                type_defs.append(('edge', requested_type.get_element_type(), requested_type.get_structured_attr()))
+                result.append(EdgeType(self._element_type_svr, requested_type.get_element_type(), self._graphname))
+            else:
+                raise TypeError('Illegal argument exception - must be instance of RequestVertexType or RequestEdgeType')
+        if(self._api.create_schema(self._graphname, type_defs)):
+            return result
+        else:
+            #TODO duplicated type definition?
+            raise Exception('Schema was not created.')
+    
     def insert_vertex(self, requested_vertex):
         uid = self._api.insert_vertex(self._graphname, requested_vertex.get_vertex_type(), requested_vertex._properties)
         if(uid is not None):
@@ -65,6 +84,43 @@ class HyperDexGraph(object):
         if(self._api.get_vertex(self._graphname, uid, vertex_type.get_type_name())):
             return Vertex(uid, vertex_type.get_type_name(), self._graph_element_svr, self._graphname)
     
+    def get_vertices(self, vertices):
+        '''
+        Retrieves several vertices with a single call, the worker reads them at once.
+        
+        Args:
+            vertices: The unique identifier and the type (identifier) of each requested
+                      vertex (list<tuple<int, str/VertexType>>).
+        
+        Returns:
+            The Vertex objects in the requested order, None for missing ones (list<Vertex>).
+        '''
+        vertices = [(uid, self._type_name(vertex_type)) for uid, vertex_type in vertices]
+        found = self._api.get_vertices(self._graphname, vertices)
+        return [Vertex(uid, vertex_type, self._graph_element_svr, self._graphname) if exists else None
+                for (uid, vertex_type), exists in zip(vertices, found)]
+    
+    def get_edges(self, edges):
+        '''
+        Retrieves several edges with a single call, the worker reads them at once.
+        
+        Args:
+            edges: The unique identifier and the type (identifier) of each requested edge
+                   (list<tuple<int, str/EdgeType>>).
+        
+        Returns:
+            The Edge objects in the requested order, None for missing ones (list<Edge>).
+        '''
+        edges = [(uid, self._type_name(edge_type)) for uid, edge_type in edges]
+        found = self._api.get_edges(self._graphname, edges)
+        return [Edge(uid, edge_type, self._graph_element_svr, self._graphname) if exists else None
+                for (uid, edge_type), exists in zip(edges, found)]
+    
+    def _type_name(self, element_type):
+        if isinstance(element_type, (VertexType, EdgeType)):
+            return element_type.get_type_name()
+        return element_type
+    
     def search_vertex(self, vertex_type, *search):
         #TODO
         pass
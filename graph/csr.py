@@ -0,0 +1,315 @@
+"""
+.. module:: csr.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+The export copies the link structure of a graph into compressed sparse rows: vertex
+i has the dense index i, its outgoing edges are the entries offsets[i] up to
+offsets[i + 1] of the targets, edges and edge_types arrays. The arrays are NumPy
+arrays if NumPy is installed, otherwise arrays of the array module.
+"""
+from array import array
+from graphstore.storage import GENERIC_VERTEX
+from hyperdex.client import HyperClientException
+import logging
+try:
+    #whole-graph algorithms run vectorized on NumPy arrays
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#typecode of the ids, indices and offsets, 64 bit on Linux
+INDEX = 'l'
+#typecode of the type indices
+TYPE_INDEX = 'h'
+#typecodes of the columns of structured attributes, other attributes are kept in lists
+COLUMNS = {'int' : 'l', 'float' : 'd'}
+
+
+class CSRGraph(object):
+    '''
+    The CSRGraph is an in-memory copy of the vertices and edges of a graph in the
+    compressed sparse row format. An edge with several targets has an entry per target.
+
+    Attributes:
+        uids: The id of each vertex by dense index (array<int>).
+        vertex_types: The index of the type of each vertex in vertex_type_names (array<int>).
+        offsets: The first entry of each vertex, followed by the number of entries (array<int>).
+        targets: The dense index of the vertex each entry leads to (array<int>).
+        edges: The id of the edge of each entry (array<int>).
+        edge_types: The index of the type of each entry in edge_type_names (array<int>).
+        index: The dense index of each vertex id (dict<int, int>).
+        rows: The dense indices of the vertices or the entries of each type (dict<str, array<int>>).
+        columns: The exported structured attributes of each type, aligned with its rows
+                 (dict<str, dict<str, array/list>>).
+    '''
+
+    def __init__(self, vertex_type_names, uids, vertex_types, offsets, targets, edges,
+                 edge_type_names, edge_types, rows, columns):
+        self.vertex_type_names = list(vertex_type_names)
+        self.edge_type_names = list(edge_type_names)
+        self.uids = _convert(uids)
+        self.vertex_types = _convert(vertex_types)
+        self.offsets = _convert(offsets)
+        self.targets = _convert(targets)
+        self.edges = _convert(edges)
+        self.edge_types = _convert(edge_types)
+        self.rows = dict((type_name, _convert(type_rows)) for type_name, type_rows in rows.iteritems())
+        self.columns = dict((type_name, dict((attribute, _convert(column)) for attribute, column in type_columns.iteritems()))
+                            for type_name, type_columns in columns.iteritems())
+        self._index = None
+        self._sources = None
+
+    @property
+    def index(self):
+        #built with the first lookup, a loaded snapshot does not wait for it
+        if self._index is None:
+            self._index = dict((uid, dense) for dense, uid in enumerate(self.uids))
+        return self._index
+
+    def count_vertices(self):
+        return len(self.uids)
+
+    def count_entries(self):
+        return len(self.targets)
+
+    def out_degree(self, dense):
+        return self.offsets[dense + 1] - self.offsets[dense]
+
+    def neighbors(self, dense):
+        '''
+        Returns the vertices the outgoing edges of a vertex lead to.
+
+        Args:
+            dense: The dense index of the vertex (int).
+
+        Return:
+            The dense indices of the targets (array<int>).
+        '''
+        return self.targets[self.offsets[dense]:self.offsets[dense + 1]]
+
+    def reverse(self):
+        '''
+        Returns the incoming edges in the same format, i.e. the entries of a vertex
+        lead to the sources of its incoming edges.
+
+        Return:
+            The transposed graph with the same dense indices (CSRGraph).
+        '''
+        order, offsets = _group(self.targets, self.count_vertices())
+        position = _inverse(order)
+        rows = dict((type_name, _take(position, type_rows) if type_name in self.edge_type_names else type_rows)
+                    for type_name, type_rows in self.rows.iteritems())
+        return CSRGraph(self.vertex_type_names, self.uids, self.vertex_types, offsets,
+                        _take(self.sources(), order), _take(self.edges, order), self.edge_type_names,
+                        _take(self.edge_types, order), rows, self.columns)
+
+    def sources(self):
+        '''
+        Returns the vertex each entry belongs to.
+
+        Return:
+            The dense index of the source of each entry (array<int>).
+        '''
+        if self._sources is None:
+            if numpy is not None:
+                self._sources = numpy.repeat(numpy.arange(self.count_vertices()), numpy.diff(self.offsets))
+            else:
+                self._sources = array(INDEX)
+                for dense in xrange(self.count_vertices()):
+                    self._sources.extend(array(INDEX, [dense]) * self.out_degree(dense))
+        return self._sources
+
+    def has_columns(self, type_name, attributes):
+        return type_name in self.rows and all(attribute in self.columns.get(type_name, {}) for attribute in attributes)
+
+    def iter_vertices(self, vertex_type, attributes=()):
+        '''
+        Iterates over the vertices of a type.
+
+        Args:
+            vertex_type: The type of the vertices (str).
+            attributes: The exported attributes, whose values are returned (list<str>).
+
+        Return:
+            The id of each vertex and the values of the attributes (generator<tuple<int, list>>).
+        '''
+        type_columns = [self.columns[vertex_type][attribute] for attribute in attributes]
+        for position, dense in enumerate(self.rows[vertex_type]):
+            yield self.uids[dense], [column[position] for column in type_columns]
+
+    def iter_entries(self, edge_type, attributes=()):
+        '''
+        Iterates over the entries of the edges of a type.
+
+        Args:
+            edge_type: The type of the edges (str).
+            attributes: The exported attributes, whose values are returned (list<str>).
+
+        Return:
+            The ids of the source and the target, the id of the edge and the values of
+            the attributes of each entry (generator<tuple<int, int, int, list>>).
+        '''
+        sources = self.sources()
+        type_columns = [self.columns[edge_type][attribute] for attribute in attributes]
+        for position, entry in enumerate(self.rows[edge_type]):
+            yield (self.uids[sources[entry]], self.uids[self.targets[entry]], self.edges[entry],
+                   [column[position] for column in type_columns])
+
+
+def export(storage, vertex_attributes=None, edge_attributes=None, previous=None, unchanged=()):
+    '''
+    Copies all vertices and edges of a graph into a CSRGraph. Every vertex space is
+    scanned before the edge spaces, edges to vertices which have not been scanned, e.g.
+    because they have been inserted meanwhile, are left out. Hence the copy is
+    consistent in itself even though the graph is not locked.
+
+    Args:
+        storage: The storage of the graph (HyperDexStore).
+        vertex_attributes: The structured attributes exported per vertex type (dict<str, list<str>>).
+        edge_attributes: The structured attributes exported per edge type (dict<str, list<str>>).
+        previous: An earlier copy of the graph (CSRGraph).
+        unchanged: The types which are taken from the earlier copy instead of being
+                   scanned again (set<str>).
+
+    Return:
+        The copy of the graph (CSRGraph).
+    '''
+    vertex_attributes = vertex_attributes or {}
+    edge_attributes = edge_attributes or {}
+    vertex_type_names = sorted(storage.get_vertex_types()) + [GENERIC_VERTEX]
+    uids, vertex_types = array(INDEX), array(TYPE_INDEX)
+    rows, columns, index = {}, {}, {}
+    for type_index, vertex_type in enumerate(vertex_type_names):
+        key = 'id' if vertex_type == GENERIC_VERTEX else 'graph_uid'
+        attributes = vertex_attributes.get(vertex_type, [])
+        type_columns = _columns(storage, vertex_type, attributes)
+        if vertex_type in unchanged and previous.has_columns(vertex_type, attributes):
+            vertices = previous.iter_vertices(vertex_type, attributes)
+        else:
+            vertices = ((vertex[key], [vertex[attribute] for attribute in attributes])
+                        for vertex in _scan(storage, vertex_type))
+        type_rows = array(INDEX)
+        for uid, values in vertices:
+            index[uid] = len(uids)
+            type_rows.append(len(uids))
+            uids.append(uid)
+            vertex_types.append(type_index)
+            for (_, column), value in zip(type_columns, values):
+                column.append(value)
+        rows[vertex_type] = type_rows
+        columns[vertex_type] = dict(type_columns)
+    edge_type_names = sorted(storage.get_edge_types())
+    sources, targets, edges, edge_types = array(INDEX), array(INDEX), array(INDEX), array(TYPE_INDEX)
+    left_out = 0
+    for type_index, edge_type in enumerate(edge_type_names):
+        attributes = edge_attributes.get(edge_type, [])
+        type_columns = _columns(storage, edge_type, attributes)
+        if edge_type in unchanged and previous.has_columns(edge_type, attributes):
+            entries = previous.iter_entries(edge_type, attributes)
+        else:
+            entries = _iter_entries(storage, edge_type, attributes)
+        type_rows = array(INDEX)
+        for source_uid, target_uid, edge_uid, values in entries:
+            source, target = index.get(source_uid), index.get(target_uid)
+            if source is None or target is None:
+                left_out += 1
+                continue
+            type_rows.append(len(targets))
+            sources.append(source)
+            targets.append(target)
+            edges.append(edge_uid)
+            edge_types.append(type_index)
+            for (_, column), value in zip(type_columns, values):
+                column.append(value)
+        rows[edge_type] = type_rows
+        columns[edge_type] = dict(type_columns)
+    order, offsets = _group(sources, len(uids))
+    position = _inverse(order)
+    for edge_type in edge_type_names:
+        rows[edge_type] = _take(position, rows[edge_type])
+    logging.info('Exported {} vertices and {} edge entries, left out {} entries to unknown vertices'.format(
+        len(uids), len(targets), left_out))
+    return CSRGraph(vertex_type_names, uids, vertex_types, offsets, _take(targets, order), _take(edges, order),
+                    edge_type_names, _take(edge_types, order), rows, columns)
+
+
+def _scan(storage, element_type):
+    #the type might be removed while it is scanned
+    try:
+        for element in storage.get_all_elements(element_type):
+            yield element
+    except HyperClientException, e:
+        if e.symbol() != 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+            raise
+        logging.debug('Type {} has been removed during the export'.format(element_type))
+
+
+def _iter_entries(storage, edge_type, attributes):
+    for edge in _scan(storage, edge_type):
+        values = [edge[attribute] for attribute in attributes]
+        for target_uid in sorted(edge['target']):
+            yield edge['source_uid'], target_uid, edge['graph_uid'], values
+
+
+def _columns(storage, element_type, attributes):
+    if len(attributes) == 0:
+        return []
+    schema = storage.get_type_schema(element_type)
+    type_columns = []
+    for attribute in attributes:
+        if attribute not in schema.structured:
+            raise ValueError('{} is not a structured attribute of {}'.format(attribute, element_type))
+        data_type = schema.definition[attribute]
+        type_columns.append((attribute, array(COLUMNS[data_type]) if data_type in COLUMNS else []))
+    return type_columns
+
+
+def _group(keys, count):
+    #a stable counting sort of the entries by their keys, returns the order of the
+    #entries and the offset of each key
+    if numpy is not None:
+        keys = numpy.asarray(keys, dtype=numpy.int64)
+        offsets = numpy.zeros(count + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(keys, minlength=count), out=offsets[1:])
+        return numpy.argsort(keys, kind='mergesort'), offsets
+    offsets = array(INDEX, [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for key in xrange(count):
+        offsets[key + 1] += offsets[key]
+    free = array(INDEX, offsets[:count])
+    order = array(INDEX, [0]) * len(keys)
+    for entry, key in enumerate(keys):
+        order[free[key]] = entry
+        free[key] += 1
+    return order, offsets
+
+
+def _inverse(order):
+    if numpy is not None:
+        position = numpy.empty(len(order), dtype=numpy.int64)
+        position[order] = numpy.arange(len(order))
+        return position
+    position = array(INDEX, [0]) * len(order)
+    for new, old in enumerate(order):
+        position[old] = new
+    return position
+
+
+def _take(values, order):
+    if numpy is not None:
+        return numpy.asarray(values)[numpy.asarray(order, dtype=numpy.int64)]
+    if hasattr(values, 'typecode'):
+        #an array of the array module or a mapped one
+        return array(values.typecode, (values[entry] for entry in order))
+    return [values[entry] for entry in order]
+
+
+def _convert(values):
+    if numpy is None or not isinstance(values, array):
+        return values
+    return numpy.array(values, dtype=numpy.float64 if values.typecode == 'd' else numpy.int64)
@@ -31,10 +31,17 @@ class ElementType(object):
         Return:
             The created type declaration (dict).
         '''
-        result = {}
-        for attr in self._storage.typeadmin.get_type_description(self._typename):
-            result[attr[1]] = attr[0]
-        return result
+        return self.get_type_schema().get_definition()
+    
+    def get_type_schema(self):
+        '''
+        Returns the compiled schema of this graph element type, which is
+        cached per process.
+        
+        Return:
+            The type schema (TypeSchema).
+        '''
+        return self._storage.get_type_schema(self._typename)
     
     def get_type_name(self):
         '''
@@ -54,6 +61,12 @@ class ElementType(object):
             Count of related graph elements (int).
         '''
         return self._storage.count_elements(self._typename)
+    
+    def _handle(self, element_class, element, snapshot, max_age):
+        handle = element_class(element['graph_uid'], self._typename, self._storage, snapshot, max_age)
+        if snapshot:
+            handle._seed(element)
+        return handle
         
     
     #TDOD provide search method on these elements
@@ -67,16 +80,35 @@ class VertexType(ElementType, object):
     def __init__(self, storage, vertex_type):
         super(VertexType, self).__init__(storage, vertex_type)
         
-    def get_vertices(self):
+    def get_vertices(self, snapshot=False, max_age=None):
+        '''
+        Returns all vertices of this type.
+        
+        Args:
+            snapshot: Open the vertices in snapshot mode, their properties are taken 
+                      from the read vertices (bool).
+            max_age: The number of seconds after which a snapshot is reloaded (float).
+        
+        Return:
+            The vertices (list<Vertex>).
+        '''
         from graph import graphelement
-        return [graphelement.Vertex(v['graph_uid'],self._typename,self._storage) for v in self._storage.get_all_elements(self._typename)]
+        return [self._handle(graphelement.Vertex, v, snapshot, max_age) for v in self._storage.get_all_elements(self._typename)]
     
-    def remove(self):
+    def remove(self, progress=None):
         '''
-        Removes this element type and all associated elements.
+        Removes this element type and all associated elements. The elements are
+        scanned beforehand, so that no edge points to a removed vertex.
+        
+        Args:
+            progress: Called with the number of removed elements and the elapsed seconds
+                      (callable<int, float>).
+        
+        Return:
+            The number of removed elements (int).
         '''
         logging.info('Removing ElementType {} and all its entities'.format(self._typename))
-        self._storage.rm_vertex_type(self._typename)
+        return self._storage.rm_vertex_type(self._typename, progress=progress)
         
 class EdgeType(ElementType, object):
     '''
@@ -86,13 +118,32 @@ class EdgeType(ElementType, object):
     def __init__(self, storage, edge_type):
         super(EdgeType, self).__init__(storage, edge_type)
     
-    def get_edges(self):
+    def get_edges(self, snapshot=False, max_age=None):
+        '''
+        Returns all edges of this type.
+        
+        Args:
+            snapshot: Open the edges in snapshot mode, their properties are taken 
+                      from the read edges (bool).
+            max_age: The number of seconds after which a snapshot is reloaded (float).
+        
+        Return:
+            The edges (list<Edge>).
+        '''
         from graph import graphelement
-        return [graphelement.Edge(e['id'],self._typename,self._storage) for e in self._storage.get_all_elements(self._typename)]
+        return [self._handle(graphelement.Edge, e, snapshot, max_age) for e in self._storage.get_all_elements(self._typename)]
         
-    def remove(self):
+    def remove(self, progress=None):
         '''
-        Removes this element type and all associated elements.
+        Removes this element type and all associated elements. The elements are
+        scanned beforehand, so that no vertex keeps a removed edge.
+        
+        Args:
+            progress: Called with the number of removed elements and the elapsed seconds
+                      (callable<int, float>).
+        
+        Return:
+            The number of removed elements (int).
         '''
         logging.info('Removing ElementType {} and all its entities'.format(self._typename))
-        self._storage.rm_edge_type(self._typename)
+        return self._storage.rm_edge_type(self._typename, progress=progress)
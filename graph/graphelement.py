@@ -6,9 +6,15 @@
 
 
 """
-from serialization import serializer
 from graph import elementtype 
+from graphstore.graphexception import ElementNotFoundException, TypeNotFoundException
+from graphstore.schemacache import TypeSchema, UNSTRUCTURED, VALUE
+from graphstore.adjacency import INCOMING, OUTGOING
+import time
 GENERIC_VERTEX = 'generic_vertex'
+#the attributes holding the edges of a vertex, they cannot be set as property
+ADJACENCY = frozenset([INCOMING, OUTGOING])
+GENERIC_ATTRIBUTES = [('map(int, string)', INCOMING), ('map(int, string)', OUTGOING)]
 
 
 
@@ -16,12 +22,25 @@ class GraphElement(object):
     '''
     This class is the in-memory representation of an existing graph element. It is a handle
     on a certain vertex or edge object, which provides for modifying this particular element. 
+    
+    In snapshot mode the properties are read once and kept by the handle, so that reading
+    several of them costs a single request. The snapshot is reloaded by refresh() or once 
+    it is older than max_age seconds, changes made through the handle are applied to it.
+    The incoming and outgoing edges are never part of the snapshot.
     '''
 
 
-    def __init__(self, uid, element_type, storage):
+    def __init__(self, uid, element_type, storage, snapshot=False, max_age=None):
         '''
-        Constructor
+        Constructor.
+        
+        Args:
+            uid: The unique identifier of the graph element (int).
+            element_type: The type of the graph element (str/ElementType).
+            storage: The storage of the graph (HyperDexStore).
+            snapshot: Keep the properties once they have been read (bool).
+            max_age: The number of seconds after which the snapshot is reloaded, None 
+                     for never (float).
         '''
         self._uid = uid
         if isinstance(element_type, elementtype.ElementType): #if element_type is a complex type object
@@ -31,16 +50,17 @@ class GraphElement(object):
         else:
             raise TypeError('Illigal argument exception')
         self._storage = storage#pass a handle on the underlying graphstorage provider
+        self._snapshot = snapshot
+        self._max_age = max_age
+        self._record = None
+        self._loaded_at = None
 
             
     def __getattr__(self, attr):
         # enable property access directly by [graphelement].[propertykey]
-        element = self._storage.get_graph_element(self._uid, self._element_type)
-        if attr in element:
-            return element[attr]
-        unstr = serializer.deserialize(element['value'])
-        if attr in unstr:
-            return unstr[attr]
+        found, value = self._lookup(attr)
+        if found:
+            return value
         raise AttributeError('Vertex has no property ' + str(attr))
     
     def __setattr__(self, attr, value):
@@ -50,7 +70,106 @@ class GraphElement(object):
         self.set_property(attr, value)
 
     def _get_attr_value(self, key):
-        return self._storage.get_graph_element(self._uid, self._element_type)[key] 
+        return self._storage.get_graph_element(self._uid, self._element_type, [key])[key] 
+
+    def _lookup(self, key):
+        '''
+        Reads a single property. Only the attributes which might hold it are read,
+        i.e. never the incoming and outgoing edges unless they are requested.
+        
+        Args:
+            key: The property identifier (str).
+        
+        Return:
+            Whether the property exists and its value (tuple<bool, any type>).
+        '''
+        #the schema knows whether this key is a structured attribute, otherwise 
+        #only the requested unstructured property is deserialized
+        schema = self._get_schema()
+        if self._snapshot:
+            props = self._load(schema)
+            if props is None:
+                return False, None
+            return schema.lookup(props, key)
+        if key in schema.structured:
+            attributes = [key]
+        else:
+            attributes = self._unstructured_attributes(schema)
+        #retrieve attributes for this very graph element, this is lazy
+        props = self._storage.get_graph_element(self._uid, self._element_type, attributes)
+        if props is None:
+            return False, None
+        return schema.lookup(props, key)
+
+    def _unstructured_attributes(self, schema):
+        if schema.per_key:
+            return [UNSTRUCTURED, VALUE]
+        return [VALUE]
+
+    def snapshot(self, max_age=None):
+        '''
+        Switches this handle to snapshot mode, the properties are read with the next
+        access.
+        
+        Args:
+            max_age: The number of seconds after which the snapshot is reloaded, None
+                     for never (float).
+        
+        Return:
+            This handle (GraphElement).
+        '''
+        self._snapshot = True
+        self._max_age = max_age
+        return self
+
+    def refresh(self):
+        '''
+        Reloads the snapshot of the properties. Without snapshot mode there is
+        nothing to reload, every access reads the properties anyway.
+        '''
+        if self._snapshot:
+            self._load(self._get_schema(), True)
+
+    def _load(self, schema, reload=False):
+        '''
+        Returns the snapshot of the stored attributes, which is read if it has not
+        been read yet or if it is too old.
+        
+        Return:
+            The stored attributes without the edges, None if the graph element does
+            not exist (dict).
+        '''
+        stale = self._max_age is not None and self._loaded_at is not None \
+            and time.time() - self._loaded_at > self._max_age
+        if reload or stale or self._loaded_at is None:
+            self._seed(self._storage.get_graph_element(self._uid, self._element_type, 
+                                                       self._snapshot_attributes(schema)))
+        return self._record
+
+    def _snapshot_attributes(self, schema):
+        attributes = [key for key in schema.structured if key not in ADJACENCY]
+        attributes.extend(self._unstructured_attributes(schema))
+        return attributes
+
+    def _seed(self, record):
+        #the snapshot might come from a search, which returns the key and the edges as well
+        if record is not None:
+            record = dict((key, value) for key, value in record.iteritems() 
+                          if key not in ADJACENCY and key != 'graph_uid')
+        self._record = record
+        self._loaded_at = time.time()
+
+    def _write_through(self, attributes):
+        #applies written attributes to the snapshot, a per-key map is written by map_add
+        if self._record is None:
+            return
+        for key, value in attributes.iteritems():
+            if key == UNSTRUCTURED:
+                encoded = dict(self._record.get(key) or {})
+                encoded.update(value)
+                self._record[key] = encoded
+            else:
+                self._record[key] = value
 
     def get_property(self, key):
         '''
@@ -62,18 +181,7 @@ class GraphElement(object):
         Return:
             The value of the requested property (any type).
         '''
-        #retrieve attributes for this very graph element, this is lazy
-        props = self._storage.get_graph_element(self._uid, self._element_type)
-        #check whether this key is a structured attributes
-        if key in props:
-            return props[key]
-        else:
-            #if the key is not in structured attributes, perform a lookup in the unstructured part
-            props = serializer.deserialize(props['value'])#deserialize the binary string
-            if key in props:
-                return props[key]
-            else:
-                return None#if not found, return the NoneType
+        return self._lookup(key)[1]
 
     def set_property(self, key, value):
         '''
@@ -83,17 +191,58 @@ class GraphElement(object):
             key: The property identifier (str). 
             value: The value of this property (any type).
         '''
-        if key == 'incoming_edges' or key == 'outgoing_edges':
-            raise TypeError('Connot set key {} with value {}'.format(key, str(value)))
-        props = self._storage.get_graph_element(self._uid, self._element_type)
-        if key in props: #if the key is part of the structured attributes
-            #TODO check type, prevent from storing wrong data types
-            props[key] = value
-        else: #if the key is not part of the structured attributes, store it as unstructured
-            unstr_props = serializer.deserialize(props['value']) #deserialize all unstructured attributes
-            unstr_props[key] = value #add the newly created property
-            props['value'] = serializer.serialize(unstr_props) #store resulting unstructured attributes, serialize it
-        self._storage.put_graph_element(self._uid, self._element_type, props) #put it back to the database
+        self.set_properties({key : value})
+    
+    def set_properties(self, properties):
+        '''
+        Sets the values for several keys on this very graph element. Only the changed
+        attributes are written, the incoming and outgoing edges are neither read nor
+        written.
+        
+        Args:
+            properties: The property identifiers and their values (dict).
+        '''
+        for key in properties:
+            if key in ADJACENCY:
+                raise TypeError('Connot set key {} with value {}'.format(key, str(properties[key])))
+        schema = self._get_schema()
+        #TODO check type, prevent from storing wrong data types
+        struct_attr, unstr_attr = schema.split(properties)
+        if schema.per_key:
+            #every property is written on its own
+            if len(struct_attr) > 0:
+                if not self._storage.update_graph_element(self._uid, self._element_type, struct_attr):
+                    raise ElementNotFoundException(self._uid, self._element_type)
+                self._write_through(struct_attr)
+            if len(unstr_attr) > 0:
+                encoded = schema.encode(unstr_attr)
+                if not self._storage.add_unstructured(self._uid, self._element_type, encoded):
+                    raise ElementNotFoundException(self._uid, self._element_type)
+                self._write_through({UNSTRUCTURED : encoded})
+            return
+        if len(unstr_attr) == 0:
+            if not self._storage.update_graph_element(self._uid, self._element_type, struct_attr):
+                raise ElementNotFoundException(self._uid, self._element_type)
+            self._write_through(struct_attr)
+            return
+        while True:
+            #the unstructured attributes are stored together, a concurrent change must not get lost
+            current = self._storage.get_graph_element(self._uid, self._element_type, [VALUE])
+            if current is None:
+                raise ElementNotFoundException(self._uid, self._element_type)
+            unstr_props = schema.unpack(current)
+            unstr_props.update(unstr_attr)
+            struct_attr[VALUE] = schema.serialize(unstr_props)
+            if self._storage.update_graph_element(self._uid, self._element_type, struct_attr, current):
+                self._write_through(struct_attr)
+                return
+    
+    def _get_schema(self):
+        try:
+            return self._storage.get_type_schema(self._element_type)
+        except TypeNotFoundException:
+            #generic vertices, all their properties are unstructured
+            return TypeSchema(self._element_type, GENERIC_ATTRIBUTES, self._storage.codec)
     
     def get_property_keys(self):
         '''
@@ -102,25 +251,24 @@ class GraphElement(object):
         Return:
             Set of available keys (set<str>).
         '''
-        props = self._storage.get_graph_element(self._uid, self._element_type)
-        result = set()
-        for prop in props.keys():
-            if prop == 'value':
-                unstruct = serializer.deserialize(props[prop])
-                for un_prop in unstruct.keys():
-                    result.add(un_prop)
-                continue
-            else:
-                result.add(prop)
-        return result
+        schema = self._get_schema()
+        if self._snapshot:
+            props = self._load(schema)
+        else:
+            #the keys of the structured attributes are known, only the unstructured ones are read
+            props = self._storage.get_graph_element(self._uid, self._element_type, 
+                                                    self._unstructured_attributes(schema))
+        if props is None:
+            raise ElementNotFoundException(self._uid, self._element_type)
+        return schema.keys(props)
         
 
 class Vertex(GraphElement, object):
     
-    def __init__(self, uid, vertex_type, storage):
+    def __init__(self, uid, vertex_type, storage, snapshot=False, max_age=None):
         if vertex_type is None:
             vertex_type = GENERIC_VERTEX
-        super(Vertex, self).__init__(uid,vertex_type, storage)
+        super(Vertex, self).__init__(uid,vertex_type, storage, snapshot, max_age)
     
     def add_edge(self, target_vertices, edge_type, struct_attr = {}, unstruc_attr = {}):
         '''
@@ -144,11 +292,16 @@ class Vertex(GraphElement, object):
                 target[i._uid] = i._element_type
         else:
             target = {target_vertices._uid : target_vertices._element_type}
+        struct_attr = dict(struct_attr)
+        if(len(unstruc_attr) != 0):
+            schema = self._storage.get_type_schema(edge_type)
+            if schema.per_key:
+                struct_attr[UNSTRUCTURED] = schema.encode(unstruc_attr)
+            else:
+                struct_attr[VALUE] = schema.serialize(unstruc_attr)
         struct_attr['source_uid'] = self._uid
         struct_attr['source_vertex_type'] = self._element_type
         struct_attr['target'] = target
-        if(len(unstruc_attr) != 0):
-            struct_attr['value'] = serializer.serialize(unstruc_attr)
         edge_uid = self._storage.add_edge(self._uid, self._element_type, target , edge_type, struct_attr)
         return Edge(edge_uid, edge_type, self._storage)
     
@@ -157,45 +310,57 @@ class Vertex(GraphElement, object):
         del edge
     
     def get_outgoing_edges(self, edge_type = None):
-        result = []
-        edges = self.get_property('outgoing_edges')
-        if edge_type is None:
-            for edge in edges.keys():
-                result.append(Edge(edge, edges[edge], self._storage))
-        else:
-            if isinstance(edge_type, elementtype.EdgeType):
-                edge_type = edge_type.get_type_name()
-            for edge in edges.keys():
-                if edges[edge] == edge_type:
-                    result.append(Edge(edge, edges[edge], self._storage))
-        return result
+        return list(self.iter_outgoing_edges(edge_type))
     
     def get_incoming_edges(self, edge_type = None):
-        result = []
-        edges = self.get_property('incoming_edges')
-        if edge_type is None:
-            for edge in edges.keys():
-                result.append(Edge(edge, edges[edge], self._storage))
-        else:
-            if isinstance(edge_type, elementtype.EdgeType):
-                edge_type = edge_type.get_type_name()
-            for edge in edges.keys():
-                if edges[edge] == edge_type:
-                    result.append(Edge(edge, edges[edge], self._storage))
-        return result
+        return list(self.iter_incoming_edges(edge_type))
+    
+    def iter_outgoing_edges(self, edge_type = None):
+        '''
+        Iterates over the outgoing edges, a vertex with many edges is read page by page.
+        
+        Args:
+            edge_type: Only edges of this type, None for all (str/EdgeType).
+        
+        Return:
+            The outgoing edges (generator<Edge>).
+        '''
+        return self._iter_edges(OUTGOING, edge_type)
+    
+    def iter_incoming_edges(self, edge_type = None):
+        '''
+        Iterates over the incoming edges, a vertex with many edges is read page by page.
+        
+        Args:
+            edge_type: Only edges of this type, None for all (str/EdgeType).
+        
+        Return:
+            The incoming edges (generator<Edge>).
+        '''
+        return self._iter_edges(INCOMING, edge_type)
+    
+    def _iter_edges(self, direction, edge_type):
+        if isinstance(edge_type, elementtype.EdgeType):
+            edge_type = edge_type.get_type_name()
+        for edge, type_name in self._storage.iter_edges(self._uid, self._element_type, direction):
+            if edge_type is None or type_name == edge_type:
+                yield Edge(edge, type_name, self._storage)
+    
+    def _lookup(self, key):
+        #the edges might be paged, they are never read as a plain attribute
+        if key in ADJACENCY:
+            return True, dict(self._storage.iter_edges(self._uid, self._element_type, key))
+        return super(Vertex, self)._lookup(key)
         
     def remove(self):
-        for edge in self.get_incoming_edges():
-            edge.remove()
-        for edge in self.get_outgoing_edges():
-            edge.remove()
-        self._storage.rm_vertex(self._uid, self._element_type)
+        #all edges are removed at once, together with the vertex
+        self._storage.rm_vertex_cascade(self._uid, self._element_type)
 
 
 class Edge(GraphElement):
     
-    def __init__(self, uid, edge_type,  storage):
-        super(Edge, self).__init__(uid, edge_type, storage)
+    def __init__(self, uid, edge_type,  storage, snapshot=False, max_age=None):
+        super(Edge, self).__init__(uid, edge_type, storage, snapshot, max_age)
         self._source = None
     
     
@@ -222,7 +387,7 @@ class Edge(GraphElement):
         return True
     
     def remove(self):
-        self._storage.rm_edge(self.get_source()._uid, self._source._element_type, self._uid, self._element_type)
+        self._storage.rm_edges([(self._uid, self._element_type)])
         return True
     
     def add_target(self, target_vertices):  
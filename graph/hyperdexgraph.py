@@ -9,14 +9,24 @@
 """
 from graphstore.storage import HyperDexStore as HyperDex
 from graph.elementtype import VertexType, EdgeType
-from graph.graphelement import Vertex
+from graph.graphelement import Vertex, Edge
+from graph.traversal import BreadthFirstTraversal
+from graph.shortestpath import ShortestPath, WAVE_SIZE
+from graph import csr, snapshot
+from graphstore.adjacency import OUTGOING
 from graphstore.graphexception import ElementNotFoundException, TypeNotFoundException
 from graph.requestgraphelements import RequestVertexType, RequestEdgeType,\
     RequestVertex
-from serialization import serializer
+from graphstore.pipeline import BatchResult, MAX_IN_FLIGHT
+from graphstore.schemacache import VALUE
+from itertools import islice
 import logging
 
 
+#number of vertices, for which the ids are allocated at once
+BATCH_SIZE = 1024
+
+
 class HyperDexGraph(object):
     '''
     This is the basic HyperDexGraph API, which provides for interacting with the underlying
@@ -31,7 +41,7 @@ class HyperDexGraph(object):
     search - performs a lookup for vertices, edges, graph pattern matching
     '''
 
-    def __init__(self, address, port, graph):
+    def __init__(self, address, port, graph, fast_open=False, codec=None, cache=False):
         '''
         Creates a new HyperDexGraph API in order to work with HyperDex as a graph store.
         
@@ -39,12 +49,19 @@ class HyperDexGraph(object):
             address: The IP address of the HyperDex coordinator process (str).
             port: The port number of the HyperDex coordinator process (int).
             graph: The identifier of the graph to be opened (str).
+            fast_open: Open the graph without any round trip, the database is validated
+                       with the first write, once per process (bool).
+            codec: The codec new properties are serialized with, e.g. binary or 
+                   binary+zlib. Values are readable whatever codec they have been 
+                   written with (str).
+            cache: Cache the read graph elements in this process, which is invalidated
+                   by the writes of this process only (bool).
             
         Returns:
             Returns a newly created HyperDexGraph handle for the database.
         '''
         logging.basicConfig(filename='hyperdexgraph.log', filemode='w', level=logging.DEBUG)
-        self._storage = HyperDex(address, port, graph)
+        self._storage = HyperDex(address, port, graph, fast_open=fast_open, codec=codec, cache=cache)
         self._graph_name = graph
         
     
@@ -102,7 +119,8 @@ class HyperDexGraph(object):
         '''
         logging.info('Creating VertexType object for {} in {} '.format(requested_vertex_type.get_element_type(), self._graph_name))
         if isinstance(requested_vertex_type, RequestVertexType):
-            self._storage.add_vertex_type(requested_vertex_type.get_element_type(), requested_vertex_type.get_structured_attr())
+            self._storage.add_vertex_type(requested_vertex_type.get_element_type(), requested_vertex_type.get_structured_attr(),
+                                          requested_vertex_type.get_subspaces())
             return VertexType(self._storage, requested_vertex_type.get_element_type())
         else:
             logging.debug('Creating VertexType was: Illegal argument exception')
@@ -124,13 +142,44 @@ class HyperDexGraph(object):
         '''
         logging.info('Creating EdgeType object for {} in {} '.format(requested_edge_type.get_element_type(), self._graph_name))
         if isinstance(requested_edge_type, RequestEdgeType):
-            self._storage.add_edge_type(requested_edge_type.get_element_type(), requested_edge_type.get_structured_attr())
+            self._storage.add_edge_type(requested_edge_type.get_element_type(), requested_edge_type.get_structured_attr(),
+                                        requested_edge_type.get_subspaces())
             return EdgeType(self._storage, requested_edge_type.get_element_type())
         else:
             logging.debug('Creating EdgeType was: Illegal argument exception')
             raise TypeError('Illegal argument exception - must be instance of RequestEdgeType')
     
 
+    def create_schema(self, requested_types):
+        '''
+        Creates several vertex and edge types at once. This is much faster than creating
+        the types one by one, since the cluster is waited for only once and all types
+        are registered in batched writes.
+        
+        Args:
+            requested_types: RequestVertexType and RequestEdgeType objects containing the 
+            identifiers and type descriptions (list<RequestVertexType/RequestEdgeType>).
+             
+        Returns:
+            The VertexType and EdgeType objects in the order of the request (list<VertexType/EdgeType>).
+        '''
+        vertex_types, edge_types, result = [], [], []
+        for requested_type in requested_types:
+            if isinstance(requested_type, RequestVertexType):
+                vertex_types.append((requested_type.get_element_type(), requested_type.get_structured_attr(),
+                                     requested_type.get_subspaces()))
+                result.append(VertexType(self._storage, requested_type.get_element_type()))
+            elif isinstance(requested_type, RequestEdgeType):
+                edge_types.append((requested_type.get_element_type(), requested_type.get_structured_attr(),
+                                   requested_type.get_subspaces()))
+                result.append(EdgeType(self._storage, requested_type.get_element_type()))
+            else:
+                logging.debug('Creating schema was: Illegal argument exception')
+                raise TypeError('Illegal argument exception - must be instance of RequestVertexType or RequestEdgeType')
+        logging.info('Creating {} VertexType and {} EdgeType objects in {}'.format(len(vertex_types), len(edge_types), self._graph_name))
+        self._storage.add_types(vertex_types, edge_types)
+        return result
+
     def insert_vertex(self, requested_vertex):
         '''
         Inserts a vertex of a given type into the database. The vertex must be represented as RequestVertex
@@ -146,14 +195,140 @@ class HyperDexGraph(object):
         '''
         if isinstance(requested_vertex, RequestVertex):
             logging.info('Inserting a vertex was requested into ' + self._graph_name)
-            uid = self._storage.add_vertex(requested_vertex.get_vertex_type(), requested_vertex.get_structured_attr(),
-                                      serializer.serialize(requested_vertex.get_unstructured_attr()))
+            struct_attr, unstrc_att = requested_vertex.pack()
+            uid = self._storage.add_vertex(requested_vertex.get_vertex_type(), struct_attr, unstrc_att)
             return Vertex(uid, requested_vertex.get_vertex_type(), self._storage)
         else:
             logging.debug('Inserting vertex was: Illegal argument exception')
             raise TypeError('Illegal argument exception - must be instance of RequestVertex')
     
-    def get_vertex(self, uid, vertex_type):
+    def insert_vertices(self, vertex_type, vertices, batch_size=BATCH_SIZE, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Inserts many vertices of a given type into the database. This is much faster than
+        inserting the vertices one by one, since the ids are allocated in bulk and the 
+        vertices are written with a bounded number of asynchronous requests in flight.
+        A vertex which cannot be inserted does not abort the batch.
+        
+        Args:
+            vertex_type: The type (identifier) of the inserted vertices (str/VertexType).
+            vertices: The properties of each vertex (iterable<dict>).
+            batch_size: The number of vertices processed at once (int).
+            max_in_flight: The maximal number of outstanding requests (int).
+             
+        Returns: 
+            The unique ids in the order of the given vertices, None for the failed ones. The 
+            errors are available by the index of the vertex (BatchResult).
+        '''
+        if isinstance(vertex_type, VertexType):
+            vertex_type = vertex_type.get_type_name()
+        elif not isinstance(vertex_type, str):
+            raise TypeError('Illegal argument exception - must be instance of VertexType or str')
+        schema = self._storage.get_type_schema(vertex_type)
+        logging.info('Inserting vertices was requested into {}_{}'.format(self._graph_name, vertex_type))
+        uids, errors = [], {}
+        vertices = iter(vertices)
+        while True:
+            batch = list(islice(vertices, batch_size))
+            if len(batch) == 0:
+                break
+            offset = len(uids)
+            struct_attrs, unstrc_attrs, indices = [], [], []
+            for index, properties in enumerate(batch):
+                try:
+                    struct_attr, unstrc_att = schema.pack(properties)
+                    unstrc_attrs.append(unstrc_att)
+                    struct_attrs.append(struct_attr)
+                    indices.append(offset + index)
+                except Exception, e:
+                    errors[offset + index] = e
+            uids.extend([None] * len(batch))
+            result = self._storage.add_vertices(vertex_type, struct_attrs, unstrc_attrs, max_in_flight)
+            for position, index in enumerate(indices):
+                uids[index] = result[position]
+                if position in result.errors:
+                    errors[index] = result.errors[position]
+        return BatchResult(uids, errors)
+    
+    def add_edges(self, edge_type, edges, batch_size=BATCH_SIZE, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Adds many edges of a given type to the graph. This is much faster than adding the
+        edges one by one, since all updates of the same vertex within a batch are merged 
+        and the requests are pipelined. An edge which cannot be added does not abort the batch.
+        
+        Args:
+            edge_type: The type (identifier) of the added edges (str/EdgeType).
+            edges: The source vertex id, the source vertex type, the target vertices and the 
+                   properties of each edge (iterable<tuple<int, str, dict<int, str>, dict>>).
+            batch_size: The number of edges processed at once (int).
+            max_in_flight: The maximal number of outstanding requests (int).
+             
+        Returns: 
+            The unique ids in the order of the given edges, None for the failed ones. The 
+            errors are available by the index of the edge (BatchResult).
+        '''
+        if isinstance(edge_type, EdgeType):
+            edge_type = edge_type.get_type_name()
+        elif not isinstance(edge_type, str):
+            raise TypeError('Illegal argument exception - must be instance of EdgeType or str')
+        schema = self._storage.get_type_schema(edge_type)
+        logging.info('Adding edges was requested into {}_{}'.format(self._graph_name, edge_type))
+        uids, errors = [], {}
+        edges = iter(edges)
+        while True:
+            batch = list(islice(edges, batch_size))
+            if len(batch) == 0:
+                break
+            offset = len(uids)
+            requested, indices = [], []
+            for index, edge in enumerate(batch):
+                try:
+                    src_vertex, src_type, tar_vertices, properties = edge
+                    struct_attr, unstrc_att = schema.pack(properties if properties is not None else {})
+                    struct_attr[VALUE] = unstrc_att
+                    requested.append((src_vertex, src_type, dict(tar_vertices), struct_attr))
+                    indices.append(offset + index)
+                except Exception, e:
+                    errors[offset + index] = e
+            uids.extend([None] * len(batch))
+            result = self._storage.add_edges(edge_type, requested, max_in_flight)
+            for position, index in enumerate(indices):
+                uids[index] = result[position]
+                if position in result.errors:
+                    errors[index] = result.errors[position]
+        return BatchResult(uids, errors)
+    
+    def get_cache_stats(self):
+        '''
+        Returns the counters of the element cache of this graph.
+        
+        Returns:
+            The hits, misses, evictions and invalidations and the number and the approximate 
+            size of the cached entries, None if the cache is disabled (dict<str, int>).
+        '''
+        if self._storage.cache is None:
+            return None
+        return self._storage.cache.stats()
+    
+    def migrate_element_type(self, element_type, subspaces=None):
+        '''
+        Converts a vertex or edge type, which has been created before unstructured
+        properties were stored per key, so that single properties can be read and 
+        written on their own. The type must not be used while it is migrated, an 
+        interrupted migration is resumed by calling this method again.
+        
+        Args:
+            element_type: The type (identifier) to be migrated (str/VertexType/EdgeType).
+            subspaces: The subspaces requested when the type was created, they are 
+                       recreated (list<tuple<str>>).
+             
+        Returns: 
+            The number of migrated graph elements, 0 if the type is up to date (int).
+        '''
+        if isinstance(element_type, (VertexType, EdgeType)):
+            element_type = element_type.get_type_name()
+        return self._storage.migrate_element_type(element_type, subspaces)
+    
+    def get_vertex(self, uid, vertex_type, snapshot=False, max_age=None):
         #TODO perform a lookup in all spaces, in case there is no vertex_type specified
         '''
         Retrieves a vertex from the graph.
@@ -161,16 +336,177 @@ class HyperDexGraph(object):
         Args:
             uid: The unique identifier of the vertex (int). 
             vertex_type: The type (identifier) of the requested vertex (str/VertexType).
+            snapshot: Return the vertex in snapshot mode, its properties are read at
+                      once with the existence check (bool).
+            max_age: The number of seconds after which the snapshot is reloaded, None
+                     for never (float).
              
         Returns: 
             A Vertex object, representing a reference to the related object within the database. This object can be 
             used to modify or delete the vertex from the graph. 
         '''
-        if self._storage.get_graph_element(uid, vertex_type) is not None:
+        if snapshot:
+            vertex = Vertex(uid, vertex_type, self._storage, snapshot, max_age)
+            if vertex._load(vertex._get_schema()) is not None:
+                return vertex
+        #the existence is checked without reading the incoming and outgoing edges
+        elif self._storage.get_graph_element(uid, vertex_type, [VALUE]) is not None:
             return Vertex(uid, vertex_type, self._storage)
-        else:
-            logging.debug('Vertex with type: {} id: {} was not found'.format(str(uid), str(vertex_type)))
-            raise ElementNotFoundException(uid, vertex_type)
+        logging.debug('Vertex with type: {} id: {} was not found'.format(str(uid), str(vertex_type)))
+        raise ElementNotFoundException(uid, vertex_type)
+    
+    def get_vertices(self, vertices, snapshot=False, max_age=None):
+        '''
+        Retrieves several vertices at once, the existence of all of them is checked with
+        concurrent requests instead of one round trip after the other.
+        
+        Args:
+            vertices: The unique identifier and the type (identifier) of each requested
+                      vertex (list<tuple<int, str/VertexType>>).
+            snapshot: Return the vertices in snapshot mode, their properties are read with
+                      the existence check (bool).
+            max_age: The number of seconds after which a snapshot is reloaded, None for
+                     never (float).
+        
+        Returns:
+            The Vertex objects in the requested order. A missing vertex is None and its 
+            index is mapped to an ElementNotFoundException in the errors (BatchResult).
+        '''
+        return self._get_elements(Vertex, vertices, snapshot, max_age)
+    
+    def get_edges(self, edges, snapshot=False, max_age=None):
+        '''
+        Retrieves several edges at once, e.g. the outgoing edges of a vertex in order to
+        read their targets from the snapshots.
+        
+        Args:
+            edges: The unique identifier and the type (identifier) of each requested edge
+                   (list<tuple<int, str/EdgeType>>).
+            snapshot: Return the edges in snapshot mode, their properties are read with 
+                      the existence check (bool).
+            max_age: The number of seconds after which a snapshot is reloaded, None for
+                     never (float).
+        
+        Returns:
+            The Edge objects in the requested order. A missing edge is None and its index 
+            is mapped to an ElementNotFoundException in the errors (BatchResult).
+        '''
+        return self._get_elements(Edge, edges, snapshot, max_age)
+    
+    def _get_elements(self, element_class, elements, snapshot, max_age):
+        handles = [element_class(uid, element_type, self._storage, snapshot, max_age) 
+                   for uid, element_type in elements]
+        #the existence is checked without reading the incoming and outgoing edges
+        attributes = {}
+        for handle in handles:
+            if handle._element_type not in attributes:
+                attributes[handle._element_type] = \
+                    handle._snapshot_attributes(handle._get_schema()) if snapshot else [VALUE]
+        found = self._storage.get_graph_elements([(handle._uid, handle._element_type) for handle in handles],
+                                                 attributes)
+        results, errors = [], dict(found.errors)
+        for index, (handle, element) in enumerate(zip(handles, found)):
+            if element is None:
+                errors.setdefault(index, ElementNotFoundException(handle._uid, handle._element_type))
+                results.append(None)
+                continue
+            if snapshot:
+                handle._seed(element)
+            results.append(handle)
+        return BatchResult(results, errors)
+    
+    def traverse(self, start, direction=OUTGOING, edge_types=None, max_depth=None, max_vertices=None):
+        '''
+        Traverses the graph breadth-first from one or several vertices. Each level is 
+        expanded at once, i.e. the edges of all its vertices and then the endpoints 
+        of these edges are requested concurrently.
+        
+        Args:
+            start: The start vertex or vertices (Vertex/list<Vertex>).
+            direction: Follow the 'outgoing_edges', the 'incoming_edges' or 'both' (str).
+            edge_types: Only follow edges of these types, None for all (list<str/EdgeType>).
+            max_depth: The number of levels after the start vertices, None for no limit (int).
+            max_vertices: The maximal number of returned vertices including the start
+                          vertices, None for no limit (int).
+        
+        Returns:
+            The depth and the vertices first reached at this depth, starting with the 
+            start vertices at depth 0 (generator<tuple<int, list<Vertex>>>).
+        '''
+        traversal = BreadthFirstTraversal(self._storage, direction, edge_types, max_depth, max_vertices)
+        return traversal.levels(start)
+    
+    def shortest_path(self, source, target, edge_type=None, weight=None, bidirectional=False,
+                      heuristic=None, wave_size=WAVE_SIZE):
+        '''
+        Searches the cheapest path between two vertices along the outgoing edges. The
+        closest vertices are expanded in waves, the edges of a wave and their weights
+        are requested concurrently.
+        
+        Args:
+            source: The first vertex of the path (Vertex).
+            target: The last vertex of the path (Vertex).
+            edge_type: Only follow edges of this type, None for all (str/EdgeType).
+            weight: The property holding the non-negative weight of an edge, e.g. a 
+                    structured attribute, None for a weight of 1 (str).
+            bidirectional: Search from the source and the target at once (bool).
+            heuristic: A lower bound of the cost from a vertex to the target, which is 
+                       called with the id and the type of the vertex (callable).
+            wave_size: The number of vertices, which are expanded at once (int).
+        
+        Returns:
+            The vertices and edges of the path, its cost and the number of expanded
+            vertices and round trips. The cost is None if there is no path (Path).
+        '''
+        edge_types = None if edge_type is None else [edge_type]
+        search = ShortestPath(self._storage, edge_types, weight, bidirectional, heuristic, wave_size)
+        return search.search(source, target)
+    
+    def export_csr(self, vertex_attributes=None, edge_attributes=None):
+        '''
+        Copies the vertices and edges of the graph into compressed sparse rows, i.e. 
+        arrays of offsets and targets indexed by dense vertex indices, for whole-graph
+        algorithms. Every vertex and edge space is scanned once.
+        
+        Args:
+            vertex_attributes: The structured attributes exported per vertex type, e.g.
+                               {'User' : ['age']} (dict<str, list<str>>).
+            edge_attributes: The structured attributes exported per edge type, e.g.
+                             {'rates' : ['stars']} (dict<str, list<str>>).
+        
+        Returns:
+            The copy of the graph, NumPy arrays if NumPy is installed (CSRGraph).
+        '''
+        return csr.export(self._storage, vertex_attributes, edge_attributes)
+    
+    def create_snapshot(self, path, vertex_attributes=None, edge_attributes=None):
+        '''
+        Exports the graph into compressed sparse rows and writes them into a snapshot 
+        directory, which analysis processes map into memory with graph.snapshot.load.
+        
+        Args:
+            path: The path of the snapshot, which is replaced if it exists (str).
+            vertex_attributes: The structured attributes exported per vertex type (dict<str, list<str>>).
+            edge_attributes: The structured attributes exported per edge type (dict<str, list<str>>).
+        
+        Returns:
+            The mapped snapshot (Snapshot).
+        '''
+        return snapshot.create(self._storage, path, self._graph_name, vertex_attributes, edge_attributes)
+    
+    def refresh_snapshot(self, path):
+        '''
+        Brings a snapshot of this graph up to date, only the types with inserted or 
+        removed elements are scanned again.
+        
+        Args:
+            path: The path of the snapshot (str).
+        
+        Returns:
+            The refreshed snapshot and the types which have been scanned again 
+            (tuple<Snapshot, list<str>>).
+        '''
+        return snapshot.refresh(self._storage, path)
     
     def search_vertex(self, vertex_type, *search):
         #TODO Improve search, also to match graph pattern
@@ -189,3 +525,20 @@ class HyperDexGraph(object):
             result.append(Vertex(vertex['graph_uid'], vertex_type, self._storage))
         return result 
     
+    def suggest_subspaces(self, vertex_type, max_subspaces=2):
+        '''
+        Suggests subspaces for a vertex type, based on the predicates of the searches 
+        performed with this graph. The suggestions can be passed to 
+        RequestVertexType.add_subspace when the type is (re)created.
+        
+        Args:
+            vertex_type: The type (identifier) of the searched vertices (str/VertexType).
+            max_subspaces: The maximal number of suggested subspaces (int).
+        
+        Returns:
+            The suggested subspaces, most searched first (list<tuple<str>>).
+        '''
+        if isinstance(vertex_type, VertexType):
+            vertex_type = vertex_type.get_type_name()
+        return self._storage.suggest_subspaces(vertex_type, max_subspaces)
+    
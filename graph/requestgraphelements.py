@@ -18,6 +18,25 @@ class RequestElementType(object):
     def __init__(self, element_type, *args):
         self._attr = list(args)
         self._element_type = element_type
+        self._subspaces = []
+        
+    def add_subspace(self, *attributes):
+        '''
+        Requests a subspace for the given attributes. Searches on these attributes
+        contact only the servers responsible for the searched values, instead of all 
+        servers of the hyperspace.
+        
+        Args:
+            attributes: Names of declared attributes of type string, int or float (str).
+        
+        Return:
+            This requested type, in order to chain the hints (RequestElementType).
+        '''
+        self._subspaces.append(tuple(attributes))
+        return self
+        
+    def get_subspaces(self):
+        return self._subspaces
         
     def get_structured_attr(self):
         return self._attr
@@ -29,7 +48,7 @@ class RequestGraphElement(object):
     
     def __init__(self, element_type, properties = {}):
         self._element_type = element_type
-        self._type_definition = element_type.get_type_definition()
+        self._schema = element_type.get_type_schema()
         self._properties = properties
     
     def add_property(self, key, value):
@@ -43,18 +62,19 @@ class RequestGraphElement(object):
         self._properties[key] = value
     
     def get_structured_attr(self):
-        result = {}
-        for attr in self._properties:
-            if attr in self._type_definition:
-                result[attr] = self._properties[attr]
-        return result
+        return self._schema.split(self._properties)[0]
     
     def get_unstructured_attr(self):
-        result = {}
-        for attr in self._properties:
-            if attr not in self._type_definition:
-                result[attr] = self._properties[attr]
-        return result
+        return self._schema.split(self._properties)[1]
+    
+    def pack(self):
+        '''
+        Returns the attributes to be stored for this requested graph element.
+        
+        Return:
+            The attributes and the serialized blob of unstructured properties (tuple<dict, str>).
+        '''
+        return self._schema.pack(self._properties)
     
 class RequestVertexType(RequestElementType, object):
     '''
@@ -0,0 +1,184 @@
+"""
+.. module:: shortestpath.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from graph.graphelement import Vertex, Edge
+from graph.traversal import FrontierReader, CHUNK_SIZE
+from graphstore.adjacency import INCOMING, OUTGOING
+import heapq
+import logging
+
+
+#number of vertices, which are expanded with one wave of requests
+WAVE_SIZE = 64
+INFINITY = float('inf')
+
+
+class Path(object):
+    '''
+    The result of a shortest path search, including the work it took.
+    '''
+
+    def __init__(self, cost, vertices, edges, expanded, round_trips):
+        '''
+        Constructor.
+
+        Args:
+            cost: The sum of the weights along the path, None if there is no path (number).
+            vertices: The vertices from the source to the target (list<Vertex>).
+            edges: The edges between these vertices (list<Edge>).
+            expanded: The number of vertex expansions (int).
+            round_trips: The number of waves of requests (int).
+        '''
+        self.cost = cost
+        self.vertices = vertices
+        self.edges = edges
+        self.expanded = expanded
+        self.round_trips = round_trips
+
+    def found(self):
+        return self.cost is not None
+
+
+class ShortestPath(object):
+    '''
+    The ShortestPath search is a Dijkstra, which expands the WAVE_SIZE closest vertices
+    at once instead of a single one, so that their edges and the weights of these edges
+    are read with a FrontierReader in two waves of requests. Hence a vertex is expanded
+    again, if a shorter path to it is found later on, and the search stops once no
+    vertex in the queue can lead to a shorter path. With a heuristic, which never
+    overestimates the remaining cost, the search is an A*. The bidirectional search
+    expands the side with the closer queue head, following the incoming edges from
+    the target.
+    '''
+
+    def __init__(self, storage, edge_types=None, weight=None, bidirectional=False, heuristic=None,
+                 wave_size=WAVE_SIZE, chunk_size=CHUNK_SIZE):
+        '''
+        Constructor.
+
+        Args:
+            storage: The storage of the graph (HyperDexStore).
+            edge_types: Only follow edges of these types, None for all (list<str/EdgeType>).
+            weight: The property holding the non-negative weight of an edge, edges without
+                    it are not followed, None for a weight of 1 (str).
+            bidirectional: Search from the source and the target (bool).
+            heuristic: A lower bound of the cost from a vertex to the target, which is called
+                       with the id and the type of the vertex, only without bidirectional
+                       (callable).
+            wave_size: The number of vertices, which are expanded at once (int).
+            chunk_size: The number of vertices, whose edges are requested at once (int).
+        '''
+        if bidirectional and heuristic is not None:
+            raise ValueError('A heuristic is only supported by the unidirectional search')
+        self._storage = storage
+        self._reader = FrontierReader(storage, edge_types, weight, chunk_size)
+        self.bidirectional = bidirectional
+        self.heuristic = heuristic
+        self.wave_size = wave_size
+        #the number of vertex expansions
+        self.expanded = 0
+
+    def search(self, source, target):
+        '''
+        Searches the cheapest path between two vertices along the outgoing edges.
+
+        Args:
+            source: The first vertex of the path (Vertex).
+            target: The last vertex of the path (Vertex).
+
+        Return:
+            The path, its cost is None if the target cannot be reached (Path).
+        '''
+        source = (source._uid, source._element_type)
+        target = (target._uid, target._element_type)
+        forward = _Search(source, OUTGOING, self.heuristic)
+        backward = _Search(target, INCOMING)
+        best, meeting = INFINITY, None
+        if source[0] == target[0]:
+            best, meeting = 0, source[0]
+        while True:
+            forward_head = forward.head()
+            if self.bidirectional:
+                backward_head = backward.head()
+                if forward_head + backward_head >= best:
+                    break
+                side, other = (forward, backward) if forward_head <= backward_head else (backward, forward)
+                bound = best - other.head()
+            else:
+                if forward_head >= best:
+                    break
+                side, other, bound = forward, backward, best
+            wave = side.pop_wave(self.wave_size, bound)
+            self.expanded += len(wave)
+            for vertex, edge_uid, edge_type, neighbor, weight in self._reader.read(wave, [side.direction]):
+                if side.relax(vertex, edge_uid, edge_type, neighbor, weight) and neighbor[0] in other.distances:
+                    cost = side.distances[neighbor[0]] + other.distances[neighbor[0]]
+                    if cost < best:
+                        best, meeting = cost, neighbor[0]
+        logging.debug('Searched a path with {} expansions in {} round trips'.format(self.expanded,
+                                                                                  self._reader.round_trips))
+        if meeting is None:
+            return Path(None, [], [], self.expanded, self._reader.round_trips)
+        vertices, edges = forward.path(meeting)
+        vertices.reverse()
+        edges.reverse()
+        tail_vertices, tail_edges = backward.path(meeting)
+        vertices.extend(tail_vertices[1:])
+        edges.extend(tail_edges)
+        return Path(best, [Vertex(uid, vertex_type, self._storage) for uid, vertex_type in vertices],
+                    [Edge(edge_uid, edge_type, self._storage) for edge_uid, edge_type in edges],
+                    self.expanded, self._reader.round_trips)
+
+
+class _Search(object):
+    #the distances and the queue of one direction of the search
+
+    def __init__(self, start, direction, heuristic=None):
+        self.direction = direction
+        self.heuristic = heuristic
+        self.distances = {start[0] : 0}
+        #vertex id -> (vertex, previous vertex, edge id, edge type)
+        self.parents = {start[0] : (start, None, None, None)}
+        self.queue = [(self._key(start, 0), 0, start)]
+
+    def _key(self, vertex, distance):
+        if self.heuristic is None:
+            return distance
+        return distance + self.heuristic(*vertex)
+
+    def head(self):
+        #drops the entries of vertices, which have been reached on a shorter path meanwhile
+        while len(self.queue) > 0 and self.queue[0][1] > self.distances[self.queue[0][2][0]]:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if len(self.queue) > 0 else INFINITY
+
+    def pop_wave(self, size, bound):
+        wave = []
+        while len(wave) < size and self.head() < bound:
+            wave.append(heapq.heappop(self.queue)[2])
+        return wave
+
+    def relax(self, vertex, edge_uid, edge_type, neighbor, weight):
+        distance = self.distances[vertex[0]] + weight
+        if distance >= self.distances.get(neighbor[0], INFINITY):
+            return False
+        self.distances[neighbor[0]] = distance
+        self.parents[neighbor[0]] = (neighbor, vertex[0], edge_uid, edge_type)
+        heapq.heappush(self.queue, (self._key(neighbor, distance), distance, neighbor))
+        return True
+
+    def path(self, uid):
+        #the vertices and edges from a vertex back to the start of this direction
+        vertices, edges = [], []
+        while uid is not None:
+            vertex, uid, edge_uid, edge_type = self.parents[uid]
+            vertices.append(vertex)
+            if uid is not None:
+                edges.append((edge_uid, edge_type))
+        return vertices, edges
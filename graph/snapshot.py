@@ -0,0 +1,317 @@
+"""
+.. module:: snapshot.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+A snapshot is a directory holding the arrays of a CSRGraph as raw little-endian
+files and a small JSON header with the graph name, the type table, the creation
+time and the layout of the arrays. Loading a snapshot maps the files into memory,
+hence several processes on one host share the pages and nothing is read up front.
+The path of a snapshot is a symbolic link to the directory of its latest version,
+which is swapped atomically when the snapshot is replaced.
+"""
+from array import array
+from graph import csr
+from graphstore.storage import GENERIC_VERTEX
+from hyperdex.client import HyperClientException
+import cPickle
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+FORMAT = 1
+HEADER = 'header.json'
+#the layout of each typecode of the array module in the files
+DTYPES = {'l' : '<i8', 'h' : '<i2', 'd' : '<f8'}
+STRUCTS = {'l' : '<q', 'h' : '<h', 'd' : '<d'}
+#number of values an iteration over a mapped array copies at once
+BLOCK = 4096
+ARRAYS = ['uids', 'vertex_types', 'offsets', 'targets', 'edges', 'edge_types']
+#attempts to load a snapshot, which is replaced while it is loaded
+ATTEMPTS = 3
+
+
+class MappedArray(object):
+    '''
+    A read-only array backed by a memory-mapped file, which is used instead of a NumPy
+    memmap if NumPy is not installed. Single values are read in place, slices are
+    copied into arrays of the array module.
+    '''
+
+    def __init__(self, path, typecode, length):
+        self.typecode = typecode
+        self.itemsize = struct.calcsize(STRUCTS[typecode])
+        self._length = length
+        self._format = STRUCTS[typecode]
+        self._map = None
+        if length > 0:
+            with open(path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                return array(self.typecode, (self[i] for i in xrange(start, stop, step)))
+            values = array(self.typecode)
+            if stop > start:
+                values.fromstring(self._map[start * self.itemsize:stop * self.itemsize])
+                if sys.byteorder != 'little':
+                    values.byteswap()
+            return values
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError('Index {} out of range'.format(key))
+        return struct.unpack_from(self._format, self._map, key * self.itemsize)[0]
+
+    def __iter__(self):
+        for start in xrange(0, self._length, BLOCK):
+            for value in self[start:start + BLOCK]:
+                yield value
+
+
+class Snapshot(object):
+    '''
+    A loaded snapshot, i.e. its header and the mapped graph.
+    '''
+
+    def __init__(self, path, header, graph):
+        self.path = path
+        self.header = header
+        self.graph = graph
+        self.graph_name = header['graph']
+        self.created = header['created']
+
+
+def save(graph, path, graph_name, vertex_attributes=None, edge_attributes=None, counts=None, removals=None):
+    '''
+    Writes a CSRGraph into a new version directory next to the snapshot path, then
+    the link at the path is replaced by a link to it with a single rename. Hence the
+    path always points to a complete snapshot, processes which have mapped the previous
+    version keep reading its files, though they are removed.
+
+    Args:
+        graph: The copy of the graph (CSRGraph).
+        path: The path of the snapshot, i.e. of the link to its latest version (str).
+        graph_name: The identifier of the graph (str).
+        vertex_attributes: The exported structured attributes per vertex type (dict<str, list<str>>).
+        edge_attributes: The exported structured attributes per edge type (dict<str, list<str>>).
+        counts: The number of elements per type before the export, which are compared
+                by a refresh (dict<str, int>).
+        removals: The removal counter per type before the export, which are compared
+                  by a refresh (dict<str, int>).
+    '''
+    path = os.path.abspath(path)
+    parent, prefix = os.path.split(path)
+    written = tempfile.mkdtemp(prefix=prefix + '.', dir=parent)
+    os.chmod(written, 0755)
+    arrays = {}
+    for name in ARRAYS:
+        arrays[name] = _write(written, name, getattr(graph, name), csr.TYPE_INDEX if name in
+                              ('vertex_types', 'edge_types') else csr.INDEX)
+    for type_name, type_rows in graph.rows.iteritems():
+        arrays['rows.' + type_name] = _write(written, 'rows.' + type_name, type_rows, csr.INDEX)
+    for type_name, type_columns in graph.columns.iteritems():
+        for attribute, column in type_columns.iteritems():
+            name = 'columns.{}.{}'.format(type_name, attribute)
+            arrays[name] = _write(written, name, column, _typecode(column))
+    header = {'format' : FORMAT, 'graph' : graph_name, 'created' : time.time(),
+              'vertex_types' : graph.vertex_type_names, 'edge_types' : graph.edge_type_names,
+              'vertex_attributes' : vertex_attributes or {}, 'edge_attributes' : edge_attributes or {},
+              'counts' : counts or {}, 'removals' : removals or {}, 'arrays' : arrays}
+    with open(os.path.join(written, HEADER), 'w') as f:
+        json.dump(header, f, indent=1, sort_keys=True)
+    previous = None
+    if os.path.islink(path):
+        previous = os.path.realpath(path)
+    elif os.path.exists(path):
+        #a snapshot directory written before the snapshots were versioned is moved aside once
+        previous = written + '.old'
+        os.rename(path, previous)
+    link = written + '.link'
+    os.symlink(os.path.basename(written), link)
+    os.rename(link, path)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+    logging.info('Saved snapshot of graph {} with {} vertices to {}'.format(graph_name, graph.count_vertices(), path))
+
+
+def load(path):
+    '''
+    Maps a snapshot into memory, only its header is read. The link is resolved once,
+    so that the header and the arrays belong to the same version.
+
+    Args:
+        path: The path of the snapshot (str).
+
+    Return:
+        The snapshot, its arrays are NumPy memmaps if NumPy is installed (Snapshot).
+    '''
+    for attempt in xrange(ATTEMPTS - 1):
+        directory = os.path.realpath(path)
+        try:
+            return _load(path, directory)
+        except (IOError, OSError):
+            #the version has been replaced and removed meanwhile
+            if os.path.realpath(path) == directory:
+                raise
+    return _load(path, os.path.realpath(path))
+
+
+def _load(path, directory):
+    with open(os.path.join(directory, HEADER)) as f:
+        header = _strings(json.load(f))
+    if header['format'] != FORMAT:
+        raise ValueError('Unknown snapshot format {} of {}'.format(header['format'], path))
+    arrays = dict((name, _map(directory, layout)) for name, layout in header['arrays'].iteritems())
+    rows, columns = {}, {}
+    for name, values in arrays.iteritems():
+        if name.startswith('rows.'):
+            rows[name[len('rows.'):]] = values
+        elif name.startswith('columns.'):
+            type_name, attribute = name[len('columns.'):].rsplit('.', 1)
+            columns.setdefault(type_name, {})[attribute] = values
+    graph = csr.CSRGraph(header['vertex_types'], arrays['uids'], arrays['vertex_types'], arrays['offsets'],
+                         arrays['targets'], arrays['edges'], header['edge_types'], arrays['edge_types'],
+                         rows, columns)
+    return Snapshot(path, header, graph)
+
+
+def create(storage, path, graph_name, vertex_attributes=None, edge_attributes=None):
+    '''
+    Exports a graph into a new snapshot.
+
+    Args:
+        storage: The storage of the graph (HyperDexStore).
+        path: The path of the snapshot (str).
+        graph_name: The identifier of the graph (str).
+        vertex_attributes: The structured attributes exported per vertex type (dict<str, list<str>>).
+        edge_attributes: The structured attributes exported per edge type (dict<str, list<str>>).
+
+    Return:
+        The mapped snapshot (Snapshot).
+    '''
+    counts, removals = _state(storage)
+    graph = csr.export(storage, vertex_attributes, edge_attributes)
+    save(graph, path, graph_name, vertex_attributes, edge_attributes, counts, removals)
+    return load(path)
+
+
+def refresh(storage, path):
+    '''
+    Brings a snapshot up to date. Only types are scanned again, whose number of elements
+    or whose removal counter has changed, the others are copied from the mapped snapshot.
+    An insertion changes the number of elements, unless an element of the same type has
+    been removed, which changes the removal counter. Removing a target from an edge
+    changes the removal counter of the edge type as well. Changed attributes of elements,
+    which have been neither created nor removed, and added targets of existing edges
+    are not detected, such changes need a new snapshot.
+
+    Args:
+        storage: The storage of the graph (HyperDexStore).
+        path: The path of the snapshot (str).
+
+    Return:
+        The refreshed snapshot and the types which have been scanned again (tuple<Snapshot, list<str>>).
+    '''
+    previous = load(path)
+    header = previous.header
+    counts, removals = _state(storage)
+    unchanged = set()
+    for type_name in header['vertex_types'] + header['edge_types']:
+        if type_name not in counts or counts[type_name] != header['counts'].get(type_name):
+            continue
+        #snapshots without removal counters are scanned again
+        if removals[type_name] != header.get('removals', {}).get(type_name):
+            continue
+        unchanged.add(type_name)
+    graph = csr.export(storage, header['vertex_attributes'], header['edge_attributes'], previous.graph, unchanged)
+    save(graph, path, header['graph'], header['vertex_attributes'], header['edge_attributes'], counts, removals)
+    scanned = sorted(set(graph.vertex_type_names + graph.edge_type_names) - unchanged)
+    logging.info('Refreshed snapshot {}, scanned {} types again'.format(path, len(scanned)))
+    return load(path), scanned
+
+
+def _state(storage):
+    #the counters are read before the export, a change during the export is detected
+    #by the next refresh, since the store counts a removal after the element is deleted
+    counts = {}
+    for type_name in list(storage.get_vertex_types()) + [GENERIC_VERTEX] + list(storage.get_edge_types()):
+        count = _count(storage, type_name)
+        if count is not None:
+            counts[type_name] = count
+    return counts, storage.get_removals(counts.keys())
+
+
+def _count(storage, type_name):
+    try:
+        return storage.count_elements(type_name)
+    except HyperClientException, e:
+        if e.symbol() != 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+            raise
+        return None
+
+
+def _typecode(column):
+    if hasattr(column, 'typecode'):
+        return column.typecode
+    if numpy is not None and isinstance(column, numpy.ndarray) and column.dtype.kind in 'if':
+        return 'd' if column.dtype.kind == 'f' else csr.INDEX
+    return None
+
+
+def _write(directory, name, values, typecode):
+    if typecode is None:
+        #the values of other attributes, e.g. strings, are pickled and loaded at once
+        with open(os.path.join(directory, name + '.pickle'), 'wb') as f:
+            cPickle.dump(list(values), f, cPickle.HIGHEST_PROTOCOL)
+        return {'file' : name + '.pickle', 'length' : len(values)}
+    with open(os.path.join(directory, name + '.bin'), 'wb') as f:
+        if numpy is not None:
+            numpy.asarray(values, dtype=DTYPES[typecode]).tofile(f)
+        else:
+            values = array(typecode, values)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            values.tofile(f)
+    return {'file' : name + '.bin', 'typecode' : typecode, 'length' : len(values)}
+
+
+def _map(path, layout):
+    filename = os.path.join(path, layout['file'])
+    if 'typecode' not in layout:
+        with open(filename, 'rb') as f:
+            return cPickle.load(f)
+    if numpy is None:
+        return MappedArray(filename, layout['typecode'], layout['length'])
+    if layout['length'] == 0:
+        return numpy.zeros(0, dtype=DTYPES[layout['typecode']])
+    return numpy.memmap(filename, dtype=DTYPES[layout['typecode']], mode='r', shape=(layout['length'],))
+
+
+def _strings(value):
+    #json returns unicode, the type names are used as str throughout
+    if isinstance(value, unicode):
+        return str(value)
+    if isinstance(value, list):
+        return [_strings(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_strings(key), _strings(item)) for key, item in value.iteritems())
+    return value
@@ -0,0 +1,293 @@
+"""
+.. module:: traversal.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from graph import elementtype
+from graph.graphelement import Vertex
+from graphstore.adjacency import INCOMING, OUTGOING, MISSING
+from graphstore.graphexception import TypeNotFoundException
+from graphstore.idallocator import FIRST_ID
+from graphstore.schemacache import UNSTRUCTURED, VALUE
+from graphstore.storage import ENDPOINTS
+from hyperdex.client import HyperClientException
+import logging
+
+
+#follow the incoming and the outgoing edges
+BOTH = 'both'
+#number of frontier vertices, whose edges are requested at once
+CHUNK_SIZE = 1024
+
+
+class VertexSet(object):
+    '''
+    A compact set of vertex ids with one bit per id. The ids of all vertices of a
+    graph are allocated from a single counter starting at FIRST_ID, hence the bits
+    are offset by FIRST_ID and the set grows with the largest id it contains.
+    '''
+
+    def __init__(self, offset=FIRST_ID):
+        self._offset = offset
+        self._bits = bytearray()
+        #ids below the offset have not been allocated by the graph
+        self._others = set()
+        self._size = 0
+
+    def add(self, uid):
+        '''
+        Adds an id to the set.
+
+        Args:
+            uid: The unique identifier of a vertex (int).
+
+        Return:
+            Whether the id has not been in the set before (bool).
+        '''
+        index = uid - self._offset
+        if index < 0:
+            if uid in self._others:
+                return False
+            self._others.add(uid)
+            self._size += 1
+            return True
+        byte, mask = index >> 3, 1 << (index & 7)
+        if byte >= len(self._bits):
+            #at least double the bits, so that a growing set is not copied too often
+            self._bits.extend(bytearray(max(byte + 1 - len(self._bits), len(self._bits))))
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        self._size += 1
+        return True
+
+    def __contains__(self, uid):
+        index = uid - self._offset
+        if index < 0:
+            return uid in self._others
+        byte = index >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (index & 7)))
+
+    def __len__(self):
+        return self._size
+
+
+class FrontierReader(object):
+    '''
+    The FrontierReader follows the edges of a frontier of vertices. The edges of all
+    vertices are requested at once, then the endpoints of all these edges, so that a
+    frontier costs two waves of concurrent requests instead of one round trip per
+    edge. Large frontiers are read in chunks, which bounds the requests in flight.
+    '''
+
+    def __init__(self, storage, edge_types=None, weight=None, chunk_size=CHUNK_SIZE):
+        '''
+        Constructor.
+
+        Args:
+            storage: The storage of the graph (HyperDexStore).
+            edge_types: Only follow edges of these types, None for all (list<str/EdgeType>).
+            weight: The property holding the weight of an edge, which is read with its
+                    endpoints, None for a weight of 1 (str).
+            chunk_size: The number of frontier vertices, whose edges are requested at once (int).
+        '''
+        self._storage = storage
+        self.edge_types = None
+        if edge_types is not None:
+            self.edge_types = frozenset(edge_type.get_type_name() if isinstance(edge_type, elementtype.EdgeType)
+                                        else edge_type for edge_type in edge_types)
+        self.weight = weight
+        self.chunk_size = chunk_size
+        #edge type -> (schema, read attributes), the schema is None without weights
+        self._schemas = {}
+        #the number of waves of requests
+        self.round_trips = 0
+
+    def read(self, frontier, directions):
+        '''
+        Follows the edges of a frontier, ignoring edges which have been removed meanwhile
+        and edges without a weight.
+
+        Args:
+            frontier: The unique identifier and the type of each vertex (list<tuple<int, str>>).
+            directions: The followed directions, 'incoming_edges' and/or 'outgoing_edges' (list<str>).
+
+        Return:
+            The frontier vertex, the id and the type of the edge, the reached vertex and
+            the weight of each followed edge (list<tuple<tuple<int, str>, int, str, tuple<int, str>, any type>>).
+        '''
+        result = []
+        for begin in xrange(0, len(frontier), self.chunk_size):
+            result.extend(self._read(frontier[begin:begin + self.chunk_size], directions))
+        return result
+
+    def _read(self, frontier, directions):
+        edges = []
+        for direction in directions:
+            adjacency = self._storage.get_adjacency(frontier, direction)
+            self.round_trips += 1
+            #the pages of paged vertices are requested in a second wave
+            if any(self._storage.adjacency.get_pages(vertex_type, uid, direction) is not None
+                   for uid, vertex_type in frontier):
+                self.round_trips += 1
+            for vertex, vertex_edges in zip(frontier, adjacency):
+                for edge_uid, edge_type in sorted(vertex_edges.iteritems()):
+                    if self.edge_types is None or edge_type in self.edge_types:
+                        edges.append((vertex, direction, edge_uid, edge_type))
+        edges = [edge for edge in edges if self._schema(edge[3]) is not None]
+        if len(edges) == 0:
+            return []
+        attributes = dict((edge_type, self._schemas[edge_type][1]) for _, _, _, edge_type in edges)
+        records = self._storage.get_graph_elements([(edge_uid, edge_type) for _, _, edge_uid, edge_type in edges],
+                                                   attributes)
+        self.round_trips += 1
+        for error in records.errors.itervalues():
+            #the type of the edge has been removed meanwhile
+            if not isinstance(error, HyperClientException) or error.symbol() not in MISSING:
+                raise error
+        result = []
+        for (vertex, direction, edge_uid, edge_type), record in zip(edges, records):
+            if record is None:
+                continue
+            weight = self._weight(edge_type, record)
+            if weight is None:
+                logging.debug('Edge with type: {} id: {} has no weight'.format(edge_type, edge_uid))
+                continue
+            if direction == OUTGOING:
+                neighbors = sorted(record['target'].iteritems())
+            else:
+                neighbors = [(record['source_uid'], record['source_vertex_type'])]
+            for neighbor in neighbors:
+                result.append((vertex, edge_uid, edge_type, neighbor, weight))
+        return result
+
+    def _schema(self, edge_type):
+        #returns the schema and the attributes to be read, None if the type has been removed
+        if edge_type not in self._schemas:
+            if self.weight is None:
+                self._schemas[edge_type] = (None, ENDPOINTS)
+            else:
+                try:
+                    schema = self._storage.get_type_schema(edge_type)
+                except TypeNotFoundException:
+                    return None
+                if self.weight in schema.structured:
+                    attributes = ENDPOINTS + [self.weight]
+                elif schema.per_key:
+                    attributes = ENDPOINTS + [UNSTRUCTURED, VALUE]
+                else:
+                    attributes = ENDPOINTS + [VALUE]
+                self._schemas[edge_type] = (schema, attributes)
+        return self._schemas[edge_type]
+
+    def _weight(self, edge_type, record):
+        schema = self._schemas[edge_type][0]
+        if schema is None:
+            return 1
+        found, weight = schema.lookup(record, self.weight)
+        if found and weight is not None and weight < 0:
+            raise ValueError('Negative weight {} of edge type: {}'.format(weight, edge_type))
+        return weight if found else None
+
+
+class BreadthFirstTraversal(object):
+    '''
+    The BreadthFirstTraversal expands a whole frontier of vertices per level, its edges
+    are followed by a FrontierReader. Every vertex is visited once, the vertices of
+    each level are returned as soon as the level is complete.
+    '''
+
+    def __init__(self, storage, direction=OUTGOING, edge_types=None, max_depth=None,
+                 max_vertices=None, chunk_size=CHUNK_SIZE):
+        '''
+        Constructor.
+
+        Args:
+            storage: The storage of the graph (HyperDexStore).
+            direction: Follow the 'outgoing_edges', the 'incoming_edges' or BOTH (str).
+            edge_types: Only follow edges of these types, None for all (list<str/EdgeType>).
+            max_depth: The number of levels after the start vertices, None for no limit (int).
+            max_vertices: The maximal number of returned vertices including the start
+                          vertices, None for no limit (int).
+            chunk_size: The number of frontier vertices, whose edges are requested at once (int).
+        '''
+        if direction not in (INCOMING, OUTGOING, BOTH):
+            raise ValueError('Illegal direction: {}'.format(direction))
+        self._storage = storage
+        self._reader = FrontierReader(storage, edge_types, chunk_size=chunk_size)
+        self.direction = direction
+        self.max_depth = max_depth
+        self.max_vertices = max_vertices
+        self.visited = VertexSet()
+        #the number of followed edges
+        self.edges = 0
+
+    @property
+    def round_trips(self):
+        return self._reader.round_trips
+
+    def levels(self, start):
+        '''
+        Traverses the graph level by level.
+
+        Args:
+            start: The start vertex or vertices (Vertex/list<Vertex>).
+
+        Return:
+            The depth and the vertices first reached at this depth, starting with
+            the start vertices at depth 0 (generator<tuple<int, list<Vertex>>>).
+        '''
+        if isinstance(start, Vertex):
+            start = [start]
+        frontier = []
+        for vertex in start:
+            if self.visited.add(vertex._uid):
+                frontier.append((vertex._uid, vertex._element_type))
+        depth, returned = 0, 0
+        while len(frontier) > 0:
+            if self.max_vertices is not None:
+                frontier = frontier[:self.max_vertices - returned]
+            returned += len(frontier)
+            logging.debug('Reached {} vertices at depth {}'.format(len(frontier), depth))
+            yield depth, [Vertex(uid, vertex_type, self._storage) for uid, vertex_type in frontier]
+            if depth == self.max_depth or returned == self.max_vertices:
+                return
+            frontier = self.expand(frontier)
+            depth += 1
+
+    def expand(self, frontier):
+        '''
+        Returns the vertices reached from a frontier, which have not been visited before.
+
+        Args:
+            frontier: The unique identifier and the type of each vertex (list<tuple<int, str>>).
+
+        Return:
+            The unique identifier and the type of each newly visited vertex in the order
+            it has been reached (list<tuple<int, str>>).
+        '''
+        reached = []
+        for _, _, _, neighbor in self.steps(frontier):
+            if self.visited.add(neighbor[0]):
+                reached.append(neighbor)
+        return reached
+
+    def steps(self, frontier):
+        '''
+        Follows the edges of a frontier, ignoring edges which have been removed meanwhile.
+
+        Args:
+            frontier: The unique identifier and the type of each vertex (list<tuple<int, str>>).
+
+        Return:
+            The frontier vertex, the id and the type of the edge and the reached vertex
+            of each followed edge (list<tuple<tuple<int, str>, int, str, tuple<int, str>>>).
+        '''
+        directions = (OUTGOING, INCOMING) if self.direction == BOTH else (self.direction,)
+        result = [step[:4] for step in self._reader.read(frontier, directions)]
+        self.edges += len(result)
+        return result
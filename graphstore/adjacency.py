@@ -0,0 +1,627 @@
+"""
+.. module:: adjacency.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from hyperdex.client import HyperClientException
+from graphstore import readiness
+from graphstore.idallocator import FIRST_ID
+import logging
+import threading
+
+
+INCOMING = 'incoming_edges'
+OUTGOING = 'outgoing_edges'
+#the inline edges of a vertex are moved to pages, once there are more of them
+THRESHOLD = 4096
+#the number of pages of a paged vertex, an edge is kept in page edge_uid % PAGES
+PAGES = 64
+#the entry of the inline edges telling the number of pages, no id is ever below FIRST_ID
+MARKER = FIRST_ID - 1
+#attempts to replace the inline edges, which are changed concurrently
+ATTEMPTS = 5
+#the number of edges removed from a vertex, from which its edges are read beforehand
+PROBE = 2
+#the inline edges of a vertex are counted every THRESHOLD / CHECKS additions
+CHECKS = 16
+#the number of vertices whose inline additions are tracked at most
+TRACKED = 65536
+#a vertex which has been deleted meanwhile is not updated
+MISSING = frozenset(['HYPERDEX_CLIENT_NOTFOUND', 'HYPERDEX_CLIENT_UNKNOWNSPACE'])
+
+
+class AdjacencyStore(object):
+    '''
+    The AdjacencyStore keeps the incoming and outgoing edges of a vertex. They are
+    stored inline, i.e. in a map attribute of the vertex, until there are more than
+    THRESHOLD of them. Then they are moved to pages in a separate space, so that the
+    vertex stays small. Each edge belongs to a single page, hence adding or removing
+    an edge touches one page only and the edges are read page by page.
+
+    A paged vertex keeps the MARKER entry in its inline map. Edges added by a worker
+    which does not know about the pages yet still end up inline, they are moved the
+    next time the edges are read. Likewise an edge is removed from its page only by a
+    worker which has read the marker, i.e. knows about the pages. The inline additions
+    are counted per vertex and every THRESHOLD / CHECKS of them the inline edges are
+    read, so that a vertex is paged by the writers as well, even if its edges are
+    never read.
+    '''
+
+    def __init__(self, graph_name, hyperdex_client, hyperdex_admin, requests,
+                 threshold=THRESHOLD, pages=PAGES):
+        '''
+        Constructor.
+
+        Args:
+            graph_name: The identifier of the graph (str).
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            hyperdex_admin: A hyperdex.admin.Admin instance (Admin).
+            requests: The queue of asynchronous requests of the storage (RequestQueue).
+            threshold: The number of inline edges from which the edges are paged (int).
+            pages: The number of pages of a newly paged vertex (int).
+        '''
+        self._graph_name = graph_name
+        self._space = graph_name + '_adjacency'
+        self.hyperdex_client = hyperdex_client
+        self.hyperdex_admin = hyperdex_admin
+        self.requests = requests
+        self.threshold = threshold
+        self.pages = pages
+        #the number of pages of the paged vertices known to this process
+        self._paged = {}
+        #the number of inline additions to vertices since their edges have been counted
+        self._added = {}
+        self._lock = threading.Lock()
+
+    def clone(self, hyperdex_client, requests):
+        '''
+        Returns a store which issues its requests through another client, e.g. of
+        another thread. Both share the number of pages known to this process.
+
+        Args:
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            requests: The queue of asynchronous requests of this client (RequestQueue).
+
+        Return:
+            The store of the given client (AdjacencyStore).
+        '''
+        clone = AdjacencyStore(self._graph_name, hyperdex_client, self.hyperdex_admin, requests,
+                               self.threshold, self.pages)
+        clone._paged = self._paged
+        clone._added = self._added
+        clone._lock = self._lock
+        return clone
+
+    def validate_database(self):
+        try:
+            self.hyperdex_client.get(self._space, '')
+            logging.info('Adjacency space available')
+        except HyperClientException, e:
+            if e.symbol() == 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+                logging.info('Creating space ' + self._space)
+                self.hyperdex_admin.add_space('''
+                space ''' + self._space + '''
+                key page
+                attributes
+                   string vertex_type,
+                   map(int, string) edges
+                ''')
+                readiness.wait_for_space(self.hyperdex_client, self._space, '',
+                                         hyperdex_admin=self.hyperdex_admin)
+                return
+            logging.error(str(e))
+
+    def _page_key(self, vertex_type, uid, direction, page):
+        return '{}:{}:{}:{}'.format(vertex_type, uid, direction, page)
+
+    def _vertex_space(self, vertex_type):
+        return '{}_{}'.format(self._graph_name, vertex_type)
+
+    def get_pages(self, vertex_type, uid, direction):
+        '''
+        Returns the number of pages of a vertex, as far as this process knows.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+
+        Return:
+            The number of pages or None if the edges are inline (int).
+        '''
+        with self._lock:
+            return self._paged.get((vertex_type, uid, direction))
+
+    def _set_pages(self, vertex_type, uid, direction, pages):
+        with self._lock:
+            if pages is None:
+                self._paged.pop((vertex_type, uid, direction), None)
+            else:
+                self._paged[(vertex_type, uid, direction)] = pages
+
+    def submit_add(self, vertex_type, uid, direction, edges):
+        '''
+        Issues the addition of edges to a vertex, a paged vertex gets one request
+        for each touched page.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+            edges: The ids of the edges mapped to their types (dict<int, str>).
+
+        Return:
+            The handles on the issued requests (list<Future>).
+        '''
+        pages = self.get_pages(vertex_type, uid, direction)
+        if pages is None:
+            return [self.requests.submit('map_add', self._vertex_space(vertex_type), uid, {direction : edges})]
+        return [self.requests.submit('map_add', self._space, self._page_key(vertex_type, uid, direction, page),
+                                     {'edges' : page_edges})
+                for page, page_edges in self._by_page(edges, pages).iteritems()]
+
+    def count_added(self, vertex_type, uid, direction, count):
+        '''
+        Counts edges which have been added to the inline edges of a vertex. Every
+        threshold / CHECKS additions the inline edges are read and moved to the pages,
+        once there are too many of them.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+            count: The number of added edges (int).
+        '''
+        key = (vertex_type, uid, direction)
+        with self._lock:
+            if key in self._paged:
+                return
+            added = self._added.pop(key, 0) + count
+            if added < max(1, self.threshold // CHECKS):
+                if len(self._added) >= TRACKED:
+                    self._added.clear()
+                self._added[key] = added
+                return
+        inline, pages = self._read_inline(vertex_type, uid, direction)
+        if pages is None and len(inline) > self.threshold:
+            self.page(vertex_type, uid, direction)
+
+    def submit_remove(self, vertex_type, uid, direction, edge_uid):
+        '''
+        Issues the removal of an edge from a vertex. The edge is removed from its page
+        as well, if this process knows that the vertex is paged.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+            edge_uid: The unique identifier of the edge (int).
+
+        Return:
+            The handles on the inline removal and the page removal, the latter is None
+            if the vertex is not known to be paged (tuple<Future, Future>).
+        '''
+        inline = self.requests.submit('map_remove', self._vertex_space(vertex_type), uid, {direction : edge_uid})
+        pages = self.get_pages(vertex_type, uid, direction)
+        if pages is None:
+            return inline, None
+        return (inline, self.requests.submit('map_remove', self._space,
+                                             self._page_key(vertex_type, uid, direction, edge_uid % pages),
+                                             {'edges' : edge_uid}))
+
+    def submit_probe(self, vertex_type, uid):
+        '''
+        Issues the read of the inline edges of a vertex, before several edges are
+        removed from it.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+
+        Return:
+            The handle on the read (Future).
+        '''
+        space = self._vertex_space(vertex_type)
+        if hasattr(self.hyperdex_client, 'get_partial'):
+            return self.requests.submit('get_partial', space, uid, [INCOMING, OUTGOING])
+        return self.requests.submit('get', space, uid)
+
+    def submit_remove_many(self, vertex_type, uid, incoming, outgoing, current=None):
+        '''
+        Issues the removal of several edges from a vertex. 
+        
+        If the inline edges have been read and the vertex is not paged, they are 
+        replaced at once, unless they have been changed meanwhile. Otherwise an 
+        incoming and an outgoing edge are removed from the inline edges with a single 
+        request. Each edge is removed from its page as well, if the marker read or the
+        number of pages known to this process shows that the vertex is paged.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            incoming: The ids of the removed incoming edges (list<int>).
+            outgoing: The ids of the removed outgoing edges (list<int>).
+            current: The inline edges as read by submit_probe (dict).
+
+        Return:
+            The handles on the inline removals and the page removals. The 
+            replacement of the inline edges results in 
+            False, if they have been changed meanwhile (tuple<list<Future>, list<Future>>).
+        '''
+        space = self._vertex_space(vertex_type)
+        if current is not None:
+            for direction in (INCOMING, OUTGOING):
+                pages = current[direction].get(MARKER)
+                self._set_pages(vertex_type, uid, direction, None if pages is None else int(pages))
+            if MARKER not in current[INCOMING] and MARKER not in current[OUTGOING]:
+                expected = dict((direction, current[direction]) for direction in (INCOMING, OUTGOING))
+                remaining = {}
+                for direction, edges in ((INCOMING, incoming), (OUTGOING, outgoing)):
+                    remaining[direction] = dict(current[direction])
+                    for edge_uid in edges:
+                        remaining[direction].pop(edge_uid, None)
+                return [self.requests.submit('cond_put', space, uid, expected, remaining)], []
+            #only edges which have been read are removed from the inline edges
+            inline_incoming = [edge_uid for edge_uid in incoming if edge_uid in current[INCOMING]]
+            inline_outgoing = [edge_uid for edge_uid in outgoing if edge_uid in current[OUTGOING]]
+        else:
+            inline_incoming, inline_outgoing = incoming, outgoing
+        inline = []
+        for position in xrange(max(len(inline_incoming), len(inline_outgoing))):
+            attributes = {}
+            if position < len(inline_incoming):
+                attributes[INCOMING] = inline_incoming[position]
+            if position < len(inline_outgoing):
+                attributes[OUTGOING] = inline_outgoing[position]
+            inline.append(self.requests.submit('map_remove', space, uid, attributes))
+        paged = []
+        for direction, edges in ((INCOMING, incoming), (OUTGOING, outgoing)):
+            pages = self.get_pages(vertex_type, uid, direction)
+            if pages is None:
+                continue
+            paged.extend(self.requests.submit('map_remove', self._space,
+                                              self._page_key(vertex_type, uid, direction, edge_uid % pages),
+                                              {'edges' : edge_uid})
+                         for edge_uid in edges)
+        return inline, paged
+
+    def unlink(self, edges, skip=None):
+        '''
+        Removes edges from the incoming and outgoing edges of their vertices. All
+        removals from the same vertex are issued together, a vertex which has been
+        deleted meanwhile is left out.
+
+        Args:
+            edges: The unique identifier of each edge and its endpoints, i.e. at least
+                   source_uid, source_vertex_type and target (list<tuple<int, dict>>).
+            skip: Tells whether a vertex is not updated, because it is about to be
+                  deleted, called with its type and id (callable<tuple<str, int>>).
+        '''
+        neighbors = {}
+        for edge_uid, edge in edges:
+            neighbors.setdefault((edge['source_vertex_type'], edge['source_uid']), ([], []))[1].append(edge_uid)
+            for tar in edge['target'].keys():
+                neighbors.setdefault((edge['target'][tar], tar), ([], []))[0].append(edge_uid)
+        if skip is not None:
+            for neighbor in [neighbor for neighbor in neighbors if skip(neighbor)]:
+                del neighbors[neighbor]
+        #a neighbor losing several edges is read first, to remove them at once
+        probes = dict((neighbor, self.submit_probe(*neighbor))
+                      for neighbor, (incoming, outgoing) in neighbors.iteritems()
+                      if len(incoming) + len(outgoing) >= PROBE)
+        updates = []
+        for neighbor, (incoming, outgoing) in neighbors.iteritems():
+            current = unless_missing(probes[neighbor]) if neighbor in probes else None
+            if neighbor in probes and current is None:
+                logging.debug('Vertex with type: {} id: {} was not found'.format(*neighbor))
+                continue
+            updates.append((neighbor, self.submit_remove_many(neighbor[0], neighbor[1],
+                                                              incoming, outgoing, current)))
+        for neighbor, (inline, paged) in updates:
+            results = [unless_missing(future) for future in inline]
+            [unless_missing(future) for future in paged]
+            if False in results:
+                #the edges of the neighbor have been changed meanwhile
+                inline, paged = self.submit_remove_many(neighbor[0], neighbor[1], *neighbors[neighbor])
+                [unless_missing(future) for future in inline]
+                [unless_missing(future) for future in paged]
+
+    def iter_edges(self, vertex_type, uid, direction):
+        '''
+        Iterates over the edges of a vertex. The edges of a paged vertex are read page
+        by page, while a page is processed the next one is already requested. Too many
+        inline edges are moved to the pages beforehand.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+
+        Return:
+            The ids of the edges and their types (generator<tuple<int, str>>).
+        '''
+        inline, pages = self._read_inline(vertex_type, uid, direction)
+        if len(inline) > self.threshold:
+            inline, pages = self.page(vertex_type, uid, direction)
+        for item in inline.iteritems():
+            yield item
+        if pages is None:
+            return
+        for item in self.iter_paged(vertex_type, uid, direction, pages, inline):
+            yield item
+
+    def iter_paged(self, vertex_type, uid, direction, pages, inline=()):
+        '''
+        Iterates over the paged edges of a vertex, while a page is processed the next
+        one is already requested.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+            pages: The number of pages of the vertex (int).
+            inline: The inline edges, which are not repeated (dict<int, str>).
+
+        Return:
+            The ids of the edges and their types (generator<tuple<int, str>>).
+        '''
+        upcoming = self._submit_page(vertex_type, uid, direction, 0)
+        for page in xrange(pages):
+            current = upcoming
+            if page + 1 < pages:
+                upcoming = self._submit_page(vertex_type, uid, direction, page + 1)
+            page_edges = current.result()
+            if page_edges is None:
+                continue
+            for item in page_edges['edges'].iteritems():
+                #an edge is inline and paged, if moving it has been interrupted
+                if item[0] not in inline:
+                    yield item
+
+    def read_many(self, vertices, direction):
+        '''
+        Reads the edges of several vertices at once, e.g. of a whole frontier of a
+        traversal. The inline edges of all vertices are requested together, then all
+        pages of the paged ones.
+
+        Args:
+            vertices: The type and the unique identifier of each vertex (list<tuple<str, int>>).
+            direction: INCOMING or OUTGOING (str).
+
+        Return:
+            The ids of the edges mapped to their types for each vertex in the given
+            order, empty for missing vertices (list<dict<int, str>>).
+        '''
+        probes = []
+        for vertex_type, uid in vertices:
+            space = self._vertex_space(vertex_type)
+            if hasattr(self.hyperdex_client, 'get_partial'):
+                probes.append(self.requests.submit('get_partial', space, uid, [direction]))
+            else:
+                probes.append(self.requests.submit('get', space, uid))
+        result, pages = [], []
+        for (vertex_type, uid), probe in zip(vertices, probes):
+            vertex = unless_missing(probe)
+            inline = dict(vertex[direction]) if vertex is not None else {}
+            count = inline.pop(MARKER, None)
+            if count is not None:
+                count = int(count)
+                pages.append((len(result), [self._submit_page(vertex_type, uid, direction, page)
+                                             for page in xrange(count)]))
+            if vertex is not None:
+                self._set_pages(vertex_type, uid, direction, count)
+            result.append(inline)
+        for index, futures in pages:
+            inline = result[index]
+            for future in futures:
+                page_edges = unless_missing(future)
+                if page_edges is None:
+                    continue
+                for edge_uid, edge_type in page_edges['edges'].iteritems():
+                    inline.setdefault(edge_uid, edge_type)
+        return result
+
+    def _submit_page(self, vertex_type, uid, direction, page):
+        return self.requests.submit('get', self._space, self._page_key(vertex_type, uid, direction, page))
+
+    def _read_inline(self, vertex_type, uid, direction):
+        '''
+        Reads the inline edges of a vertex.
+
+        Return:
+            The inline edges without the marker and the number of pages, None if the
+            vertex is not paged (tuple<dict<int, str>, int>).
+        '''
+        vertex = self._read(vertex_type, uid, [direction])
+        if vertex is None:
+            return {}, None
+        inline = vertex[direction]
+        pages = inline.pop(MARKER, None)
+        if pages is not None:
+            pages = int(pages)
+        self._set_pages(vertex_type, uid, direction, pages)
+        return inline, pages
+
+    def page(self, vertex_type, uid, direction):
+        '''
+        Moves the inline edges of a vertex to its pages, which are created if the
+        vertex is not yet paged. The inline edges are replaced only if they have not
+        been changed meanwhile, otherwise this is retried. If all attempts fail, the 
+        edges stay inline as well. Edges which have been moved to the pages, but have
+        been removed from the inline edges meanwhile, are removed from the pages again.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+
+        Return:
+            The remaining inline edges and the number of pages (tuple<dict<int, str>, int>).
+        '''
+        space = self._vertex_space(vertex_type)
+        #the page keys of the edges moved by previous attempts
+        moved = {}
+        for attempt in xrange(ATTEMPTS):
+            vertex = self._read(vertex_type, uid, [direction])
+            if vertex is None:
+                return {}, None
+            inline = vertex[direction]
+            expected = dict(inline)
+            pages = inline.pop(MARKER, None)
+            self._unmove(moved, inline)
+            if pages is None:
+                pages = self.pages
+                created = [self.requests.submit('put_if_not_exist', self._space,
+                                                self._page_key(vertex_type, uid, direction, page),
+                                                {'vertex_type' : vertex_type, 'edges' : {}})
+                           for page in xrange(pages)]
+                [future.result() for future in created]
+            pages = int(pages)
+            by_page = self._by_page(inline, pages)
+            futures = [self.requests.submit('map_add', self._space, self._page_key(vertex_type, uid, direction, page),
+                                            {'edges' : page_edges})
+                       for page, page_edges in by_page.iteritems()]
+            [future.result() for future in futures]
+            for page, page_edges in by_page.iteritems():
+                for edge_uid in page_edges:
+                    moved[edge_uid] = self._page_key(vertex_type, uid, direction, page)
+            if self.requests.execute('cond_put', space, uid, {direction : expected},
+                                     {direction : {MARKER : str(pages)}}):
+                logging.info('Moved {} {} of {} {} to {} pages'.format(len(inline), direction, vertex_type, uid, pages))
+                self._set_pages(vertex_type, uid, direction, pages)
+                return {}, pages
+        logging.warn('Could not move the {} of {} {}, they are changed concurrently'.format(direction, vertex_type, uid))
+        vertex = self._read(vertex_type, uid, [direction])
+        if vertex is None:
+            return {}, None
+        inline = vertex[direction]
+        pages = inline.pop(MARKER, None)
+        self._unmove(moved, inline)
+        return inline, None if pages is None else int(pages)
+
+    def _unmove(self, moved, inline):
+        '''
+        Removes the edges from the pages, which have been moved there by a failed
+        attempt of page, but are no longer inline, i.e. have been removed meanwhile.
+
+        Args:
+            moved: The page keys of the moved edges, which are updated (dict<int, str>).
+            inline: The current inline edges (dict<int, str>).
+        '''
+        removed = [edge_uid for edge_uid in moved if edge_uid not in inline]
+        futures = [self.requests.submit('map_remove', self._space, moved.pop(edge_uid), {'edges' : edge_uid})
+                   for edge_uid in removed]
+        [unless_missing(future) for future in futures]
+
+    def add_paged(self, vertex_type, uid, direction, edges):
+        '''
+        Adds many edges to a vertex at once, e.g. from a batch. The vertex is paged
+        first, so that the edges do not pass through its inline edges.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+            direction: INCOMING or OUTGOING (str).
+            edges: The ids of the edges mapped to their types (dict<int, str>).
+        '''
+        if self.get_pages(vertex_type, uid, direction) is None:
+            self.page(vertex_type, uid, direction)
+        [future.result() for future in self.submit_add(vertex_type, uid, direction, edges)]
+
+    def drop(self, vertex_type, uid):
+        '''
+        Deletes the pages of a vertex, which is about to be deleted itself.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+        '''
+        vertex = self._read(vertex_type, uid, [INCOMING, OUTGOING])
+        if vertex is None:
+            return
+        deletes = []
+        for direction in (INCOMING, OUTGOING):
+            self._set_pages(vertex_type, uid, direction, None)
+            pages = vertex[direction].get(MARKER)
+            if pages is None:
+                continue
+            deletes.extend(self.requests.submit('delete', self._space, self._page_key(vertex_type, uid, direction, page))
+                           for page in xrange(int(pages)))
+        [future.result() for future in deletes]
+
+    def submit_drop(self, vertex_type, uid):
+        '''
+        Issues the deletion of the pages of a vertex, as far as this process knows
+        them, e.g. after its edges have been read.
+
+        Args:
+            vertex_type: The type of the vertex (str).
+            uid: The unique identifier of the vertex (int).
+
+        Return:
+            The handles on the issued requests (list<Future>).
+        '''
+        deletes = []
+        for direction in (INCOMING, OUTGOING):
+            pages = self.get_pages(vertex_type, uid, direction)
+            self._set_pages(vertex_type, uid, direction, None)
+            if pages is not None:
+                deletes.extend(self.requests.submit('delete', self._space, self._page_key(vertex_type, uid, direction, page))
+                               for page in xrange(pages))
+        return deletes
+
+    def drop_type(self, vertex_type):
+        '''
+        Deletes the pages of all vertices of the given type.
+
+        Args:
+            vertex_type: The type of the removed vertices (str).
+        '''
+        with self._lock:
+            for key in [key for key in self._paged if key[0] == vertex_type]:
+                del self._paged[key]
+        try:
+            keys = [page['page'] for page in self.hyperdex_client.search(self._space, {'vertex_type' : vertex_type})]
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+                raise
+            return
+        deletes = [self.requests.submit('delete', self._space, key) for key in keys]
+        [future.result() for future in deletes]
+        if len(keys) > 0:
+            logging.info('Deleted {} adjacency pages of {}'.format(len(keys), vertex_type))
+
+    def _read(self, vertex_type, uid, attributes):
+        space = self._vertex_space(vertex_type)
+        if hasattr(self.hyperdex_client, 'get_partial'):
+            return self.requests.execute('get_partial', space, uid, attributes)
+        return self.requests.execute('get', space, uid)
+
+    def _by_page(self, edges, pages):
+        result = {}
+        for edge_uid, edge_type in edges.iteritems():
+            result.setdefault(edge_uid % pages, {})[edge_uid] = edge_type
+        return result
+
+
+def unless_missing(future):
+    '''
+    Returns the result of a request on a graph element, which might have been deleted
+    meanwhile together with its space.
+
+    Args:
+        future: The handle on the request (Future).
+
+    Return:
+        The result of the request, None if the graph element does not exist.
+    '''
+    error = future.exception()
+    if error is None:
+        return future.result()
+    if isinstance(error, HyperClientException) and error.symbol() in MISSING:
+        return None
+    raise error
@@ -0,0 +1,237 @@
+"""
+.. module:: elementcache.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from collections import OrderedDict
+import threading
+
+
+#the number of cached graph elements
+MAX_ENTRIES = 100000
+#the approximate size of all cached graph elements in bytes
+MAX_BYTES = 64 * 1024 * 1024
+#the operations which change a graph element
+WRITES = frozenset(['put', 'cond_put', 'put_if_not_exist', 'map_add', 'map_remove', 'delete',
+                    'atomic_add', 'atomic_sub', 'set_add', 'set_remove'])
+READS = frozenset(['get', 'get_partial'])
+
+#the caches shared by the stores of this process, keyed by coordinator and graph name
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class ElementCache(object):
+    '''
+    The ElementCache keeps the attributes of recently read graph elements, keyed by
+    their space and key. It is bounded by the number of entries and their approximate
+    size, the least recently used entries are evicted first. A projected read adds
+    its attributes to the entry, so that a later read of these attributes is a hit.
+
+    Every write through the request queue of a store invalidates the written element,
+    when it is issued and when it completes. A read which has been issued before an
+    invalidation does not fill the cache, as it might have read the old element.
+    Writes of other processes are not seen, hence the cache is enabled per graph.
+    '''
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        '''
+        Constructor.
+
+        Args:
+            max_entries: The maximal number of cached graph elements (int).
+            max_bytes: The maximal approximate size of the cached graph elements (int).
+        '''
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        #(space, key) -> (complete, attributes, size)
+        self._entries = OrderedDict()
+        #(space, key) -> generation of the last invalidation, bounded like the entries
+        self._invalidated = OrderedDict()
+        self._generation = 0
+        #reads issued before this generation might miss an evicted invalidation
+        self._floor = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, space, key, attributes=None):
+        '''
+        Returns the cached attributes of a graph element.
+
+        Args:
+            space: The hyperspace of the graph element (str).
+            key: The key of the graph element (int).
+            attributes: The requested attributes, None for all (list<str>).
+
+        Return:
+            Whether the attributes are cached and a copy of them (tuple<bool, dict>).
+        '''
+        with self._lock:
+            entry = self._entries.get((space, key))
+            if entry is not None:
+                complete, cached, size = entry
+                if attributes is None and complete:
+                    found = cached
+                elif attributes is not None and all(attribute in cached for attribute in attributes):
+                    found = dict((attribute, cached[attribute]) for attribute in attributes)
+                else:
+                    found = None
+                if found is not None:
+                    self._entries[(space, key)] = self._entries.pop((space, key))
+                    self.hits += 1
+                    return True, _copy(found)
+            self.misses += 1
+            return False, None
+
+    def version(self):
+        '''
+        Returns the current generation, which is passed to fill after the read.
+
+        Return:
+            The current generation (int).
+        '''
+        with self._lock:
+            return self._generation
+
+    def fill(self, space, key, element, attributes=None, version=None):
+        '''
+        Caches the attributes of a graph element, which have been read.
+
+        Args:
+            space: The hyperspace of the graph element (str).
+            key: The key of the graph element (int).
+            element: The read attributes, None if the element does not exist (dict).
+            attributes: The read attributes, None if all of them have been read (list<str>).
+            version: The generation before the read was issued (int).
+        '''
+        if element is None:
+            return
+        with self._lock:
+            if version is not None and (version < self._floor or
+                                        self._invalidated.get((space, key), -1) > version):
+                return
+            complete, cached = attributes is None, {}
+            entry = self._entries.pop((space, key), None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                if not complete:
+                    complete, cached = entry[0], entry[1]
+            cached = dict(cached)
+            cached.update(_copy(element))
+            size = _estimate(cached)
+            if size > self.max_bytes:
+                return
+            self._entries[(space, key)] = (complete, cached, size)
+            self._bytes += size
+            self._evict()
+
+    def invalidate(self, space, key):
+        '''
+        Removes a graph element, which is about to be written or has been written.
+
+        Args:
+            space: The hyperspace of the graph element (str).
+            key: The key of the graph element (int).
+        '''
+        with self._lock:
+            self._generation += 1
+            self._invalidated.pop((space, key), None)
+            self._invalidated[(space, key)] = self._generation
+            if len(self._invalidated) > self.max_entries:
+                self._floor = self._invalidated.popitem(last=False)[1]
+            entry = self._entries.pop((space, key), None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self.invalidations += 1
+
+    def invalidate_space(self, space=None):
+        '''
+        Removes all graph elements of a space, e.g. after it has been dropped.
+
+        Args:
+            space: The hyperspace, None for all spaces (str).
+        '''
+        with self._lock:
+            self._generation += 1
+            #any read which is still in flight might have read a removed element
+            self._floor = self._generation
+            self._invalidated.clear()
+            for cache_key in [cache_key for cache_key in self._entries if space is None or cache_key[0] == space]:
+                self._bytes -= self._entries.pop(cache_key)[2]
+                self.invalidations += 1
+
+    def clear(self):
+        self.invalidate_space(None)
+
+    def stats(self):
+        '''
+        Returns the counters of this cache.
+
+        Return:
+            The hits, misses, evictions and invalidations and the number and the
+            approximate size of the cached entries (dict<str, int>).
+        '''
+        with self._lock:
+            return {'hits' : self.hits, 'misses' : self.misses, 'evictions' : self.evictions,
+                    'invalidations' : self.invalidations, 'entries' : len(self._entries),
+                    'bytes' : self._bytes}
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._bytes -= self._entries.popitem(last=False)[1][2]
+            self.evictions += 1
+
+
+def shared_cache(address, port, graph_name, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    '''
+    Returns the cache of a graph shared by all the stores of this process, which is
+    created with the given bounds if there is none yet.
+
+    Args:
+        address: The IP address of HyperDex's coordinator process (str).
+        port: The port number of HyperDex's coordinator process (int).
+        graph_name: The identifier of the graph (str).
+        max_entries: The maximal number of cached graph elements (int).
+        max_bytes: The maximal approximate size of the cached graph elements (int).
+
+    Return:
+        The cache of the graph (ElementCache).
+    '''
+    with _caches_lock:
+        key = (address, port, graph_name)
+        if key not in _caches:
+            _caches[key] = ElementCache(max_entries, max_bytes)
+        return _caches[key]
+
+
+def _copy(element):
+    #the callers change the maps of the elements they have read, the values are immutable
+    return dict((key, value.copy() if isinstance(value, (dict, set)) else
+                 list(value) if isinstance(value, list) else value)
+                for key, value in element.iteritems())
+
+
+def _estimate(element):
+    #about the size of the attributes on the wire, not the size of the python objects
+    size = 0
+    for key, value in element.iteritems():
+        size += len(key) + _estimate_value(value)
+    return size
+
+
+def _estimate_value(value):
+    if isinstance(value, basestring):
+        return len(value) + 4
+    if isinstance(value, dict):
+        return sum(_estimate_value(key) + _estimate_value(item) for key, item in value.iteritems()) + 4
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return sum(_estimate_value(item) for item in value) + 4
+    return 8
@@ -28,4 +28,12 @@ class TypeNotCreatedException(Exception):
         self.value = 'Type {0} with not found.'.format(element_type)
         
     def __str__(self, *args, **kwargs):
-        return self.value
\ No newline at end of file
+        return self.value
+
+class ClusterNotReadyException(Exception):
+    
+    def __init__(self, space, waited):
+        self.value = 'Space {0} not ready after {1:.2f}s.'.format(space, waited)
+        
+    def __str__(self, *args, **kwargs):
+        return self.value
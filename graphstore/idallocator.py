@@ -0,0 +1,164 @@
+"""
+.. module:: idallocator.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+import logging
+import os
+import threading
+import time
+
+
+FIRST_ID = -100000
+DEFAULT_BLOCK_SIZE = 64
+MIN_BLOCK_SIZE = 16
+MAX_BLOCK_SIZE = 8192
+#a block is supposed to last about this many seconds, otherwise the size is adapted
+TARGET_LEASE_TIME = 1.0
+
+
+class IdAllocator(object):
+    '''
+    The IdAllocator hands out unique identifiers to newly created graph elements.
+    Instead of synchronizing every single id on the shared counter in HyperDex, it
+    leases a whole block of ids with one conditional write and serves them from
+    memory. The block size adapts to the insert rate of this process, so that a
+    busy worker does not return to the counter too often and an idle one does not
+    waste too many ids. Ids of a block which are not handed out are lost.
+    '''
+
+    def __init__(self, hyperdex_client, space, key, block_size=DEFAULT_BLOCK_SIZE,
+                 min_block_size=MIN_BLOCK_SIZE, max_block_size=MAX_BLOCK_SIZE,
+                 adaptive=True):
+        '''
+        Constructor.
+
+        Args:
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            space: The hyperspace holding the id counter (str).
+            key: The key of the id counter within the given space (str).
+            block_size: The number of ids leased at once (int).
+            min_block_size: The lower bound for an adapted block size (int).
+            max_block_size: The upper bound for an adapted block size (int).
+            adaptive: Whether the block size adapts to the insert rate (bool).
+        '''
+        self.hyperdex_client = hyperdex_client
+        self._space = space
+        self._key = key
+        self._min_block_size = min_block_size
+        self._max_block_size = max_block_size
+        self._adaptive = adaptive
+        self.block_size = max(min_block_size, min(block_size, max_block_size))
+        self._lock = threading.Lock()
+        self._reset()
+        #number of requests sent to the id counter, useful to measure its load
+        self.round_trips = 0
+
+    def _reset(self):
+        #the current block is [_next, _limit), a block must never survive a fork
+        self._next = 0
+        self._limit = 0
+        self._leased_at = None
+        self._pid = os.getpid()
+
+    def next_id(self):
+        '''
+        Returns a new id, which can be assigned to a newly created graph element.
+
+        Returns:
+            A unique and free id (int).
+        '''
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._next >= self._limit:
+                self._adapt_block_size()
+                self._next, size = self._lease(self.block_size)
+                self._limit = self._next + size
+            uid = self._next
+            self._next += 1
+            return uid
+
+    def next_ids(self, count):
+        '''
+        Returns several new ids at once. The rest of the current block is used up
+        first, the missing ids are leased with a single request.
+
+        Args:
+            count: The number of requested ids (int).
+
+        Returns:
+            Unique and free ids (list<int>).
+        '''
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            uids = range(self._next, min(self._limit, self._next + count))
+            self._next += len(uids)
+            missing = count - len(uids)
+            if missing > 0:
+                self._adapt_block_size()
+                #the remainder of the leased ids is kept for the next request
+                first, size = self._lease(max(missing, self.block_size))
+                uids.extend(xrange(first, first + missing))
+                self._next, self._limit = first + missing, first + size
+            return uids
+
+    def get_limit(self):
+        '''
+        Returns the first id which has not been leased by any process, hence all ids
+        in use are below it.
+
+        Returns:
+            The first id which has not been leased (int).
+        '''
+        current = self.hyperdex_client.get(self._space, self._key)
+        if current is None:
+            return FIRST_ID
+        return current['value']
+
+    def _adapt_block_size(self):
+        '''
+        Doubles the block size if the last block was used up quickly and halves
+        it if it took too long.
+        '''
+        now = time.time()
+        if self._adaptive and self._leased_at is not None:
+            elapsed = now - self._leased_at
+            if elapsed < TARGET_LEASE_TIME / 2:
+                self.block_size = min(self.block_size * 2, self._max_block_size)
+            elif elapsed > TARGET_LEASE_TIME * 2:
+                self.block_size = max(self.block_size / 2, self._min_block_size)
+        self._leased_at = now
+
+    def _lease(self, size):
+        '''
+        Reserves a block of ids on the shared counter.
+
+        Args:
+            size: The number of ids to be reserved (int).
+
+        Returns:
+            The first id and the size of the reserved block (tuple<int, int>).
+        '''
+        while True:
+            self.round_trips += 1
+            current = self.hyperdex_client.get(self._space, self._key)
+            if current is None:#no graph element ever has been created
+                self.round_trips += 1
+                self.hyperdex_client.put_if_not_exist(self._space, self._key, {'value' : FIRST_ID})
+                continue
+            r_id = current['value']
+            self.round_trips += 1
+            #atomic_add does not return the new value, cond_put prevents race conditions
+            if self.hyperdex_client.cond_put(self._space, self._key, {'value' : r_id}, {'value' : r_id + size}):
+                logging.debug('Leased ids [{}, {}) from {}'.format(r_id, r_id + size, self._key))
+                return r_id, size
+            #another process won the race, the counter is contended
+            if self._adaptive:
+                self.block_size = min(self.block_size * 2, self._max_block_size)
+                size = max(size, self.block_size)
@@ -0,0 +1,200 @@
+"""
+.. module:: idpool.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from hyperdex.client import HyperClientException
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+
+
+SHARDS = 16
+FLUSH_SIZE = 256
+REFILL_SIZE = 256
+#attempts to take ids from a shard, which is changed concurrently
+REFILL_ATTEMPTS = 3
+#seconds to wait before an empty pool is probed again
+REFILL_INTERVAL = 5.0
+#the pools of this process, whose buffered ids are flushed at exit
+_POOLS = weakref.WeakSet()
+
+
+def _flush_all():
+    for pool in list(_POOLS):
+        try:
+            pool.flush()
+        except Exception, e:
+            logging.error('Could not flush obsolete ids at exit: {}'.format(str(e)))
+
+atexit.register(_flush_all)
+
+
+class ObsoleteIdPool(object):
+    '''
+    The ObsoleteIdPool keeps track of the ids of deleted graph elements, so that
+    they can be recycled. The pool is sharded across several keys of the id system
+    space, which keeps every single set small. Deleted ids are buffered and flushed
+    in batches, recycled ids are taken from the shards in bulk and handed out from
+    a local cache.
+    '''
+
+    def __init__(self, hyperdex_client, space, key, shards=SHARDS, flush_size=FLUSH_SIZE,
+                 refill_size=REFILL_SIZE):
+        '''
+        Constructor.
+
+        Args:
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            space: The hyperspace holding the shards, i.e. the id system space (str).
+            key: The prefix of the shard keys (str).
+            shards: The number of shards (int).
+            flush_size: The number of buffered ids which triggers a flush (int).
+            refill_size: The maximal number of ids taken from a shard at once (int).
+        '''
+        self.hyperdex_client = hyperdex_client
+        self._space = space
+        self._key = key
+        self._shards = shards
+        self._flush_size = flush_size
+        self._refill_size = refill_size
+        self._lock = threading.Lock()
+        self._reset()
+        #do not lose the buffered obsolete ids
+        _POOLS.add(self)
+
+    def _reset(self):
+        #neither buffered nor cached ids must survive a fork, they would be handed out twice
+        self._buffer = []
+        self._cache = []
+        self._next_shard = os.getpid() % self._shards
+        self._empty_since = None
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def shard_key(self, shard):
+        '''
+        Returns the key of the given shard.
+
+        Args:
+            shard: The number of the shard (int).
+
+        Return:
+            The key within the id system space (str).
+        '''
+        return '{}_{}'.format(self._key, shard)
+
+    def add(self, uid):
+        '''
+        Adds the id of a deleted graph element to the pool.
+
+        Args:
+            uid: The id of the deleted graph element (int).
+        '''
+        self.add_many([uid])
+
+    def add_many(self, uids):
+        '''
+        Adds the ids of deleted graph elements to the pool.
+
+        Args:
+            uids: The ids of the deleted graph elements (list<int>).
+        '''
+        with self._lock:
+            self._check_pid()
+            self._buffer.extend(uids)
+            if len(self._buffer) >= self._flush_size:
+                self._flush()
+
+    def flush(self):
+        '''
+        Writes all buffered ids to their shards.
+        '''
+        with self._lock:
+            self._check_pid()
+            self._flush()
+
+    def _flush(self):
+        batches = {}
+        for uid in self._buffer:
+            batches.setdefault(uid % self._shards, set()).add(uid)
+        self._buffer = []
+        for shard, uids in batches.iteritems():
+            key = self.shard_key(shard)
+            try:
+                try:
+                    self.hyperdex_client.set_union(self._space, key, {'value' : uids})
+                except HyperClientException, e:
+                    if e.symbol() != 'HYPERDEX_CLIENT_NOTFOUND':
+                        raise
+                    #this is the first id of this shard
+                    if not self.hyperdex_client.put_if_not_exist(self._space, key, {'value' : uids}):
+                        self.hyperdex_client.set_union(self._space, key, {'value' : uids})
+            except Exception, e:
+                #keep the ids, they are written with the next flush
+                logging.warn('Could not flush obsolete ids to {}: {}'.format(key, str(e)))
+                self._buffer.extend(uids)
+        if len(self._buffer) == 0:
+            #there might be something to recycle now
+            self._empty_since = None
+
+    def take(self):
+        '''
+        Returns a recycled id, if there is one available.
+
+        Return:
+            A recycled id or None if the pool is empty (int).
+        '''
+        with self._lock:
+            self._check_pid()
+            if len(self._cache) == 0:
+                if len(self._buffer) > 0:
+                    #ids deleted by this process are recycled without any round trip
+                    self._cache, self._buffer = self._buffer, []
+                else:
+                    self._refill()
+            if len(self._cache) > 0:
+                return self._cache.pop()
+            return None
+
+    def _refill(self):
+        '''
+        Takes a bulk of ids from the shards into the local cache. The shards are probed
+        round-robin, the pool is considered empty only once all of them are.
+        '''
+        if self._empty_since is not None and time.time() - self._empty_since < REFILL_INTERVAL:
+            return
+        empty = True
+        for i in xrange(self._shards):
+            key = self.shard_key(self._next_shard)
+            self._next_shard = (self._next_shard + 1) % self._shards
+            try:
+                for attempt in xrange(REFILL_ATTEMPTS):
+                    shard = self.hyperdex_client.get(self._space, key)
+                    if shard is None or len(shard['value']) == 0:
+                        break
+                    taken = set(list(shard['value'])[:self._refill_size])
+                    #the ids are only ours if nobody changed the shard in the meantime
+                    if self.hyperdex_client.cond_put(self._space, key, {'value' : shard['value']},
+                                                     {'value' : shard['value'] - taken}):
+                        self._cache.extend(taken)
+                        self._empty_since = None
+                        return
+                else:
+                    #the shard is not empty, it is just contended
+                    empty = False
+            except Exception, e:
+                logging.warn('Could not take obsolete ids from {}: {}'.format(key, str(e)))
+                empty = False
+        if empty:
+            self._empty_since = time.time()
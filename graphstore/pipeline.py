@@ -0,0 +1,288 @@
+"""
+.. module:: pipeline.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from collections import deque
+from hyperdex.client import HyperClientException
+from graphstore.elementcache import READS, WRITES
+
+
+#number of asynchronous requests sent to HyperDex before the oldest is waited for
+MAX_IN_FLIGHT = 64
+#errors after which a write might have been applied nevertheless
+UNCERTAIN = frozenset(['HYPERDEX_CLIENT_TIMEOUT', 'HYPERDEX_CLIENT_INTERRUPTED',
+                       'HYPERDEX_CLIENT_RECONFIGURE', 'HYPERDEX_CLIENT_SERVERERROR'])
+
+
+def is_uncertain(error):
+    '''
+    Tells whether a failed write might have been applied nevertheless, e.g. after a
+    timeout. Only the items of a batch whose write has definitely failed may be retried
+    or have their ids recycled.
+
+    Args:
+        error: The cause of the failure (Exception).
+
+    Return:
+        True if the write might have been applied (bool).
+    '''
+    return isinstance(error, HyperClientException) and error.symbol() in UNCERTAIN
+
+
+class BatchResult(object):
+    '''
+    The BatchResult holds the outcome of a batch operation, in the order of the
+    requested items. A failed item does not abort the batch, its result is None and
+    the error is kept with the index of the item.
+    '''
+
+    def __init__(self, results, errors):
+        '''
+        Constructor.
+
+        Args:
+            results: The results in the order of the requested items (list).
+            errors: The exceptions of the failed items, keyed by index (dict<int, Exception>).
+        '''
+        self.results = results
+        self.errors = errors
+
+    def succeeded(self):
+        return len(self.errors) == 0
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+
+class Pipeline(object):
+    '''
+    The Pipeline issues asynchronous HyperDex requests, e.g. async_put, and keeps a
+    bounded number of them in flight. When the bound is reached, the oldest request
+    is waited for, so that the requests complete in the order they were issued.
+    '''
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Constructor.
+
+        Args:
+            max_in_flight: The maximal number of outstanding requests (int).
+        '''
+        self._max_in_flight = max(1, max_in_flight)
+        self._in_flight = deque()
+        self._results = []
+        self._errors = {}
+
+    def submit(self, operation, *args):
+        '''
+        Issues an asynchronous request.
+
+        Args:
+            operation: An asynchronous operation of the client, e.g. client.async_put (callable).
+            args: The arguments of this operation.
+
+        Return:
+            The index of this request within the result (int).
+        '''
+        index = len(self._results)
+        self._results.append(None)
+        try:
+            self._in_flight.append((index, operation(*args)))
+        except Exception, e:
+            self._errors[index] = e
+        if len(self._in_flight) >= self._max_in_flight:
+            self._complete_oldest()
+        return index
+
+    def fail(self, error):
+        '''
+        Records an item which failed before its request could be issued.
+
+        Args:
+            error: The cause of the failure (Exception).
+
+        Return:
+            The index of this item within the result (int).
+        '''
+        index = len(self._results)
+        self._results.append(None)
+        self._errors[index] = error
+        return index
+
+    def _complete_oldest(self):
+        index, deferred = self._in_flight.popleft()
+        try:
+            self._results[index] = deferred.wait()
+        except Exception, e:
+            self._errors[index] = e
+
+    def wait(self):
+        '''
+        Waits for all outstanding requests.
+
+        Return:
+            The results of all requests in the order they were issued (BatchResult).
+        '''
+        while len(self._in_flight) > 0:
+            self._complete_oldest()
+        return BatchResult(self._results, self._errors)
+
+
+class Future(object):
+    '''
+    The Future is the handle on an asynchronous request of a RequestQueue. Its
+    result is available once the request has completed, asking for it before
+    waits for the request.
+    '''
+
+    def __init__(self, queue, deferred=None, error=None, result=None, callback=None):
+        self._queue = queue
+        self._deferred = deferred
+        self._result = result
+        self._error = error
+        self._done = deferred is None
+        #called with the result and the error once the request has completed
+        self._callback = callback
+
+    def done(self):
+        return self._done
+
+    def _complete(self):
+        try:
+            self._result = self._deferred.wait()
+        except Exception, e:
+            self._error = e
+        self._deferred = None
+        self._done = True
+        if self._callback is not None:
+            self._callback(self._result, self._error)
+
+    def result(self):
+        '''
+        Returns the result of the request, i.e. what the blocking call would have 
+        returned. An error of the request is raised.
+
+        Return:
+            The result of the request.
+        '''
+        if not self._done:
+            self._queue.wait(self)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def exception(self):
+        '''
+        Returns the error of the request, after waiting for it.
+
+        Return:
+            The error or None if the request succeeded (Exception).
+        '''
+        if not self._done:
+            self._queue.wait(self)
+        return self._error
+
+
+class RequestQueue(object):
+    '''
+    The RequestQueue issues the requests of a HyperDexStore through the asynchronous
+    operations of the binding, e.g. async_get or async_map_remove, and returns a Future
+    for each of them. Independent requests can thus be sent at once, instead of 
+    waiting for each round trip. The number of outstanding requests is bounded, when
+    the bound is reached, the oldest request is waited for.
+    '''
+
+    def __init__(self, hyperdex_client, max_in_flight=MAX_IN_FLIGHT, cache=None):
+        '''
+        Constructor.
+
+        Args:
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            max_in_flight: The maximal number of outstanding requests (int).
+            cache: Serves the reads and is invalidated by the writes (ElementCache).
+        '''
+        self.hyperdex_client = hyperdex_client
+        self.cache = cache
+        self._max_in_flight = max(1, max_in_flight)
+        self._in_flight = deque()
+
+    def submit(self, operation, *args):
+        '''
+        Issues an asynchronous request.
+
+        Args:
+            operation: The name of the blocking operation of the client, e.g. 'get' (str).
+            args: The arguments of this operation.
+
+        Return:
+            The handle on the result of this request (Future).
+        '''
+        callback = None
+        if self.cache is not None:
+            if operation in READS:
+                attributes = args[2] if operation == 'get_partial' else None
+                found, element = self.cache.get(args[0], args[1], attributes)
+                if found:
+                    return Future(self, result=element)
+                callback = self._filler(args[0], args[1], attributes)
+            elif operation in WRITES:
+                self.cache.invalidate(args[0], args[1])
+                callback = self._invalidator(args[0], args[1])
+        try:
+            future = Future(self, getattr(self.hyperdex_client, 'async_' + operation)(*args), callback=callback)
+        except Exception, e:
+            return Future(self, error=e)
+        self._in_flight.append(future)
+        if len(self._in_flight) > self._max_in_flight:
+            self._in_flight.popleft()._complete()
+        return future
+
+    def _filler(self, space, key, attributes):
+        version = self.cache.version()
+        def fill(element, error):
+            if error is None:
+                self.cache.fill(space, key, element, attributes, version)
+        return fill
+
+    def _invalidator(self, space, key):
+        #a read issued while the write was in flight might have read the old element
+        return lambda result, error: self.cache.invalidate(space, key)
+
+    def execute(self, operation, *args):
+        '''
+        Issues a request and waits for it, which is the blocking call of the client.
+
+        Args:
+            operation: The name of the blocking operation of the client, e.g. 'get' (str).
+            args: The arguments of this operation.
+
+        Return:
+            The result of the request.
+        '''
+        return self.submit(operation, *args).result()
+
+    def wait(self, future=None):
+        '''
+        Waits for the given request, or for all outstanding requests.
+
+        Args:
+            future: The request to be waited for, None for all (Future).
+        '''
+        if future is None:
+            while len(self._in_flight) > 0:
+                self._in_flight.popleft()._complete()
+        elif not future.done():
+            self._in_flight.remove(future)
+            future._complete()
+
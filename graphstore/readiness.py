@@ -0,0 +1,174 @@
+"""
+.. module:: readiness.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from hyperdex.client import HyperClientException
+from graphstore.graphexception import ClusterNotReadyException
+import logging
+import threading
+import time
+
+
+DEFAULT_TIMEOUT = 30.0
+INITIAL_DELAY = 0.005
+MAX_DELAY = 0.5
+#errors which mean the cluster is still reconfiguring, e.g. after a space was added
+TRANSIENT = frozenset(['HYPERDEX_CLIENT_UNKNOWNSPACE', 'HYPERDEX_CLIENT_OFFLINE',
+                       'HYPERDEX_CLIENT_RECONFIGURE', 'HYPERDEX_CLIENT_COORDFAIL',
+                       'HYPERDEX_CLIENT_TIMEOUT', 'HYPERDEX_CLIENT_INTERRUPTED'])
+
+
+class WaitStatistics(object):
+    '''
+    Keeps track of the time spent waiting for the cluster in this process.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.last = 0.0
+
+    def record(self, waited):
+        with self._lock:
+            self.waits += 1
+            self.total += waited
+            self.longest = max(self.longest, waited)
+            self.last = waited
+
+    def __str__(self):
+        return '{} waits, {:.3f}s in total, {:.3f}s longest'.format(self.waits, self.total, self.longest)
+
+
+STATISTICS = WaitStatistics()
+
+
+def _backoff(delay):
+    time.sleep(delay)
+    return min(delay * 2, MAX_DELAY)
+
+
+def wait_until_stable(hyperdex_admin, timeout=DEFAULT_TIMEOUT):
+    '''
+    Waits in-process until the cluster is stable, i.e. until the coordinator has
+    distributed its latest configuration. The admin call blocks without a deadline,
+    hence it runs in a daemon thread, which is abandoned after the timeout.
+
+    Args:
+        hyperdex_admin: A hyperdex.admin.Admin instance (Admin).
+        timeout: The deadline in seconds (float).
+
+    Return:
+        True if the cluster is stable, False if this is unknown (bool).
+    '''
+    if not hasattr(hyperdex_admin, 'wait_until_stable'):
+        return False
+    done = threading.Event()
+    errors = []
+    def wait():
+        try:
+            hyperdex_admin.wait_until_stable()
+        except Exception, e:
+            errors.append(e)
+        finally:
+            done.set()
+    thread = threading.Thread(target=wait, name='wait_until_stable')
+    thread.daemon = True
+    thread.start()
+    if not done.wait(timeout):
+        logging.warn('The cluster is not stable after {:.3f}s'.format(timeout))
+        return False
+    if len(errors) > 0:
+        logging.warn('Could not wait for the cluster to be stable: {}'.format(str(errors[0])))
+        return False
+    return True
+
+
+def wait_for_space(hyperdex_client, space, probe_key, present=True, timeout=DEFAULT_TIMEOUT,
+                   hyperdex_admin=None):
+    '''
+    Waits in-process until the given space serves requests, or until it is gone. If an
+    admin is given, the cluster is awaited to be stable first. Then the space is probed
+    with a get on the given key, with an exponential backoff between the attempts.
+    Usually the first probe succeeds, the probing is the fallback if the admin is not
+    given or does not get stable within the deadline.
+
+    Args:
+        hyperdex_client: A hyperdex.client.Client instance (Client).
+        space: The identifier of the hyperspace (str).
+        probe_key: Any key of the correct type for this space (int/str).
+        present: Whether to wait for the space to be available or to be removed (bool).
+        timeout: The deadline in seconds (float).
+        hyperdex_admin: A hyperdex.admin.Admin instance (Admin).
+
+    Return:
+        The time waited in seconds (float).
+    '''
+    start = time.time()
+    if hyperdex_admin is not None:
+        wait_until_stable(hyperdex_admin, timeout)
+    delay = INITIAL_DELAY
+    while True:
+        try:
+            hyperdex_client.get(space, probe_key)
+            ready = present
+        except HyperClientException, e:
+            if e.symbol() == 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+                ready = not present
+            elif e.symbol() in TRANSIENT:
+                ready = False
+            else:
+                raise
+        waited = time.time() - start
+        if ready:
+            STATISTICS.record(waited)
+            logging.info('Waited {:.3f}s for space {} to be {}'.format(waited, space,
+                                                                       'available' if present else 'removed'))
+            return waited
+        if waited > timeout:
+            STATISTICS.record(waited)
+            raise ClusterNotReadyException(space, waited)
+        delay = _backoff(delay)
+
+
+def retry(operation, *args, **kwargs):
+    '''
+    Calls the given operation until it succeeds, with an exponential backoff between
+    the attempts. This is meant for requests on spaces which have just been created.
+
+    Args:
+        operation: The function to be called (callable).
+        args: The arguments of this function.
+        attempts: The maximal number of attempts (int, keyword only).
+        timeout: The deadline in seconds (float, keyword only).
+
+    Return:
+        The result of the operation.
+    '''
+    attempts = kwargs.pop('attempts', None)
+    timeout = kwargs.pop('timeout', DEFAULT_TIMEOUT)
+    start = time.time()
+    delay = INITIAL_DELAY
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = operation(*args)
+            if attempt > 1:
+                waited = time.time() - start
+                STATISTICS.record(waited)
+                logging.info('Waited {:.3f}s ({} attempts) for {}'.format(waited, attempt, getattr(operation, '__name__', operation)))
+            return result
+        except Exception, e:
+            waited = time.time() - start
+            if (attempts is not None and attempt >= attempts) or waited > timeout:
+                STATISTICS.record(waited)
+                raise
+            logging.warn('Need a further attempt for {}: {}'.format(getattr(operation, '__name__', operation), str(e)))
+        delay = _backoff(delay)
@@ -0,0 +1,245 @@
+"""
+.. module:: schemacache.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from serialization import serializer
+from serialization.codec import get_codec
+import threading
+
+
+#the attribute holding the unstructured properties, each serialized on its own
+UNSTRUCTURED = 'unstructured'
+#the attribute holding all unstructured properties serialized at once (legacy layout)
+VALUE = 'value'
+
+
+class TypeSchema(object):
+    '''
+    The TypeSchema is the compiled description of a graph element type. It keeps
+    the declared structured attributes and splits the properties of a graph element
+    into its structured and unstructured part.
+    
+    The unstructured properties of types created with the per-key layout are kept in 
+    a map, so that a single property can be read and written on its own. Elements of
+    older types keep them as one serialized blob in the value attribute. 
+    '''
+
+    def __init__(self, type_name, attributes, codec=None):
+        '''
+        Constructor.
+
+        Args:
+            type_name: The identifier of the element type (str).
+            attributes: The declared attributes (list<tuple<str, str>>).
+            codec: The codec or its name new unstructured properties are serialized 
+                   with, None for the default codec (codec/str).
+        '''
+        self.type_name = type_name
+        self.codec = get_codec(codec or serializer.DEFAULT_CODEC)
+        self.attributes = list(attributes)
+        self.definition = dict((attr[1], attr[0]) for attr in attributes if attr[1] != UNSTRUCTURED)
+        self.structured = frozenset(self.definition)
+        self.per_key = len(self.definition) < len(self.attributes)
+
+    def with_codec(self, codec):
+        '''
+        Returns this schema for a graph using another codec.
+
+        Args:
+            codec: The codec or its name (codec/str).
+
+        Return:
+            This schema if it uses the codec already, otherwise a copy (TypeSchema).
+        '''
+        if get_codec(codec or serializer.DEFAULT_CODEC) is self.codec:
+            return self
+        return TypeSchema(self.type_name, self.attributes, codec)
+
+    def get_definition(self):
+        '''
+        Returns the type declaration of the structured attributes.
+
+        Return:
+            Attribute names mapped to their data types (dict).
+        '''
+        return dict(self.definition)
+
+    def is_structured(self, key):
+        return key in self.structured
+
+    def split(self, properties):
+        '''
+        Splits the given properties into structured and unstructured attributes.
+
+        Args:
+            properties: The properties of a graph element (dict).
+
+        Return:
+            The structured and the unstructured attributes (tuple<dict, dict>).
+        '''
+        structured = {}
+        unstructured = {}
+        for key, value in properties.iteritems():
+            if key in self.structured:
+                structured[key] = value
+            else:
+                unstructured[key] = value
+        return structured, unstructured
+
+    def pack(self, properties):
+        '''
+        Converts the properties of a graph element to the attributes to be stored.
+
+        Args:
+            properties: The properties of a graph element (dict).
+
+        Return:
+            The attributes to be stored and the serialized blob of unstructured 
+            properties, which is empty for the per-key layout (tuple<dict, str>).
+        '''
+        structured, unstructured = self.split(properties)
+        if self.per_key:
+            structured[UNSTRUCTURED] = self.encode(unstructured)
+            return structured, ''
+        return structured, self.serialize(unstructured)
+
+    def encode(self, unstructured):
+        '''
+        Serializes each unstructured property on its own, for the per-key layout.
+
+        Args:
+            unstructured: The unstructured properties (dict).
+
+        Return:
+            The serialized properties (dict<str, str>).
+        '''
+        return dict((key, self.serialize(value)) for key, value in unstructured.iteritems())
+
+    def serialize(self, value):
+        return self.codec.encode(value)
+
+    def unpack(self, element):
+        '''
+        Returns all unstructured properties of a stored graph element. Properties in the
+        per-key map take precedence over the serialized blob.
+
+        Args:
+            element: The stored attributes of the graph element (dict).
+
+        Return:
+            The unstructured properties (dict).
+        '''
+        unstructured = serializer.deserialize(element[VALUE]) if element.get(VALUE) else {}
+        for key, value in element.get(UNSTRUCTURED, {}).iteritems():
+            unstructured[key] = serializer.deserialize(value)
+        return unstructured
+
+    def lookup(self, element, key):
+        '''
+        Returns a single property of a stored graph element, only this property is 
+        deserialized for the per-key layout.
+
+        Args:
+            element: The stored attributes of the graph element (dict).
+            key: The property's key (str).
+
+        Return:
+            Whether the property exists and its value (tuple<bool, any type>).
+        '''
+        if key in element and key not in (VALUE, UNSTRUCTURED):
+            return True, element[key]
+        encoded = element.get(UNSTRUCTURED, {})
+        if key in encoded:
+            return True, serializer.deserialize(encoded[key])
+        if element.get(VALUE):
+            unstructured = serializer.deserialize(element[VALUE])
+            if key in unstructured:
+                return True, unstructured[key]
+        return False, None
+
+    def keys(self, element):
+        '''
+        Returns the keys of all properties of a stored graph element. The structured
+        attributes are always part of it, so they do not have to be read.
+
+        Args:
+            element: The stored attributes of the graph element, at least the 
+                     unstructured ones (dict).
+
+        Return:
+            The property keys (set<str>).
+        '''
+        result = set(self.structured)
+        result.update(key for key in element if key not in (VALUE, UNSTRUCTURED))
+        result.update(element.get(UNSTRUCTURED, {}).keys())
+        if element.get(VALUE):
+            result.update(serializer.deserialize(element[VALUE]).keys())
+        return result
+
+
+class SchemaCache(object):
+    '''
+    The SchemaCache keeps the compiled TypeSchema of every type used in this process,
+    keyed by graph and type name. An entry is tagged with the version stamp of the
+    type catalog it was loaded with, a different stamp means the type might have been
+    changed by another worker. Once a stamp of a graph is known, entries without a
+    stamp are neither returned nor stored.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schemas = {}
+        #the graphs whose version stamp has been seen
+        self._versioned = set()
+
+    def get(self, graph_name, type_name, version=None):
+        '''
+        Returns the cached schema of the given type.
+
+        Args:
+            graph_name: The identifier of the graph (str).
+            type_name: The identifier of the element type (str).
+            version: The current version stamp of the type catalog, None if unknown (int).
+
+        Return:
+            The cached schema or None (TypeSchema).
+        '''
+        with self._lock:
+            entry = self._schemas.get((graph_name, type_name))
+            if version is not None:
+                self._versioned.add(graph_name)
+        if entry is None:
+            return None
+        if version is not None and entry[0] != version:
+            return None
+        return entry[1]
+
+    def put(self, graph_name, type_name, schema, version=None):
+        with self._lock:
+            if version is None and graph_name in self._versioned:
+                return
+            self._schemas[(graph_name, type_name)] = (version, schema)
+
+    def invalidate(self, graph_name, type_name=None):
+        '''
+        Drops the cached schema of the given type, or all types of the graph.
+
+        Args:
+            graph_name: The identifier of the graph (str).
+            type_name: The identifier of the element type (str).
+        '''
+        with self._lock:
+            if type_name is not None:
+                self._schemas.pop((graph_name, type_name), None)
+            else:
+                for key in [k for k in self._schemas if k[0] == graph_name]:
+                    del self._schemas[key]
+
+
+#the process-wide cache, shared by all graphs opened in this process
+SCHEMAS = SchemaCache()
@@ -13,11 +13,29 @@ from sysadmin import SysAdmin
 from typeadmin import TypeAdmin
 from hyperdex.client import HyperClientException
 from graphexception import ElementNotFoundException,TypeNotFoundException
-import os
+from graphstore import readiness
 import logging
+import threading
 from graphstore.graphexception import TypeNotCreatedException
+from graphstore.idallocator import DEFAULT_BLOCK_SIZE, FIRST_ID
+from graphstore.subspaceadvisor import SubspaceAdvisor
+from graphstore.pipeline import Pipeline, BatchResult, RequestQueue, MAX_IN_FLIGHT, is_uncertain
+from graphstore.schemacache import TypeSchema, UNSTRUCTURED, VALUE
+from graphstore.adjacency import AdjacencyStore, INCOMING, OUTGOING, MARKER, unless_missing
+from graphstore.typescan import ParallelScan, PARALLELISM, CHUNK_SIZE
+from graphstore.elementcache import ElementCache, shared_cache
+from serialization.codec import get_codec
+from serialization.serializer import DEFAULT_CODEC
 
 
+#the graphs validated by this process, keyed by coordinator and graph name
+_VALIDATED = set()
+_VALIDATED_LOCK = threading.Lock()
+#the type of vertices created without a type
+GENERIC_VERTEX = 'generic_vertex'
+#the attributes of an edge which tell its vertices
+ENDPOINTS = ['source_uid', 'source_vertex_type', 'target']
+
 
 class HyperDexStore():
     '''
@@ -26,13 +44,23 @@ class HyperDexStore():
     handles the underlying connection to the database.
     '''
 
-    def __init__(self, address, port, graph_name):
+    def __init__(self, address, port, graph_name, id_block_size=DEFAULT_BLOCK_SIZE, fast_open=False,
+                 codec=None, cache=False):
         '''
         Constructor.
         
         Args:
             address: The IP address of HyperDex's coordinator process (str).
             port: The port number of HyperDex's coordinator process (int).
+            graph_name: The identifier of the graph to be opened (str).
+            id_block_size: The number of ids leased at once for new graph elements (int).
+            fast_open: Do not validate the database when opening the graph. The system
+                       spaces are validated with the first write instead, once per process (bool).
+            codec: The codec or its name new unstructured properties are serialized with,
+                   e.g. binary or binary+zlib, None for the default codec (codec/str).
+            cache: Cache the read graph elements, True for the cache of this graph shared 
+                   by the process or a cache of its own. The elements written by other
+                   processes are not seen (bool/ElementCache).
         
         Returns:
             An instance of the HyperDexStore, which wraps the underlying connection.
@@ -42,16 +70,51 @@ class HyperDexStore():
         self._graph_name = graph_name
         self.hyperdex_client = Client(address, port)#HyperDex python binding (Client)
         self.hyperdex_admin = Admin(address, port)#HyperDex python binding (Admin)
-        self.sysadmin = SysAdmin(address, port, graph_name,  self.hyperdex_client, self.hyperdex_admin)
-        self.typeadmin = TypeAdmin(address, port, graph_name, self.hyperdex_client, self.hyperdex_admin)
-        #validate the underlying database for the particular components, i.e.
-        #checking for the system/description space
+        if cache is True:
+            cache = shared_cache(address, port, graph_name)
+        self.cache = cache if isinstance(cache, ElementCache) else None
+        #the graph elements are read and written through asynchronous requests
+        self.requests = RequestQueue(self.hyperdex_client, cache=self.cache)
+        self.sysadmin = SysAdmin(address, port, graph_name,  self.hyperdex_client, self.hyperdex_admin, id_block_size)
+        self.codec = get_codec(codec or DEFAULT_CODEC)
+        self.typeadmin = TypeAdmin(address, port, graph_name, self.hyperdex_client, self.hyperdex_admin,
+                                   self.codec)
+        self._generic_vertex = '{}_{}'.format(graph_name, GENERIC_VERTEX)
+        #the edges of a vertex with many of them are moved to pages
+        self.adjacency = AdjacencyStore(graph_name, self.hyperdex_client, self.hyperdex_admin, self.requests)
+        self._validated = False
+        if not fast_open:
+            self._validate_all()
+        #records the search predicates in order to suggest subspaces
+        self.advisor = SubspaceAdvisor()
+        
+    def _validate_all(self):
+        '''
+        Validates the underlying database for the particular components, i.e.
+        checking for the system/description space.
+        '''
         self.sysadmin.validate_database()
         self.typeadmin.validate_database()
-        
-        self._generic_vertex = graph_name + '_generic_vertex'
         self.validate_database()
-        
+        self.adjacency.validate_database()
+        with _VALIDATED_LOCK:
+            _VALIDATED.add((self._address, self._port, self._graph_name))
+        self._validated = True
+    
+    def _ensure_database(self):
+        '''
+        Validates the database before the first write of a lazily opened graph,
+        unless this process has already done so.
+        '''
+        if self._validated:
+            return
+        with _VALIDATED_LOCK:
+            validated = (self._address, self._port, self._graph_name) in _VALIDATED
+        if validated:
+            self._validated = True
+        else:
+            self._validate_all()
+    
     def validate_database(self):
         try:
             self.hyperdex_client.get(self._generic_vertex, 1)
@@ -67,28 +130,25 @@ class HyperDexStore():
                    map(int, string) outgoing_edges,
                    string value
                 ''')
-                os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
+                readiness.wait_for_space(self.hyperdex_client, self._generic_vertex, 1,
+                                         hyperdex_admin=self.hyperdex_admin)
                 return
             logging.error(str(e))
     
-    def add_vertex_type(self, vertex_type, attributes):
+    def add_vertex_type(self, vertex_type, attributes, subspaces=None):
         '''
         Adds a new vertex type to the database.
         
         Args:
             vertex_type: The identifier of the requested vertex type (str).
             attributes: The schema description of the requested type definition (dict)
+            subspaces: Attributes to be indexed in their own subspace (list<tuple<str>>).
         '''
-        if attributes is None:
-            attributes = []# create empty definition
-        #add special attributes for incoming and outgoing edges  
-        if ('map(int, string)', 'incoming_edges') not in attributes:
-            attributes.append(('map(int, string)', 'incoming_edges'))
-        if ('map(int, string)', 'outgoing_edges') not in attributes:
-            attributes.append(('map(int, string)', 'outgoing_edges'))
+        attributes = self._vertex_type_attributes(attributes)
+        self._ensure_database()
         try:
             #create the vertex within the typeadmin
-            self.typeadmin.create_element_type(vertex_type, attributes)
+            self.typeadmin.create_element_type(vertex_type, attributes, subspaces)
             #introduce the type to sysadmin
             self.sysadmin.add_vertex_type(vertex_type)
             logging.debug(self.typeadmin.get_type_description(vertex_type))
@@ -98,33 +158,206 @@ class HyperDexStore():
 
             
     
-    def rm_vertex_type(self, vertex_type):
+    def rm_vertex_type(self, vertex_type, cleanup=True, parallelism=PARALLELISM, chunk_size=CHUNK_SIZE,
+                       progress=None):
         '''
-        Removes the vertex type and all the vertices of this type.
+        Removes the vertex type and all the vertices of this type. Unless cleanup is
+        disabled, the vertices are scanned in parallel before the space is dropped. 
+        Their edges are deleted and removed from the surviving vertices, so that no
+        edge points to a removed vertex. The ids are recycled afterwards. The type must
+        not be written meanwhile.
         
         Args:
             vertex_type: The identifier of the requested vertex type (str).
+            cleanup: Delete the edges of the removed vertices (bool).
+            parallelism: The number of threads scanning the vertices (int).
+            chunk_size: The number of vertices handled at once (int).
+            progress: Called with the number of handled vertices and the elapsed seconds
+                      (callable<int, float>).
+        
+        Return:
+            The number of removed vertices, None without cleanup (int).
         '''
+        removed = None
+        if cleanup:
+            scan = self._scan_type(vertex_type, parallelism, chunk_size, progress)
+            removed = scan.run(lambda vertices, requests: self._unlink_vertices(vertex_type, vertices, requests))
         self.typeadmin.remove_element_type(vertex_type)
         self.sysadmin.rm_vertex_type(vertex_type)
+        self.adjacency.drop_type(vertex_type)
+        self._invalidate_space(vertex_type)
+        if removed is None:
+            self._count_removals([(None, vertex_type)])
+            return None
+        self._count_removals(removed + [(None, vertex_type)])
+        self.sysadmin.add_obsolete_ids([uid for uid, element_type in removed])
+        return scan.done
     
-    def rm_edge_type(self, edge_type):
+    def rm_edge_type(self, edge_type, cleanup=True, parallelism=PARALLELISM, chunk_size=CHUNK_SIZE,
+                     progress=None):
         '''
-        Removes the edge type and all the edges of this type.
+        Removes the edge type and all the edges of this type. Unless cleanup is 
+        disabled, the edges are scanned in parallel before the space is dropped and
+        removed from the incoming/outgoing edges of their vertices, grouped by vertex.
+        The ids are recycled afterwards. The type must not be written meanwhile.
         
         Args:
             edge_type: The identifier of the requested edge type (str).
+            cleanup: Remove the edges from their vertices (bool).
+            parallelism: The number of threads scanning the edges (int).
+            chunk_size: The number of edges handled at once (int).
+            progress: Called with the number of handled edges and the elapsed seconds
+                      (callable<int, float>).
+        
+        Return:
+            The number of removed edges, None without cleanup (int).
         '''
+        uids = None
+        if cleanup:
+            scan = self._scan_type(edge_type, parallelism, chunk_size, progress)
+            uids = scan.run(self._unlink_edge_chunk)
         self.typeadmin.remove_element_type(edge_type)
         self.sysadmin.rm_edge_type(edge_type)
+        self._invalidate_space(edge_type)
+        #a type of the same name might be created later on
+        self._count_removals([(None, edge_type)])
+        if uids is None:
+            return None
+        self.sysadmin.add_obsolete_ids(uids)
+        return scan.done
+    
+    def _scan_type(self, element_type, parallelism, chunk_size, progress):
+        #all graph elements have ids between FIRST_ID and the id counter
+        return ParallelScan(self._address, self._port, '{}_{}'.format(self._graph_name, element_type),
+                            FIRST_ID, self.sysadmin.get_id_limit() - 1, parallelism, chunk_size, progress,
+                            cache=self.cache)
+    
+    def _count_removals(self, removed):
+        #the removal counters tell a refresh of a snapshot which types have lost elements
+        removals = {}
+        for uid, element_type in removed:
+            removals[element_type] = removals.get(element_type, 0) + 1
+        self.sysadmin.count_removals(removals)
     
-    def add_edge_type(self, edge_type, attributes):
+    def _invalidate(self, element_type, uids):
+        #the batches write through their own pipelines, not through the request queue
+        if self.cache is not None:
+            space = '{}_{}'.format(self._graph_name, element_type)
+            for uid in uids:
+                self.cache.invalidate(space, uid)
+    
+    def _invalidate_space(self, element_type):
+        if self.cache is not None:
+            self.cache.invalidate_space('{}_{}'.format(self._graph_name, element_type))
+    
+    def _unlink_edge_chunk(self, edges, requests):
+        adjacency = self.adjacency.clone(requests.hyperdex_client, requests)
+        adjacency.unlink([(edge['graph_uid'], edge) for edge in edges])
+        return [edge['graph_uid'] for edge in edges]
+    
+    def _unlink_vertices(self, vertex_type, vertices, requests):
+        '''
+        Deletes the edges of removed vertices and removes them from the surviving 
+        vertices. An edge between two removed vertices is deleted by its source or, if
+        the source survives, by its removed target with the lowest id, hence only once.
+        
+        Args:
+            vertex_type: The type of the removed vertices (str).
+            vertices: The removed vertices as stored (list<dict>).
+            requests: The queue of asynchronous requests of the calling thread (RequestQueue).
+        
+        Return:
+            The ids and the types of the vertices and the deleted edges (list<tuple<int, str>>).
+        '''
+        adjacency = self.adjacency.clone(requests.hyperdex_client, requests)
+        edges = {}
+        for vertex in vertices:
+            uid = vertex['graph_uid']
+            for direction in (INCOMING, OUTGOING):
+                inline = dict(vertex[direction])
+                pages = inline.pop(MARKER, None)
+                edges.update(inline)
+                if pages is not None:
+                    edges.update(adjacency.iter_paged(vertex_type, uid, direction, int(pages), inline))
+        edges = edges.items()
+        futures = [self._submit_read('{}_{}'.format(self._graph_name, edge_type), edge_uid, ENDPOINTS, requests)
+                   for edge_uid, edge_type in edges]
+        uids = set(vertex['graph_uid'] for vertex in vertices)
+        owned = []
+        for (edge_uid, edge_type), future in zip(edges, futures):
+            #the edge type might have been removed before
+            edge = unless_missing(future)
+            if edge is None:
+                continue
+            if edge['source_vertex_type'] == vertex_type:
+                owner = edge['source_uid']
+            else:
+                owner = min([tar for tar, tar_type in edge['target'].iteritems() if tar_type == vertex_type] or [None])
+            if owner in uids:
+                owned.append((edge_uid, edge_type, edge))
+        adjacency.unlink([(edge_uid, edge) for edge_uid, edge_type, edge in owned], 
+                         lambda neighbor: neighbor[0] == vertex_type)
+        deletes = [requests.submit('delete', '{}_{}'.format(self._graph_name, edge_type), edge_uid)
+                   for edge_uid, edge_type, edge in owned]
+        [future.result() for future in deletes]
+        return [(uid, vertex_type) for uid in uids] + [(edge_uid, edge_type) for edge_uid, edge_type, edge in owned]
+    
+    def add_edge_type(self, edge_type, attributes, subspaces=None):
         '''
         Adds a new edge type to the database.
         
         Args:
             edge_type: The identifier of the requested edge type (str).
             attributes: The schema description of the requested type definition (dict)
+            subspaces: Attributes to be indexed in their own subspace (list<tuple<str>>).
+        '''
+        attributes = self._edge_type_attributes(attributes)
+        self._ensure_database()
+        #introduce the type to sysadmin
+        self.typeadmin.create_element_type(edge_type, attributes, subspaces)
+        self.sysadmin.add_edge_type(edge_type)
+        
+    def add_types(self, vertex_types, edge_types):
+        '''
+        Adds several vertex and edge types to the database at once. The cluster is
+        waited for only once and the types are registered in batched writes.
+        
+        Args:
+            vertex_types: The identifiers, schema descriptions and subspaces of the requested 
+                          vertex types (list<tuple<str, list, list>>).
+            edge_types: The identifiers, schema descriptions and subspaces of the requested 
+                        edge types (list<tuple<str, list, list>>).
+        '''
+        self._ensure_database()
+        element_types = [(vertex_type, self._vertex_type_attributes(attributes), subspaces) 
+                         for vertex_type, attributes, subspaces in vertex_types]
+        element_types.extend([(edge_type, self._edge_type_attributes(attributes), subspaces) 
+                              for edge_type, attributes, subspaces in edge_types])
+        self.typeadmin.create_element_types(element_types)
+        self.sysadmin.add_element_types([vertex_type[0] for vertex_type in vertex_types],
+                                        [edge_type[0] for edge_type in edge_types])
+    
+    def _vertex_type_attributes(self, attributes):
+        '''
+        Completes the schema description of a vertex type with the special attributes
+        for incoming and outgoing edges.
+        '''
+        if attributes is None:
+            attributes = []# create empty definition
+        #add special attributes for incoming and outgoing edges  
+        if ('map(int, string)', 'incoming_edges') not in attributes:
+            attributes.append(('map(int, string)', 'incoming_edges'))
+        if ('map(int, string)', 'outgoing_edges') not in attributes:
+            attributes.append(('map(int, string)', 'outgoing_edges'))
+        #unstructured properties are stored per key
+        if ('map(string, string)', UNSTRUCTURED) not in attributes:
+            attributes.append(('map(string, string)', UNSTRUCTURED))
+        return attributes
+    
+    def _edge_type_attributes(self, attributes):
+        '''
+        Completes the schema description of an edge type with the special attributes
+        for the source and target vertices.
         '''
         if attributes is None:
             attributes = []
@@ -135,9 +368,9 @@ class HyperDexStore():
             attributes.append(('string', 'source_vertex_type'))
         if ('map(int, string)', 'target') not in attributes:
             attributes.append(('map(int, string)', 'target'))
-        #introduce the type to sysadmin
-        self.typeadmin.create_element_type(edge_type, attributes)
-        self.sysadmin.add_edge_type(edge_type)
+        if ('map(string, string)', UNSTRUCTURED) not in attributes:
+            attributes.append(('map(string, string)', UNSTRUCTURED))
+        return attributes
         
     def add_vertex(self, vertex_type=None, struct_attr=None, unstrc_att=None):
         '''
@@ -152,13 +385,14 @@ class HyperDexStore():
         Return:
             The assigned unique id for this vertex (int).
         '''
+        self._ensure_database()
         if vertex_type is None:
             #get the next available id 
             uid = self.sysadmin.get_next_id()
             if struct_attr is None:
                 #this vertex has no specified type and is stored as generic vertex
                 #besides, this vertex is empty, hence there is no processing necessary
-                self.hyperdex_client.put(self._generic_vertex, uid, { 'value' : str(unstrc_att),
+                self.requests.execute('put', self._generic_vertex, uid, { 'value' : str(unstrc_att),
                                                          'incoming_edges' : {}, 'outgoing_edges' : {} })
             else:
                 #the vertex already got some payload to store
@@ -166,7 +400,7 @@ class HyperDexStore():
                 #there are no edges on newly created vertices
                 struct_attr['incoming_edges'] = {} if not 'incoming_edges' in struct_attr else struct_attr['incoming_edges']
                 struct_attr['outgoing_edges'] = {} if not 'outgoing_edges' in struct_attr else struct_attr['outgoing_edges']
-                self.hyperdex_client.put(self._generic_vertex, uid, struct_attr)
+                self.requests.execute('put', self._generic_vertex, uid, struct_attr)
         else:
             #the vertex is of a certain type
             if self.sysadmin.is_vertex_type(vertex_type):
@@ -175,14 +409,14 @@ class HyperDexStore():
                 logging.debug('Inserting vertex for id: ' + str(uid))
                 if struct_attr is None:
                     #the vertex has no structured attributes and may empty (except for the unstructured attributes)
-                    self.hyperdex_client.put('{}_{}'.format(self._graph_name,vertex_type), uid, { 'value' : str(unstrc_att),
+                    self.requests.execute('put', '{}_{}'.format(self._graph_name,vertex_type), uid, { 'value' : str(unstrc_att),
                                                     'incoming_edges' : {}, 'outgoing_edges' : {} })
                 else:
                     #set the payload of this vertex
                     struct_attr['value'] = str(unstrc_att)
                     struct_attr['incoming_edges'] = {} if not 'incoming_edges' in struct_attr else struct_attr['incoming_edges']
                     struct_attr['outgoing_edges'] = {} if not 'outgoing_edges' in struct_attr else struct_attr['outgoing_edges']
-                    self.hyperdex_client.put('{}_{}'.format(self._graph_name,vertex_type), uid, struct_attr)
+                    self.requests.execute('put', '{}_{}'.format(self._graph_name,vertex_type), uid, struct_attr)
             else:
                 logging.debug('Vertex type not found: {}_{}'.format(self._graph_name,vertex_type))
                 raise TypeNotFoundException('Vertex type not found: {}_{}'.format(self._graph_name, vertex_type))
@@ -190,6 +424,48 @@ class HyperDexStore():
 
   
     
+    def add_vertices(self, vertex_type, struct_attrs, unstrc_attrs, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Adds a batch of new vertices of the same type to the database. The ids are 
+        allocated in bulk and the vertices are written with pipelined asynchronous 
+        puts. A failed put does not abort the batch, its id is recycled unless the put
+        might have been applied nevertheless, e.g. after a timeout.
+        
+        Args:
+            vertex_type: The vertex type identifier of the given vertices (str).
+            struct_attrs: The structured attributes of each vertex (list<dict>).
+            unstrc_attrs: The additional properties of each vertex - already serialized (list<str>).
+            max_in_flight: The maximal number of outstanding puts (int).
+        Return:
+            The assigned unique ids in the order of the given vertices, None for the
+            failed ones (BatchResult).
+        '''
+        self._ensure_database()
+        if vertex_type is None:
+            space = self._generic_vertex
+        elif self.sysadmin.is_vertex_type(vertex_type):
+            space = '{}_{}'.format(self._graph_name,vertex_type)
+        else:
+            logging.debug('Vertex type not found: {}_{}'.format(self._graph_name,vertex_type))
+            raise TypeNotFoundException('Vertex type not found: {}_{}'.format(self._graph_name, vertex_type))
+        uids = self.sysadmin.get_next_ids(len(struct_attrs))
+        pipeline = Pipeline(max_in_flight)
+        for uid, struct_attr, unstrc_att in zip(uids, struct_attrs, unstrc_attrs):
+            vertex = dict(struct_attr) if struct_attr is not None else {}
+            vertex['value'] = str(unstrc_att)
+            #there are no edges on newly created vertices
+            vertex.setdefault('incoming_edges', {})
+            vertex.setdefault('outgoing_edges', {})
+            pipeline.submit(self.hyperdex_client.async_put, space, uid, vertex)
+        result = pipeline.wait()
+        self._invalidate(vertex_type or GENERIC_VERTEX, uids)
+        if len(result.errors) > 0:
+            logging.warn('{} of {} vertices were not inserted into {}'.format(len(result.errors), len(uids), space))
+            #a vertex whose put timed out might exist, its id is not handed out again
+            self.sysadmin.add_obsolete_ids([uids[index] for index, error in result.errors.iteritems()
+                                            if not is_uncertain(error)])
+        return BatchResult([None if index in result.errors else uid for index, uid in enumerate(uids)], result.errors)
+    
     def rm_vertex(self, uid, vertex_type=None):
         '''
         Removes a vertex from the database.
@@ -198,25 +474,152 @@ class HyperDexStore():
             uid: The numeric identifier of a vertex object (int).
             vertex_type: The type identifier of this vertex (str). 
         '''
+        self._ensure_database()
+        #the pages of a vertex with many edges are deleted first
+        self.adjacency.drop(vertex_type or GENERIC_VERTEX, uid)
         if vertex_type is None:
-            self.hyperdex_client.delete(self._generic_vertex, uid)
+            self.requests.execute('delete', self._generic_vertex, uid)
         else:
-            self.hyperdex_client.delete('{}_{}'.format(self._graph_name,vertex_type), uid)
+            self.requests.execute('delete', '{}_{}'.format(self._graph_name,vertex_type), uid)
+        self._count_removals([(uid, vertex_type or GENERIC_VERTEX)])
         self.sysadmin.add_obsolete_id(uid)    
     
-    def get_graph_element(self, uid, element_type):
+    def get_graph_element(self, uid, element_type, attributes=None):
         '''
         Returns the graph element for a given identifier and element 
-        type.
+        type. If attributes are given, only these are read, e.g. without the incoming
+        and outgoing edges. Partial reads are used if the binding provides them.
+        
+        Args:
+            uid: The unique identifier of the graph element (int).
+            element_type: Identifier of the requested graph element (str).
+            attributes: The names of the requested attributes, None for all (list<str>).
+        
+        Return:
+            A plain object from HyperDex, representing the graph element or None if it
+            does not exist (dict).
+        '''
+        space = '{}_{}'.format(self._graph_name, element_type)
+        if attributes is None:
+            return self.requests.execute('get', space, uid)
+        if hasattr(self.hyperdex_client, 'get_partial'):
+            return self.requests.execute('get_partial', space, uid, list(attributes))
+        element = self.requests.execute('get', space, uid)
+        if element is None:
+            return None
+        return dict((attr, element[attr]) for attr in attributes if attr in element)
+    
+    def update_graph_element(self, uid, element_type, attributes, expected=None):
+        '''
+        Writes only the given attributes of a graph element, all other attributes, 
+        e.g. the incoming and outgoing edges, are left untouched.
         
         Args:
             uid: The unique identifier of the graph element (int).
             element_type: Identifier of the requested graph element (str).
+            attributes: The changed attributes (dict).
+            expected: The attribute values the element must still have, otherwise 
+                      nothing is written (dict).
+        
+        Return:
+            True if the attributes have been written, False if the element does not
+            exist or has not the expected values.
+        '''
+        space = '{}_{}'.format(self._graph_name,element_type)
+        #a conditional put never creates the element, a removed one stays removed
+        try:
+            return self.requests.execute('cond_put', space, uid, expected or {}, attributes)
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_NOTFOUND':
+                raise
+            return False
+    
+    def add_unstructured(self, uid, element_type, encoded):
+        '''
+        Adds or replaces single unstructured properties of a graph element, which 
+        uses the per-key layout. The other properties are neither read nor written.
+        
+        Args:
+            uid: The unique identifier of the graph element (int).
+            element_type: Identifier of the requested graph element (str).
+            encoded: The serialized properties (dict<str, str>).
+        
+        Return:
+            True if the properties have been written, False if the element does not exist.
+        '''
+        try:
+            return self.requests.execute('map_add', '{}_{}'.format(self._graph_name,element_type), uid,
+                                         {UNSTRUCTURED : encoded})
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_NOTFOUND':
+                raise
+            return False
+    
+    def migrate_element_type(self, element_type, subspaces=None, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Converts an element type, which keeps the unstructured properties of its elements 
+        in a single serialized blob, to the per-key layout. HyperDex cannot add an attribute 
+        to an existing hyperspace, hence the elements are copied to a temporary hyperspace
+        and back to a recreated one. The type must not be used while it is migrated. The 
+        temporary hyperspace is removed last, so that a migration which has been 
+        interrupted is resumed by migrating the type again. 
+        
+        Args:
+            element_type: The identifier of the element type (str).
+            subspaces: Attributes to be indexed in their own subspace of the recreated
+                       hyperspace, i.e. the subspaces requested when the type was created,
+                       since HyperDex does not tell them (list<tuple<str>>).
+            max_in_flight: The maximal number of outstanding requests (int).
         
         Return:
-            A plain object from HyperDex, representing the graph element (dict).
+            The number of migrated graph elements (int).
+        '''
+        self._ensure_database()
+        temporary = element_type + '_migration'
+        attributes = self.typeadmin.get_type_description(element_type)
+        migrated = self.typeadmin.get_type_description(temporary)
+        if migrated is None:
+            if attributes is None:
+                raise TypeNotFoundException('{}_{}'.format(self._graph_name, element_type))
+            if ('map(string, string)', UNSTRUCTURED) in attributes:
+                return 0
+        else:
+            logging.warn('Resuming the interrupted migration of {}_{}'.format(self._graph_name, element_type))
+        if attributes is not None and ('map(string, string)', UNSTRUCTURED) not in attributes:
+            #the original hyperspace still holds all elements in the old layout
+            attributes.append(('map(string, string)', UNSTRUCTURED))
+            if migrated is None:
+                self.typeadmin.create_element_type(temporary, attributes)
+            self._copy_elements(element_type, temporary, TypeSchema(element_type, attributes), max_in_flight)
+            self.typeadmin.remove_element_type(element_type)
+            migrated, attributes = attributes, None
+        if attributes is None:
+            self.typeadmin.create_element_type(element_type, migrated, subspaces)
+        #the elements are copied back again if the migration has been interrupted meanwhile
+        count = self._copy_elements(temporary, element_type, None, max_in_flight)
+        self.typeadmin.remove_element_type(temporary)
+        self._invalidate_space(element_type)
+        #other workers must reload the schema of this type
+        self.sysadmin.touch_element_type(element_type)
+        logging.info('Migrated {} elements of {}_{}'.format(count, self._graph_name, element_type))
+        return count
+    
+    def _copy_elements(self, source_type, target_type, schema, max_in_flight):
         '''
-        return self.hyperdex_client.get('{}_{}'.format(self._graph_name, element_type), uid)
+        Copies all graph elements of one type to another. If the per-key schema of the 
+        target type is given, the unstructured properties are converted.
+        '''
+        pipeline = Pipeline(max_in_flight)
+        for element in self.get_all_elements(source_type):
+            uid = element.pop('graph_uid')
+            if schema is not None:
+                element[UNSTRUCTURED] = schema.encode(schema.unpack(element))
+                element[VALUE] = ''
+            pipeline.submit(self.hyperdex_client.async_put, '{}_{}'.format(self._graph_name, target_type), uid, element)
+        result = pipeline.wait()
+        if len(result.errors) > 0:
+            raise result.errors.values()[0]
+        return len(result)
     
     def put_graph_element(self, uid, element_type, element):
         '''
@@ -227,7 +630,7 @@ class HyperDexStore():
             element_type: Identifier of the requested graph element (str).
             
         '''
-        self.hyperdex_client.put('{}_{}'.format(self._graph_name,element_type), uid, element)
+        self.requests.execute('put', '{}_{}'.format(self._graph_name,element_type), uid, element)
         
     def add_edge(self, src_vertex, src_type, tar_vertices, edge_type, attributes):
         '''
@@ -244,21 +647,126 @@ class HyperDexStore():
         Return:
             The unique id of the newly created edge element (int).
         '''
+        self._ensure_database()
         if self.sysadmin.is_edge_type(edge_type):
             uid = self.sysadmin.get_next_id()
             #print(attributes)
             #store the edge object in the related hyperspace 
-            self.hyperdex_client.put('{}_{}'.format(self._graph_name,edge_type), uid, attributes)
+            self.requests.execute('put', '{}_{}'.format(self._graph_name,edge_type), uid, attributes)
         else:
             logging.debug('Edge type not found: {}_{}'.format(self._graph_name, edge_type))
             raise TypeNotFoundException('Edge type not found: {}_{}'.format(self._graph_name, edge_type))
-        #add the newly created edge to the index structure
-        self.hyperdex_client.map_add('{}_{}'.format(self._graph_name,src_type), src_vertex, {'outgoing_edges' : {uid : edge_type}})
+        #add the newly created edge to the index structure, the vertices are updated at once
+        futures = self.adjacency.submit_add(src_type, src_vertex, OUTGOING, {uid : edge_type})
         #iterate over all target vertices, add this edge to the incoming edge structure
         for tar in tar_vertices.keys():
-            self.hyperdex_client.map_add('{}_{}'.format(self._graph_name,tar_vertices[tar]), tar, {'incoming_edges' : {uid : edge_type}})
+            futures.extend(self.adjacency.submit_add(tar_vertices[tar], tar, INCOMING, {uid : edge_type}))
+        [future.result() for future in futures]
+        #a vertex with too many inline edges is paged
+        self.adjacency.count_added(src_type, src_vertex, OUTGOING, 1)
+        for tar in tar_vertices.keys():
+            self.adjacency.count_added(tar_vertices[tar], tar, INCOMING, 1)
         return uid
     
+    def add_edges(self, edge_type, edges, max_in_flight=MAX_IN_FLIGHT):
+        '''
+        Creates a batch of edges of the same type. The ids are allocated in bulk, the
+        edges are written with pipelined asynchronous puts and all additions to the 
+        incoming/outgoing edge data structure of the same vertex are merged into a single
+        map_add. Hence, the number of requests depends on the number of distinct vertices,
+        not on the number of edges. A vertex which is paged or gets more edges than its
+        inline edges may hold, gets them added to its pages instead. A failed edge does 
+        not abort the batch, an edge which could not be added to all its vertices is 
+        removed again, so that no edge is left which is unreachable from a vertex. The
+        same holds for an edge whose put might have been applied, e.g. after a timeout.
+        
+        Args:
+            edge_type: The type of the newly created edges (str).
+            edges: The source vertex, its type, the target vertices and the attributes of each 
+                   edge (list<tuple<int, str, dict<int, str>, dict>>).
+            max_in_flight: The maximal number of outstanding requests (int).
+        
+        Return:
+            The unique ids of the newly created edges in the given order, None for the failed
+            ones (BatchResult).
+        '''
+        self._ensure_database()
+        if not self.sysadmin.is_edge_type(edge_type):
+            logging.debug('Edge type not found: {}_{}'.format(self._graph_name, edge_type))
+            raise TypeNotFoundException('Edge type not found: {}_{}'.format(self._graph_name, edge_type))
+        space = '{}_{}'.format(self._graph_name,edge_type)
+        uids = self.sysadmin.get_next_ids(len(edges))
+        pipeline = Pipeline(max_in_flight)
+        for uid, (src_vertex, src_type, tar_vertices, attributes) in zip(uids, edges):
+            attributes = dict(attributes) if attributes is not None else {}
+            attributes['source_uid'] = src_vertex
+            attributes['source_vertex_type'] = src_type
+            attributes['target'] = tar_vertices
+            pipeline.submit(self.hyperdex_client.async_put, space, uid, attributes)
+        errors = pipeline.wait().errors
+        #an edge whose put timed out might be stored, it is removed below like an unreachable one
+        failed = set(index for index, error in errors.iteritems() if not is_uncertain(error))
+        self._invalidate(edge_type, uids)
+        #the ids of edges which have not been stored are recycled
+        self.sysadmin.add_obsolete_ids([uids[index] for index in failed])
+        #group the index structure updates by vertex, only stored edges are added
+        updates = {}
+        for index, (uid, (src_vertex, src_type, tar_vertices, attributes)) in enumerate(zip(uids, edges)):
+            if index in errors:
+                continue
+            update = updates.setdefault((src_type, src_vertex), ({}, {}, []))
+            update[1][uid] = edge_type
+            update[2].append(index)
+            for tar in tar_vertices.keys():
+                update = updates.setdefault((tar_vertices[tar], tar), ({}, {}, []))
+                update[0][uid] = edge_type
+                update[2].append(index)
+        pipeline = Pipeline(max_in_flight)
+        #the vertices in the order of the pipeline's requests and their inline additions
+        vertices, inlined = [], []
+        for vertex_type, uid in updates.keys():
+            incoming, outgoing, indices = updates[(vertex_type, uid)]
+            attributes = {}
+            try:
+                for direction, added in ((INCOMING, incoming), (OUTGOING, outgoing)):
+                    if len(added) == 0:
+                        continue
+                    if len(added) > self.adjacency.threshold or self.adjacency.get_pages(vertex_type, uid, direction):
+                        self.adjacency.add_paged(vertex_type, uid, direction, added)
+                    else:
+                        attributes[direction] = added
+            except Exception, e:
+                vertices.append((vertex_type, uid))
+                inlined.append({})
+                pipeline.fail(e)
+                continue
+            if len(attributes) > 0:
+                vertices.append((vertex_type, uid))
+                inlined.append(attributes)
+                pipeline.submit(self.hyperdex_client.async_map_add, '{}_{}'.format(self._graph_name, vertex_type), uid, attributes)
+        result = pipeline.wait()
+        for position, (vertex_type, uid) in enumerate(vertices):
+            self._invalidate(vertex_type, [uid])
+            if position not in result.errors:
+                for direction, added in inlined[position].iteritems():
+                    self.adjacency.count_added(vertex_type, uid, direction, len(added))
+        for position, error in result.errors.iteritems():
+            logging.warn('Could not add edges to {}_{} {}: {}'.format(self._graph_name, vertices[position][0],
+                                                                       vertices[position][1], str(error)))
+            for index in updates[vertices[position]][2]:
+                errors.setdefault(index, error)
+        if len(errors) > len(failed):
+            #the edges are stored or might be, but they are not reachable from every vertex, they
+            #are removed from the other vertices and deleted, the ids of the found ones are recycled
+            unreachable = [(uids[index], edge_type) for index in errors if index not in failed]
+            try:
+                self.rm_edges(unreachable)
+            except Exception, e:
+                logging.error('Could not remove {} unreachable edges of {}: {}'.format(len(unreachable), space, str(e)))
+        if len(errors) > 0:
+            logging.warn('{} of {} edges were not added to {}'.format(len(errors), len(uids), space))
+        return BatchResult([None if index in errors else uid for index, uid in enumerate(uids)], errors)
+    
     def edge_add_target(self, tar_vertex, tar_type, edge_uid, edge_type):
         '''
         Adds a single target to an existing edge, so that it's pointing to multiple target vertices.
@@ -269,9 +777,10 @@ class HyperDexStore():
             edge_uid: The unique identifier of the edge (int). 
             edge_type: The type of the edge (str).
         '''
-        self.hyperdex_client.map_add('{}_{}'.format(self._graph_name,edge_type), edge_uid, {'target' : tar_vertex})
+        self.requests.execute('map_add', '{}_{}'.format(self._graph_name,edge_type), edge_uid, {'target' : tar_vertex})
         #update the incoming edge data structure of the target vertex
-        self.hyperdex_client.map_add('{}_{}'.format(self._graph_name,tar_type), tar_vertex, {'incoming_edges' : edge_uid })
+        [future.result() for future in self.adjacency.submit_add(tar_type, tar_vertex, INCOMING, {edge_uid : edge_type})]
+        self.adjacency.count_added(tar_type, tar_vertex, INCOMING, 1)
         
     
     def edge_rm_target(self, tar_vertex, tar_type, edge_uid, edge_type):
@@ -286,8 +795,13 @@ class HyperDexStore():
         '''
         #TODO check whether this is the last target vertex
         #if this is the case, remove edge
-        self.hyperdex_client.map_remove('{}_{}'.format(self._graph_name,edge_type), edge_uid, {'target' : tar_vertex})
-        self.hyperdex_client.map_remove('{}_{}'.format(self._graph_name,tar_type), tar_vertex, {'incoming_edges' : edge_uid})
+        self.requests.execute('map_remove', '{}_{}'.format(self._graph_name,edge_type), edge_uid, {'target' : tar_vertex})
+        inline, paged = self.adjacency.submit_remove(tar_type, tar_vertex, INCOMING, edge_uid)
+        inline.result()
+        if paged is not None:
+            unless_missing(paged)
+        #the edge has changed, a snapshot of its type is out of date
+        self._count_removals([(edge_uid, edge_type)])
         
     def rm_edge(self, src_vertex, src_type, edge_uid, edge_type):
         '''
@@ -299,14 +813,146 @@ class HyperDexStore():
             edge_uid: The unique identifier of the edge (int). 
             edge_type: The type of the edge (str).
         '''
-        #TODO enable edge removal using only id and type
-        self.hyperdex_client.map_remove('{}_{}'.format(self._graph_name,src_type), src_vertex, {'outgoing_edges' : edge_uid })
-        edge = self.get_edge_by_id(edge_uid, edge_type)
-        for tar in edge['target'].keys():
-            self.hyperdex_client.map_remove('{}_{}'.format(self._graph_name,edge['target'][tar]), tar, {'incoming_edges' : edge_uid})
-        #remove element
-        self.sysadmin.add_obsolete_id(edge_uid)
-        self.hyperdex_client.delete('{}_{}'.format(self._graph_name,edge_type), edge_uid)
+        #the source is known from the edge itself
+        self.rm_edges([(edge_uid, edge_type)])
+    
+    def rm_edges(self, edges):
+        '''
+        Removes several edges at once. The edges are read, removed from the 
+        incoming/outgoing edge data structure of their vertices and deleted with 
+        one wave of concurrent requests each.
+        
+        Args:
+            edges: The unique identifier and the type of each edge (list<tuple<int, str>>).
+        '''
+        self._ensure_database()
+        removed = self._unlink_edges(edges)
+        #remove elements, the ids must not be recycled before they are deleted
+        deletes = [self.requests.submit('delete', '{}_{}'.format(self._graph_name,edge_type), edge_uid)
+                   for edge_uid, edge_type in removed]
+        [future.result() for future in deletes]
+        self._count_removals(removed)
+        self.sysadmin.add_obsolete_ids([edge_uid for edge_uid, edge_type in removed])
+    
+    def rm_vertex_cascade(self, uid, vertex_type=None):
+        '''
+        Removes a vertex together with all its incoming and outgoing edges. The edges
+        are read at once and the removals from the edge data structures are grouped by
+        neighbor, the removed vertex itself is not updated at all. Then the edges, the
+        pages and the vertex are deleted at once and all ids are recycled in one batch.
+        
+        Args:
+            uid: The numeric identifier of a vertex object (int).
+            vertex_type: The type identifier of this vertex (str). 
+        
+        Return:
+            The number of removed edges (int).
+        '''
+        self._ensure_database()
+        vertex_type = vertex_type or GENERIC_VERTEX
+        edges = dict(self.adjacency.iter_edges(vertex_type, uid, INCOMING))
+        edges.update(self.adjacency.iter_edges(vertex_type, uid, OUTGOING))
+        removed = self._unlink_edges(edges.items(), (vertex_type, uid))
+        deletes = [self.requests.submit('delete', '{}_{}'.format(self._graph_name,edge_type), edge_uid)
+                   for edge_uid, edge_type in removed]
+        deletes.extend(self.adjacency.submit_drop(vertex_type, uid))
+        deletes.append(self.requests.submit('delete', '{}_{}'.format(self._graph_name, vertex_type), uid))
+        [future.result() for future in deletes]
+        self._count_removals(removed + [(uid, vertex_type)])
+        self.sysadmin.add_obsolete_ids([edge_uid for edge_uid, edge_type in removed] + [uid])
+        return len(removed)
+    
+    def _unlink_edges(self, edges, vertex=None):
+        '''
+        Removes edges from the incoming/outgoing edge data structures of their 
+        vertices. Only the endpoints of the edges are read and all removals from the
+        same vertex are issued together.
+        
+        Args:
+            edges: The unique identifier and the type of each edge (list<tuple<int, str>>).
+            vertex: The type and the id of a vertex which is not updated, because it is
+                    about to be deleted (tuple<str, int>).
+        
+        Return:
+            The edges which have been found (list<tuple<int, str>>).
+        '''
+        futures = [self._submit_read('{}_{}'.format(self._graph_name, edge_type), edge_uid, ENDPOINTS) 
+                   for edge_uid, edge_type in edges]
+        removed, found = [], []
+        for (edge_uid, edge_type), future in zip(edges, futures):
+            edge = unless_missing(future)
+            if edge is None:
+                logging.debug('Edge with type: {} id: {} was not found'.format(edge_type, str(edge_uid)))
+                continue
+            removed.append((edge_uid, edge_type))
+            found.append((edge_uid, edge))
+        self.adjacency.unlink(found, None if vertex is None else lambda neighbor: neighbor == vertex)
+        return removed
+    
+    def _submit_read(self, space, uid, attributes, requests=None):
+        requests = requests or self.requests
+        if hasattr(requests.hyperdex_client, 'get_partial'):
+            return requests.submit('get_partial', space, uid, list(attributes))
+        return requests.submit('get', space, uid)
+    
+    def get_graph_elements(self, elements, attributes=None):
+        '''
+        Returns several graph elements, which are requested at once.
+        
+        Args:
+            elements: The unique identifier and the type of each graph element (list<tuple<int, str>>).
+            attributes: The attributes to be read for each element type, all attributes
+                        of types which are not given (dict<str, list<str>>).
+        
+        Return:
+            Plain objects from HyperDex in the given order, None for missing ones. A
+            failed request, e.g. of an unknown type, does not fail the others (BatchResult).
+        '''
+        attributes = attributes or {}
+        futures = []
+        for uid, element_type in elements:
+            space = '{}_{}'.format(self._graph_name, element_type)
+            if element_type in attributes:
+                futures.append(self._submit_read(space, uid, attributes[element_type]))
+            else:
+                futures.append(self.requests.submit('get', space, uid))
+        results, errors = [], {}
+        for index, future in enumerate(futures):
+            error = future.exception()
+            if error is not None:
+                errors[index] = error
+            results.append(None if error is not None else future.result())
+        return BatchResult(results, errors)
+        
+    def get_adjacency(self, vertices, direction):
+        '''
+        Returns the incoming or outgoing edges of several vertices, which are requested
+        at once, including the pages of vertices with many edges.
+        
+        Args:
+            vertices: The unique identifier and the type of each vertex (list<tuple<int, str>>).
+            direction: Either 'incoming_edges' or 'outgoing_edges' (str).
+        
+        Return:
+            The ids of the edges mapped to their types for each vertex in the given
+            order, empty for missing vertices (list<dict<int, str>>).
+        '''
+        return self.adjacency.read_many([(vertex_type, uid) for uid, vertex_type in vertices], direction)
+        
+    def iter_edges(self, uid, vertex_type, direction):
+        '''
+        Iterates over the incoming or outgoing edges of a vertex, the edges of a 
+        vertex with many of them are read page by page.
+        
+        Args:
+            uid: The unique identifier of the vertex (int).
+            vertex_type: The type of the vertex (str).
+            direction: Either 'incoming_edges' or 'outgoing_edges' (str).
+        
+        Return:
+            The ids of the edges and their types (generator<tuple<int, str>>).
+        '''
+        return self.adjacency.iter_edges(vertex_type, uid, direction)
         
     def get_vertex(self, uid, vertex_type=None):
         '''
@@ -322,17 +968,17 @@ class HyperDexStore():
         result = None
         if vertex_type is None:
             #if this is vertex has no specified type
-            result = self.hyperdex_client.get(self._generic_vertex, uid)
+            result = self.requests.execute('get', self._generic_vertex, uid)
         else:
             if self.sysadmin.is_vertex_type(vertex_type):
-                result = self.hyperdex_client.get(self._graph_name + vertex_type, uid)
+                result = self.requests.execute('get', '{}_{}'.format(self._graph_name, vertex_type), uid)
             else:
-                logging.debug('Vertex type not found: ' + self._graph_name + vertex_type)
-                raise TypeNotFoundException('Vertex type not found: ' + self._graph_name + vertex_type)
+                logging.debug('Vertex type not found: {}_{}'.format(self._graph_name, vertex_type))
+                raise TypeNotFoundException('Vertex type not found: {}_{}'.format(self._graph_name, vertex_type))
         #if result is still none, the specified vertex does not exist
         if result is None:
             logging.debug('Vertex not found : ' + str(uid))
-            raise ElementNotFoundException('Vertex not found : ' + str(uid))
+            raise ElementNotFoundException(uid, vertex_type or GENERIC_VERTEX)
         return result 
     
     def get_edge_by_id(self, uid, edge_type):
@@ -351,7 +997,7 @@ class HyperDexStore():
             raise TypeError('Illigal argument exception - must not be None')
         else:
             if self.sysadmin.is_edge_type(edge_type):
-                result = self.hyperdex_client.get('{}_{}'.format(self._graph_name, edge_type), uid)
+                result = self.requests.execute('get', '{}_{}'.format(self._graph_name, edge_type), uid)
             else:
                 logging.debug('EdgeType not found: {}_{}'.format(self._graph_name, edge_type))
                 raise TypeNotFoundException('EdgeType not found: {}_{}'.format(self._graph_name, edge_type))
@@ -360,8 +1006,23 @@ class HyperDexStore():
     def search(self, element_type, query):
         #TODO improve search feature
         #TODO add commentary
+        self.advisor.record(element_type, query)
         return self.hyperdex_client.search('{}_{}'.format(self._graph_name,element_type), query)
     
+    def suggest_subspaces(self, element_type, max_subspaces):
+        '''
+        Suggests subspaces for the given element type, based on the searches 
+        performed in this process.
+        
+        Args:
+            element_type: The identifier of the element type (str).
+            max_subspaces: The maximal number of suggested subspaces (int).
+        
+        Return:
+            The suggested subspaces, most searched first (list<tuple<str>>).
+        '''
+        return self.advisor.suggest(element_type, self.get_type_schema(element_type), max_subspaces)
+    
     def get_edge_by_source(self, source_vertex, edge_type):
         '''
         Returns an list of edge objects, based on the source vertex id.
@@ -374,9 +1035,24 @@ class HyperDexStore():
         Return:
             List of plain dictionaries, representing the requested edge objects (list<dict>).
         '''
-        return self.hyperdex_client.search(self._graph_name + edge_type, {'source' : source_vertex})
+        return self.hyperdex_client.search('{}_{}'.format(self._graph_name, edge_type), {'source_uid' : source_vertex})
 
     
+    def get_type_schema(self, element_type):
+        '''
+        Returns the compiled schema of the given element type.
+        
+        Args:
+            element_type: The identifier of the element type (str).
+        
+        Return:
+            The schema of this element type (TypeSchema).
+        '''
+        schema = self.typeadmin.get_type_schema(element_type, self.sysadmin.get_type_version())
+        if schema is None:
+            raise TypeNotFoundException('{}_{}'.format(self._graph_name, element_type))
+        return schema
+    
     def vertex_type_exists(self, vertex_type):
         '''
         Checks whether a vertex type exists or not.
@@ -400,19 +1076,50 @@ class HyperDexStore():
             True if the edge type exists, otherwise False.
         '''
         return self.sysadmin.is_edge_type(edge_type)
+    
+    def get_vertex_types(self):
+        '''
+        Returns the identifiers of all vertex types of this graph.
         
-    def count_elements(self, element_type):
+        Return:
+            The vertex type identifiers (frozenset<str>).
+        '''
+        return self.sysadmin.get_vertex_types()
+    
+    def get_edge_types(self):
+        '''
+        Returns the identifiers of all edge types of this graph.
+        
+        Return:
+            The edge type identifiers (frozenset<str>).
+        '''
+        return self.sysadmin.get_edge_types()
+        
+    def count_elements(self, element_type, query=None):
         '''
         Returns the number of graph elements associated with the given
         element type.
         
         Args:
             element_type: The identifier of the graph element (str).
+            query: Only count the elements matching these predicates (dict).
             
         Return:
             Count of graph elements (int).
         '''
-        return self.hyperdex_client.count('{}_{}'.format(self._graph_name,element_type), {})
+        return self.hyperdex_client.count('{}_{}'.format(self._graph_name,element_type), query or {})
+    
+    def get_removals(self, element_types):
+        '''
+        Returns the number of graph elements ever removed from each of the given types.
+        
+        Args:
+            element_types: The identifiers of the element types (list<str>).
+        
+        Return:
+            The removal counter of each type (dict<str, int>).
+        '''
+        return self.sysadmin.get_removals(element_types)
 
     def get_all_elements(self, element_type):
         return self.hyperdex_client.search('{}_{}'.format(self._graph_name,element_type), {})
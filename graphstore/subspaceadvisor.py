@@ -0,0 +1,75 @@
+"""
+.. module:: subspaceadvisor.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from graphstore.typeadmin import INDEXABLE
+import threading
+
+
+class SubspaceAdvisor(object):
+    '''
+    The SubspaceAdvisor records the predicates of the searches on every element type
+    and suggests subspaces for the most frequently searched attributes. A search on
+    an attribute without its own subspace has to contact every server of the
+    hyperspace, with a subspace only the servers holding the searched values are
+    contacted.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._predicates = {}
+        self._searches = {}
+
+    def record(self, element_type, query):
+        '''
+        Records the predicates of a search.
+
+        Args:
+            element_type: The identifier of the searched element type (str).
+            query: The search predicates, attribute names mapped to values (dict).
+        '''
+        with self._lock:
+            self._searches[element_type] = self._searches.get(element_type, 0) + 1
+            counts = self._predicates.setdefault(element_type, {})
+            for attr in query:
+                counts[attr] = counts.get(attr, 0) + 1
+
+    def get_frequencies(self, element_type):
+        '''
+        Returns how often each attribute of the given type has been searched.
+
+        Args:
+            element_type: The identifier of the element type (str).
+
+        Return:
+            Attribute names mapped to the number of searches (dict).
+        '''
+        with self._lock:
+            return dict(self._predicates.get(element_type, {}))
+
+    def suggest(self, element_type, schema, max_subspaces):
+        '''
+        Suggests subspaces for the given element type. Every suggested subspace holds
+        a single attribute, since HyperDex can only use a subspace if all of its
+        attributes are part of the search. Attributes which cannot be hashed, e.g.
+        maps and sets, are never suggested.
+
+        Args:
+            element_type: The identifier of the element type (str).
+            schema: The schema of this element type (TypeSchema).
+            max_subspaces: The maximal number of suggested subspaces (int).
+
+        Return:
+            The suggested subspaces, most searched first (list<tuple<str>>).
+        '''
+        definition = schema.get_definition()
+        candidates = [(count, attr) for attr, count in self.get_frequencies(element_type).iteritems()
+                      if definition.get(attr) in INDEXABLE]
+        #the most searched first, ties are broken by name to keep the result stable
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return [(attr,) for count, attr in candidates[:max_subspaces]]
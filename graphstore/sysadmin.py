@@ -8,8 +8,11 @@
 
 """
 from hyperdex.client import HyperClientException
+from graphstore.idallocator import IdAllocator, DEFAULT_BLOCK_SIZE
+from graphstore.idpool import ObsoleteIdPool
+from graphstore.typecatalog import TypeCatalog
+from graphstore import readiness
 import logging
-import os
 
 
 ID = 'id'
@@ -24,7 +27,7 @@ class SysAdmin():
     '''
 
 
-    def __init__(self, address, port, graph_name,  hyperdex_client, hyperdex_admin):
+    def __init__(self, address, port, graph_name,  hyperdex_client, hyperdex_admin, id_block_size=DEFAULT_BLOCK_SIZE):
         '''
         The SysAdmin constructor initializes the HyperDex coordinator process it's 
         working on.
@@ -38,6 +41,7 @@ class SysAdmin():
             graph_name: The identifier of the graph to be opened for this SysAdmin (str). 
             hyperdex_client: A hyperdex.client.Client instance (Client).
             hyperdex_admin: A hyperdex.admin.Admin (Admin).
+            id_block_size: The number of ids leased at once from the id counter (int).
         '''
         self.hyperdex_client = hyperdex_client
         self._address = address
@@ -48,6 +52,14 @@ class SysAdmin():
         self._next_id = graph_name + '_next_id'
         self._id_sys = graph_name + '_id_sys'
         self._obsolete_id = graph_name + '_obsolete_id'
+        #the version stamp and the removal counters share the id space with the id counters,
+        #which are keyed by graph name, a dot cannot be part of a graph name
+        self._type_version = graph_name + '.type_version'
+        self._removals = graph_name + '.removals.'
+        self._catalog = TypeCatalog(hyperdex_client, self._system, ID, self._type_version,
+                                    [VERTEX_TYPES, EDGE_TYPES])
+        self._id_allocator = IdAllocator(hyperdex_client, ID, graph_name, id_block_size)
+        self._id_pool = ObsoleteIdPool(hyperdex_client, self._id_sys, self._obsolete_id)
         
     def validate_database(self):
         '''
@@ -66,6 +78,8 @@ class SysAdmin():
                 '''
                 logging.info('Creating initial space ' + self._system)
                 self.hyperdex_admin.add_space(space)
+                readiness.wait_for_space(self.hyperdex_client, self._system, VERTEX_TYPES,
+                                         hyperdex_admin=self.hyperdex_admin)
             #logging.error(e)
         try:
             self.hyperdex_client.get(self._id_sys, self._obsolete_id )
@@ -79,13 +93,10 @@ class SysAdmin():
                 '''
                 logging.info('Creating initial space ' + self._id_sys)
                 self.hyperdex_admin.add_space(space)
-                try:
-                    self.hyperdex_client.put_if_not_exist(self._id_sys, self._obsolete_id , {'value' : set([])})
-                except Exception, e:
-                    logging.warn('need a further attempt ' + self._obsolete_id )
-                    # HyperDex seems to need a particular time to be ready to insert new data
-                    os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-                    self.hyperdex_client.put_if_not_exist(self._id_sys, self._obsolete_id , {'value' : set([])})
+                # HyperDex needs a particular time to be ready to insert new data
+                readiness.wait_for_space(self.hyperdex_client, self._id_sys, self._obsolete_id,
+                                         hyperdex_admin=self.hyperdex_admin)
+                readiness.retry(self.hyperdex_client.put_if_not_exist, self._id_sys, self._obsolete_id , {'value' : set([])})
             #logging.error(e)
         try:
             self.hyperdex_client.get(ID, self._next_id)
@@ -99,6 +110,8 @@ class SysAdmin():
                 '''
                 logging.info('Creating initial next id space')
                 self.hyperdex_admin.add_space(space)
+                readiness.wait_for_space(self.hyperdex_client, ID, self.graph_id,
+                                         hyperdex_admin=self.hyperdex_admin)
             #logging.error(e)
             
     
@@ -109,7 +122,7 @@ class SysAdmin():
         Args:
             vertex_type: The vertex type identifier (str).
         '''
-        self.__add_element_type(VERTEX_TYPES, vertex_type)
+        self.add_element_types([vertex_type], [])
     
     def add_edge_type(self, edge_type):
         '''
@@ -118,35 +131,44 @@ class SysAdmin():
         Args:
             edge_type: The edge type identifier (str).
         '''
-        self.__add_element_type(EDGE_TYPES, edge_type)
+        self.add_element_types([], [edge_type])
     
-    def __add_element_type(self, element_types, type_name):
+    def add_element_types(self, vertex_types, edge_types):
         '''
-        Inserts an element as 'now available' in the SysAdmin
+        Inserts several vertex and edge types as 'now available' in the SysAdmin,
+        using one write for each kind of types.
         
         Args:
-            edge_type: The element type identifier (str).
+            vertex_types: The vertex type identifiers (list<str>).
+            edge_types: The edge type identifiers (list<str>).
+        '''
+        if len(vertex_types) > 0:
+            self.__add_element_types(VERTEX_TYPES, vertex_types)
+        if len(edge_types) > 0:
+            self.__add_element_types(EDGE_TYPES, edge_types)
+        self._bump_type_version()
+    
+    def __add_element_types(self, element_types, type_names):
+        '''
+        Inserts elements as 'now available' in the SysAdmin
+        
+        Args:
+            element_types: The kind of the element types (str).
+            type_names: The element type identifiers (list<str>).
         '''
         try:
-            #push the new element to the data structure
-            self.hyperdex_client.set_add(self._system, element_types, {'value' : type_name})
+            #push the new elements to the data structure
+            self.hyperdex_client.set_union(self._system, element_types, {'value' : set(type_names)})
         except Exception, e:
             #if the data structure is not yet ready, the following code tries to 
             #insert it
             logging.info('Created first ' + element_types)
-            #Debris
-            for i in xrange(5):#5 attempts to insert the data
-                try:
-                    self.hyperdex_client.put(self._system, element_types, {'value' : set([])})
-                    break
-                except Exception, e:
-                    logging.warn('need a further attempt ' + element_types)
-                    # HyperDex seems to need a particular time to create the new space
-                    os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-                    if i == 4:
-                        raise e
-            #TODO refactor this code
-            self.hyperdex_client.set_add(self._system, element_types, {'value' : type_name})
+            # HyperDex seems to need a particular time to create the new space
+            readiness.wait_for_space(self.hyperdex_client, self._system, element_types,
+                                     hyperdex_admin=self.hyperdex_admin)
+            readiness.retry(self.hyperdex_client.put_if_not_exist, self._system, element_types,
+                            {'value' : set([])}, attempts=5)
+            self.hyperdex_client.set_union(self._system, element_types, {'value' : set(type_names)})
     
     def rm_vertex_type(self, vertex_type):
         '''
@@ -169,38 +191,129 @@ class SysAdmin():
     
     def __rm_element_type(self, element_type, element_name):
         self.hyperdex_client.set_remove(self._system, element_type, { 'value' : element_name})
+        self._bump_type_version()
+
+    def touch_element_type(self, element_name):
+        '''
+        Announces that the definition of an existing element type has changed, so that
+        all workers reload it.
+
+        Args:
+            element_name: The element type identifier (str).
+        '''
+        logging.info('Element type {} of {} has changed'.format(element_name, self.graph_id))
+        self._bump_type_version()
+
+    def _bump_type_version(self):
+        '''
+        Increments the version stamp of the type catalog, so that all workers
+        reload their catalog.
+        '''
+        self._increment(self._type_version, 1)
+        self._catalog.invalidate()
+
+    def _increment(self, key, value):
+        try:
+            self.hyperdex_client.atomic_add(ID, key, {'value' : value})
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_NOTFOUND':
+                raise
+            #this is the very first increment of this counter
+            if not self.hyperdex_client.put_if_not_exist(ID, key, {'value' : value}):
+                self.hyperdex_client.atomic_add(ID, key, {'value' : value})
+    
+    def get_type_version(self):
+        '''
+        Returns the version stamp of the types, which is checked at most every
+        MAX_AGE seconds of the type catalog. It changes whenever a type is added, 
+        removed or changed.
+        
+        Returns:
+            The version stamp (int).
+        '''
+        return self._catalog.get_version()
     
     def get_next_id(self):
         '''
         Returns a new id, which can be assigned to a newly created graph element.
-        This is synchronized by the database in case multiple workers a running.
+        This is synchronized by the database in case multiple workers a running, 
+        ids are leased block-wise and handed out from memory. Obsolete ids are 
+        recycled first.
         
         Returns:
             A unique and free id which can be assigned to a newly created graph
             element.
         
         '''
-        #try whether there is already a next id
-        uid = self.hyperdex_client.get(ID, self.graph_id)
-        if uid is None:#this case occurs when no graph element ever has been created
-            if self.hyperdex_client.put_if_not_exist(ID, self.graph_id, { 'value' : -100000} ):
-                return -100001#the first id ever returned
-            else:
-                return self.get_next_id()
-        else:
-            r_id = uid['value']
-            new_id = r_id + 1
-            #unfortunately atomic_add does not yet return the new value, therefore 
-            #this is to prevent race condition 
-            while(not self.hyperdex_client.cond_put(ID, self.graph_id, {'value' : r_id} ,{ 'value' : new_id})):
-                r_id = self.hyperdex_client.get(ID, self.graph_id)['value']
-                new_id = r_id + 1
-            return r_id
+        uid = self._id_pool.take()
+        if uid is not None:
+            return uid
+        return self._id_allocator.next_id()
+    
+    def get_next_ids(self, count):
+        '''
+        Returns several new ids at once, e.g. for a batch of new graph elements.
+        Obsolete ids are recycled first, the remaining ids are leased in bulk.
+        
+        Args:
+            count: The number of requested ids (int).
+        
+        Returns:
+            Unique and free ids (list<int>).
+        '''
+        uids = []
+        while len(uids) < count:
+            uid = self._id_pool.take()
+            if uid is None:
+                break
+            uids.append(uid)
+        uids.extend(self._id_allocator.next_ids(count - len(uids)))
+        return uids
+    
+    def get_id_limit(self):
+        '''
+        Returns the first id which has never been handed out, all graph elements
+        have lower ids.
+        
+        Returns:
+            The first id which has never been handed out (int).
+        '''
+        return self._id_allocator.get_limit()
+
+    def count_removals(self, removals):
+        '''
+        Adds the numbers of removed graph elements to the removal counters of their
+        types. The counters only ever grow, hence a type which has lost elements is
+        told apart even if as many elements have been inserted meanwhile.
+
+        Args:
+            removals: The number of removed graph elements per type (dict<str, int>).
+        '''
+        for element_type, count in removals.iteritems():
+            if count > 0:
+                self._increment(self._removals + element_type, count)
+
+    def get_removals(self, element_types):
+        '''
+        Returns the removal counters of the given types.
+
+        Args:
+            element_types: The element type identifiers (list<str>).
+
+        Returns:
+            The number of graph elements ever removed per type (dict<str, int>).
+        '''
+        removals = {}
+        for element_type in element_types:
+            counter = self.hyperdex_client.get(ID, self._removals + element_type)
+            removals[element_type] = counter['value'] if counter is not None else 0
+        return removals
                 
     
     def is_vertex_type(self, vertex_type):
         '''
         Returns bool, whether the given vertex type identifier is known to the SysAdmin.
+        This is answered by the process-local type catalog.
         
         Args:
             vertex_type: A vertex type identifier (str).
@@ -208,15 +321,12 @@ class SysAdmin():
         Returns:
             True if the vertex types exists, otherwise False.
         '''
-        types = self.hyperdex_client.get(self._system, VERTEX_TYPES)
-        if types is None:
-            return False
-        else:
-            return vertex_type in types['value']
+        return self._catalog.contains(VERTEX_TYPES, vertex_type)
 
     def is_edge_type(self, edge_type):
         '''
         Returns bool, whether the given edge type identifier is known to the SysAdmin.
+        This is answered by the process-local type catalog.
         
         Args:
             vertex_type: A edge type identifier (str).
@@ -224,36 +334,52 @@ class SysAdmin():
         Returns:
             True if the edge types exists, otherwise False.
         '''
-        types = self.hyperdex_client.get(self._system, EDGE_TYPES)
-        if types is None:
-            return False
-        else:
-            return edge_type in types['value']
+        return self._catalog.contains(EDGE_TYPES, edge_type)
+
+    def get_vertex_types(self):
+        '''
+        Returns all vertex type identifiers known to the SysAdmin.
+        
+        Returns:
+            The vertex type identifiers (frozenset<str>).
+        '''
+        return self._catalog.get_types(VERTEX_TYPES)
+
+    def get_edge_types(self):
+        '''
+        Returns all edge type identifiers known to the SysAdmin.
+        
+        Returns:
+            The edge type identifiers (frozenset<str>).
+        '''
+        return self._catalog.get_types(EDGE_TYPES)
         
         
     def add_obsolete_id(self, uid):
-        #TODO refactor the following code
         '''
         Adds the given id to the pool of obsolete ids, which could be recycled.
+        The id must not be in use anymore, i.e. the graph element has been deleted.
         
         Args:
             uid: The id of the deleted graph element (int).
         '''
-        try:
-            #try to push the first obsolete id
-            self.hyperdex_client.set_add(self._id_sys, self._obsolete_id , {'value' : uid})
-            return
-        except Exception:
-            logging.info('created first ' + self._obsolete_id )
-            try:
-                if self.hyperdex_client.put_if_not_exist(self._id_sys, self._obsolete_id , {'value' : set([uid])}):
-                    return
-            except Exception:
-                # HyperDex seems to need a particular time to create the new space
-                os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-                if self.hyperdex_client.put_if_not_exist(self._id_sys, self._obsolete_id , {'value' : set([uid])}):
-                    return
-        logging.error('could not add to obsolte id: ' + uid)
+        self._id_pool.add(uid)
+    
+    def add_obsolete_ids(self, uids):
+        '''
+        Adds the given ids to the pool of obsolete ids at once.
+        
+        Args:
+            uids: The ids of the deleted graph elements (list<int>).
+        '''
+        self._id_pool.add_many(uids)
+    
+    def flush_obsolete_ids(self):
+        '''
+        Writes the buffered obsolete ids to the database, so that other workers
+        can recycle them.
+        '''
+        self._id_pool.flush()
 
     '''            
     def register_element_id(self, element_type, uid):
@@ -267,7 +393,8 @@ class SysAdmin():
                     self.hyperdex_client.put(self._id_sys, element_type, {'value' : set([uid])})
                 except Exception:
                     # HyperDex seems to need a particular time to create the new space
-                    os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
+                    readiness.wait_for_space(self.hyperdex_client, self._id_sys, element_type,
+                                             hyperdex_admin=self.hyperdex_admin)
                     self.hyperdex_client.put(self._id_sys, element_type, {'value' : set([uid])})
     
     def optout_element_id(self, element_type, uid):
@@ -9,11 +9,14 @@
 """
 from hyperdex.client import HyperClientException
 from hyperdex.admin import HyperDexAdminException
-import os
+from graphstore.schemacache import SCHEMAS, TypeSchema
+from graphstore import readiness
 import logging
-import traceback
 
 
+#data types HyperDex can hash into a subspace
+INDEXABLE = frozenset(['string', 'int', 'float'])
+
 class TypeAdmin():
     '''
     The TypeAdmin is responsible for the management of the graph element
@@ -22,7 +25,7 @@ class TypeAdmin():
     '''
 
 
-    def __init__(self, address, port, graph_name, hyperdex_client, hyperdex_admin):
+    def __init__(self, address, port, graph_name, hyperdex_client, hyperdex_admin, codec=None):
         '''
         Constructor.
         '''
@@ -32,6 +35,7 @@ class TypeAdmin():
         self.hyperdex_client = hyperdex_client
         self._graph_name = graph_name
         self._type_description = graph_name + '_space_description'
+        self._codec = codec
     
     def validate_database(self):
         try:
@@ -46,11 +50,13 @@ class TypeAdmin():
                 '''
                 logging.info('Creating initial space_description')
                 self.hyperdex_admin.add_space(space)
+                readiness.wait_for_space(self.hyperdex_client, self._type_description, '',
+                                         hyperdex_admin=self.hyperdex_admin)
                 return 
             logging.error(str(e))
     
         
-    def create_element_type(self, element_name, attributes):
+    def create_element_type(self, element_name, attributes, subspaces=None):
         '''
         Creates a new element type, which means the creation of a new hyperspace
         in HyperDex. Each graph element type relates to its own hyperspace, in which all
@@ -59,32 +65,70 @@ class TypeAdmin():
         Args:
             element_name: The  identifier of the requested element type (str).
             attributes: The type's definition attributes (list<tuples<str, str>>)
+            subspaces: Attributes to be indexed in their own subspace, searches on
+                       these attributes contact only the relevant servers (list<tuple<str>>).
         '''
-        #currently all attributes are assigned to the same subspace - which is 
-        #highly inefficient
-        #TODO find a appropriate solution to partition subspaces for newly created types
-        os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-        attr = self._dictify_attributes(attributes) #convert the attribute definition to a dictionary
-        space = 'space ' + '{}_{}'.format(self._graph_name,element_name) + '\nkey int graph_uid\nattributes\n' \
-            + self._stringify_attributes(attributes) + ',\n string value'#convert the dictionary to a space declaration 
-        #create a new hyperspace for the requested graph element type
+        self.create_element_types([(element_name, attributes, subspaces)])
+    
+    def create_element_types(self, element_types):
+        '''
+        Creates several element types at once. All hyperspaces are added first, then
+        the cluster is waited for only once and the type descriptions are written
+        in a batch. If a hyperspace cannot be added, e.g. since the type exists
+        already, the hyperspaces added before are removed again.
+        
+        Args:
+            element_types: The identifiers, definition attributes and subspaces of the requested 
+                           element types (list<tuple<str, list<tuple<str, str>>, list<tuple<str>>>>).
+        '''
+        #unless subspaces are requested, all attributes are assigned to the key subspace 
+        #and searches on them have to contact all servers
+        added = []
         try:
-            self.hyperdex_admin.add_space(space)
-        except HyperDexAdminException, e:
-            os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-            self.hyperdex_admin.add_space(space)
-            traceback.print_exc()
-            
-        #TODO refactor this debris
-        for i in xrange(5):
+            for element_name, attributes, subspaces in element_types:
+                #create a new hyperspace for the requested graph element type
+                readiness.retry(self.hyperdex_admin.add_space, self._space_declaration(element_name, attributes, subspaces), attempts=2)
+                added.append(element_name)
+                SCHEMAS.invalidate(self._graph_name, element_name)
+        except Exception:
+            #the hyperspaces created so far are removed, so that the batch can be retried as a whole
+            for element_name in added:
+                try:
+                    self.hyperdex_admin.rm_space('{}_{}'.format(self._graph_name, element_name))
+                except Exception, e:
+                    logging.error('Could not remove the space of {}_{}: {}'.format(self._graph_name, element_name, str(e)))
+            raise
+        #the new spaces need a particular time to be ready
+        for element_name, attributes, subspaces in element_types:
+            readiness.wait_for_space(self.hyperdex_client, '{}_{}'.format(self._graph_name,element_name), 0,
+                                     hyperdex_admin=self.hyperdex_admin)
+        pending = []
+        for element_name, attributes, subspaces in element_types:
+            attr = self._dictify_attributes(attributes) #convert the attribute definition to a dictionary
+            pending.append((element_name, attr, self.hyperdex_client.async_put(self._type_description, element_name, {'attr' : attr})))
+        for element_name, attr, deferred in pending:
             try:
-                self.hyperdex_client.put(self._type_description, element_name, {'attr' : attr})
-                break
+                deferred.wait()
             except Exception, e:
                 logging.warn('Need a further attempt ' + self._type_description)
-                os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
-                if i == 4:
-                        raise e
+                readiness.retry(self.hyperdex_client.put, self._type_description, element_name, {'attr' : attr}, attempts=5)
+    
+    def _space_declaration(self, element_name, attributes, subspaces=None):
+        '''
+        Returns the hyperspace declaration of the given element type.
+        
+        Args:
+            element_name: The identifier of the element type (str).
+            attributes: The type's definition attributes (list<tuples<str, str>>)
+            subspaces: Attributes to be indexed in their own subspace (list<tuple<str>>).
+        
+        Return:
+            The space declaration, readable for HyperDex (str).
+        '''
+        #convert the dictionary to a space declaration 
+        space = 'space ' + '{}_{}'.format(self._graph_name,element_name) + '\nkey int graph_uid\nattributes\n' \
+            + self._stringify_attributes(attributes) + ',\n string value'
+        return space + self._stringify_subspaces(attributes, subspaces)
     
     def remove_element_type(self, element_name):
         '''
@@ -94,9 +138,12 @@ class TypeAdmin():
         Args:
             element_name: The identifier of this element type (str).
         '''
-        self.hyperdex_admin.rm_space('{}_{}'.format(self._graph_name,element_name))
+        space_name = '{}_{}'.format(self._graph_name,element_name)
+        self.hyperdex_admin.rm_space(space_name)
         self.hyperdex_client.delete(self._type_description, element_name)
-        os.system('hyperdex wait-until-stable -h {} -p {}'.format(self._address, self._port))
+        SCHEMAS.invalidate(self._graph_name, element_name)
+        readiness.wait_for_space(self.hyperdex_client, space_name, 0, present=False,
+                                 hyperdex_admin=self.hyperdex_admin)
     
     def get_type_description(self, space_name):
         '''
@@ -118,6 +165,27 @@ class TypeAdmin():
                 result.append((value, key))
             return result
         return None
+    
+    def get_type_schema(self, element_name, version=None):
+        '''
+        Returns the compiled schema of the given element type. Schemas are cached
+        per process and loaded from HyperDex only once.
+        
+        Args:
+            element_name: The identifier of the element type (str).
+            version: The version stamp of the type catalog, None if unknown (int).
+        
+        Return:
+            The schema of this element type or None if it does not exist (TypeSchema).
+        '''
+        schema = SCHEMAS.get(self._graph_name, element_name, version)
+        if schema is None:
+            description = self.get_type_description(element_name)
+            if description is None:
+                return None
+            schema = TypeSchema(element_name, description, self._codec)
+            SCHEMAS.put(self._graph_name, element_name, schema, version)
+        return schema.with_codec(self._codec)
             
     def _stringify_attributes(self, attributes):
         '''
@@ -134,6 +202,29 @@ class TypeAdmin():
             result = '{} {} {},\n'.format(result, attr[0], attr[1])
         return result[:-2]
     
+    def _stringify_subspaces(self, attributes, subspaces):
+        '''
+        Formats the requested subspaces as string, readable for HyperDex. Only declared
+        attributes of a primitive data type can be indexed.
+        
+        Args:
+            attributes: The type's definition attributes (list<tuples<str, str>>)
+            subspaces: Attributes to be indexed in their own subspace (list<tuple<str>>).
+        
+        Return:
+            The subspace declarations (str).
+        '''
+        result = ''
+        declared = self._dictify_attributes(attributes)
+        for subspace in subspaces or []:
+            if isinstance(subspace, str):
+                subspace = (subspace,)
+            for attr in subspace:
+                if declared.get(attr) not in INDEXABLE:
+                    raise TypeError('Illegal argument exception - {} cannot be indexed in a subspace'.format(attr))
+            result = '{}\nsubspace {}'.format(result, ', '.join(subspace))
+        return result
+    
     def _dictify_attributes(self, attributes):
         '''
         Converts a list of user defined attributes of the element type definition
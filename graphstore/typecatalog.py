@@ -0,0 +1,131 @@
+"""
+.. module:: typecatalog.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from hyperdex.client import HyperClientException
+import logging
+import threading
+import time
+
+
+#seconds a loaded catalog is trusted without checking the version stamp
+MAX_AGE = 1.0
+
+
+class TypeCatalog(object):
+    '''
+    The TypeCatalog is a process-local copy of the vertex and edge types known to
+    the SysAdmin. It is loaded once and only reloaded when the version stamp, which
+    is bumped whenever a type is added or removed, has changed. Known types are
+    answered from memory, the stamp is checked at most every MAX_AGE seconds or when
+    a type is not found, since it might have been created by another worker.
+    '''
+
+    def __init__(self, hyperdex_client, system_space, version_space, version_key, kinds, max_age=MAX_AGE):
+        '''
+        Constructor.
+
+        Args:
+            hyperdex_client: A hyperdex.client.Client instance (Client).
+            system_space: The space holding the sets of type names (str).
+            version_space: The space holding the version stamp (str).
+            version_key: The key of the version stamp (str).
+            kinds: The keys of the type name sets, e.g. vertex and edge types (list<str>).
+            max_age: Seconds the catalog is trusted without a version check (float).
+        '''
+        self.hyperdex_client = hyperdex_client
+        self._system = system_space
+        self._version_space = version_space
+        self._version_key = version_key
+        self._kinds = kinds
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._types = dict((kind, frozenset()) for kind in kinds)
+        self._version = None
+        self._checked = None
+
+    def contains(self, kind, type_name):
+        '''
+        Returns bool, whether the given type is known.
+
+        Args:
+            kind: The key of the type name set (str).
+            type_name: The type identifier (str).
+
+        Returns:
+            True if the type exists, otherwise False.
+        '''
+        with self._lock:
+            validated = False
+            if self._checked is None or time.time() - self._checked > self._max_age:
+                self._validate()
+                validated = True
+            if type_name in self._types[kind]:
+                return True
+            if not validated:
+                #the type might have been created by another worker
+                self._validate()
+            return type_name in self._types[kind]
+
+    def get_types(self, kind):
+        '''
+        Returns all types of the given kind.
+
+        Args:
+            kind: The key of the type name set (str).
+
+        Returns:
+            The type identifiers (frozenset<str>).
+        '''
+        with self._lock:
+            self._validate()
+            return self._types[kind]
+
+    def get_version(self):
+        '''
+        Returns the version stamp of the catalog, which is checked at most every
+        MAX_AGE seconds like the types themselves.
+
+        Returns:
+            The version stamp (int).
+        '''
+        with self._lock:
+            if self._version is None or time.time() - self._checked > self._max_age:
+                self._validate()
+            return self._version
+
+    def invalidate(self):
+        '''
+        Forces a reload with the next lookup.
+        '''
+        with self._lock:
+            self._version = None
+            self._checked = None
+
+    def _get(self, space, key):
+        try:
+            return self.hyperdex_client.get(space, key)
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+                raise
+            #the graph has been opened lazily and nothing has been written yet
+            return None
+
+    def _validate(self):
+        stamp = self._get(self._version_space, self._version_key)
+        version = 0 if stamp is None else stamp['value']
+        if version != self._version:
+            #the stamp is read first, a concurrent change leads to another reload
+            types = {}
+            for kind in self._kinds:
+                result = self._get(self._system, kind)
+                types[kind] = frozenset() if result is None else frozenset(result['value'])
+            self._types = types
+            self._version = version
+            logging.debug('Loaded type catalog {} version {}'.format(self._system, version))
+        self._checked = time.time()
@@ -0,0 +1,140 @@
+"""
+.. module:: typescan.py
+   :platform: Linux
+   :synopsis: The HyperDexGraph API
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+from hyperdex.client import Client, HyperClientException, Range
+from graphstore.pipeline import RequestQueue
+import logging
+import threading
+import time
+
+
+#the number of threads scanning a space, each with its own client
+PARALLELISM = 4
+#the number of graph elements handled at once
+CHUNK_SIZE = 1024
+
+
+class ParallelScan(object):
+    '''
+    The ParallelScan reads all the graph elements of a space, e.g. before the space
+    is dropped. The range of ids is split into parts which are searched in parallel,
+    each by a thread with its own client. The found elements are handed to a handler
+    in chunks, so that the requests it issues for a chunk are sent at once.
+    '''
+
+    def __init__(self, address, port, space, lower, upper, parallelism=PARALLELISM,
+                 chunk_size=CHUNK_SIZE, progress=None, key='graph_uid', cache=None):
+        '''
+        Constructor.
+
+        Args:
+            address: The IP address of HyperDex's coordinator process (str).
+            port: The port number of HyperDex's coordinator process (int).
+            space: The scanned hyperspace (str).
+            lower: The lowest id which might be in use (int).
+            upper: The highest id which might be in use (int).
+            parallelism: The number of threads scanning the space (int).
+            chunk_size: The number of graph elements handed to the handler at once (int).
+            progress: Called with the number of handled elements and the elapsed seconds
+                      after each chunk, from the scanning threads (callable).
+            key: The key attribute of the space (str).
+            cache: The cache invalidated by the requests of the handler (ElementCache).
+        '''
+        self._address = address
+        self._port = port
+        self.space = space
+        self.ranges = partition(lower, upper, parallelism)
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.key = key
+        self.cache = cache
+        self.done = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, handler):
+        '''
+        Scans the space. The handler is called from the scanning threads with a chunk
+        of graph elements and the request queue of the calling thread, it returns a
+        list, e.g. of ids, whose items are collected.
+
+        Args:
+            handler: Handles a chunk of graph elements (callable<list<dict>, RequestQueue>).
+
+        Return:
+            The items returned by the handler (list).
+        '''
+        self._start = time.time()
+        results, errors = [], []
+        threads = [threading.Thread(target=self._scan, args=(lower, upper, handler, results, errors))
+                   for lower, upper in self.ranges]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.time() - self._start
+        if len(errors) > 0:
+            raise errors[0]
+        logging.info('Scanned {} elements of {} in {:.2f}s ({:.0f} elements/s)'
+                     .format(self.done, self.space, self.elapsed, self.throughput()))
+        return results
+
+    def throughput(self):
+        '''
+        Return:
+            The number of handled elements per second (float).
+        '''
+        if self.elapsed <= 0:
+            return 0.0
+        return self.done / self.elapsed
+
+    def _scan(self, lower, upper, handler, results, errors):
+        try:
+            hyperdex_client = Client(self._address, self._port)
+            requests = RequestQueue(hyperdex_client, cache=self.cache)
+            chunk = []
+            for element in hyperdex_client.search(self.space, {self.key : Range(lower, upper)}):
+                chunk.append(element)
+                if len(chunk) >= self.chunk_size:
+                    self._handle(chunk, handler, requests, results)
+                    chunk = []
+            if len(chunk) > 0:
+                self._handle(chunk, handler, requests, results)
+        except HyperClientException, e:
+            if e.symbol() != 'HYPERDEX_CLIENT_UNKNOWNSPACE':
+                errors.append(e)
+        except Exception, e:
+            logging.error('Scanning {} [{}, {}] failed: {}'.format(self.space, lower, upper, str(e)))
+            errors.append(e)
+
+    def _handle(self, chunk, handler, requests, results):
+        uids = handler(chunk, requests)
+        with self._lock:
+            results.extend(uids)
+            self.done += len(chunk)
+            if self.progress is not None:
+                self.progress(self.done, time.time() - self._start)
+
+
+def partition(lower, upper, parts):
+    '''
+    Splits the range of ids into contiguous parts of about the same size.
+
+    Args:
+        lower: The first id of the range (int).
+        upper: The last id of the range (int).
+        parts: The number of parts (int).
+
+    Return:
+        The first and the last id of each part (list<tuple<int, int>>).
+    '''
+    if upper < lower:
+        return []
+    step = max(1, -(-(upper - lower + 1) // max(1, parts)))
+    return [(first, min(first + step - 1, upper)) for first in xrange(lower, upper + 1, step)]
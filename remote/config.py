@@ -7,9 +7,22 @@ WEIMAR_ADDRESS_INSIDE = '192.168.100.26'
 WEIMAR_PORT_OUTSIDE = 2511
 WEIMAR_ADDRESS_OUTSIDE = '141.72.5.121'
 
+#the graphs whose elements are cached by each worker, which does not see the writes of
+#other workers, e.g. graphs which are mostly read
+ELEMENT_CACHE = []
+
+#the codec of the Pyro messages, e.g. binary or binary+zlib - pickle is Pyro's own serializer
+WIRE_CODEC = 'pickle'
+
 Pyro4.config.SERVERTYPE="thread"
 Pyro4.config.THREADING2=True
-Pyro4.config.SERIALIZER = 'pickle'
 Pyro4.config.HMAC_KEY='weimar-graphstore'
 #Pyro4.config.COMMTIMEOUT=10.5
-Pyro4.config.COMPRESSION = True
\ No newline at end of file
+if WIRE_CODEC == 'pickle':
+    Pyro4.config.SERIALIZER = 'pickle'
+    Pyro4.config.COMPRESSION = True
+else:
+    from serialization.pyroserializer import install
+    Pyro4.config.SERIALIZER = install(WIRE_CODEC)
+    #the codec compresses large messages only, if at all
+    Pyro4.config.COMPRESSION = False
@@ -89,18 +89,43 @@ class Server(object):
         self._worker_available.put(worker)
         return result
     
+    def create_schema(self, graph_name, type_defs):
+        worker = self._worker_available.get(True)
+        result = worker.create_schema(graph_name, type_defs)
+        self._worker_available.put(worker)
+        return result
+    
     def get_vertex(self, graph_name, uid, vertex_type):
         worker = self._worker_available.get(True)
         result = worker.get_vertex(graph_name, uid, vertex_type)
         self._worker_available.put(worker)
         return result
 
+    def get_vertices(self, graph_name, vertices):
+        worker = self._worker_available.get(True)
+        result = worker.get_vertices(graph_name, vertices)
+        self._worker_available.put(worker)
+        return result
+    
+    def get_edges(self, graph_name, edges):
+        worker = self._worker_available.get(True)
+        result = worker.get_edges(graph_name, edges)
+        self._worker_available.put(worker)
+        return result
+
     def say_hello(self):
         worker = self._worker_available.get(True)
         result = worker.say_hello()
         self._worker_available.put(worker)
         return result
 
+    def get_cache_stats(self, graph_name):
+        #the counters of the worker serving this call, each worker has a cache of its own
+        worker = self._worker_available.get(True)
+        result = worker.get_cache_stats(graph_name)
+        self._worker_available.put(worker)
+        return result
+
 
 class RemoteElementType(object):
     
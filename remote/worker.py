@@ -121,9 +121,21 @@ class Worker(object):
         self.hyperdex_port = hyperdex_port
         self._process = process
     
+    def _open_graph(self, graph_name):
+        #opening a graph must not cost any round trips within a request, the 
+        #database is validated with the first write
+        return HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name, fast_open=True,
+                             cache=graph_name in config.ELEMENT_CACHE)
+    
     def say_hello(self):
         return 'Hello from {}'.format(self.name)
     
+    def get_cache_stats(self, graph_name):
+        #the counters of this very worker, each worker has a cache of its own
+        if not self.graphs.has_key(graph_name):
+            return None
+        return self.graphs[graph_name].get_cache_stats()
+    
     def shutdown(self, code):
         print('[Warn] Worker {} is requested to shut down. Server code: {}'.format(self.name, code))
         #todo handle server code
@@ -140,7 +152,7 @@ class Worker(object):
                 return False
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             try:
                 self.graphs[graph_name].get_vertex_type(vertex_type)
                 return True
@@ -156,7 +168,7 @@ class Worker(object):
                 return False
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             try:
                 return self.graphs[graph_name].get_edge_type(edge_type)
                 return True
@@ -174,7 +186,7 @@ class Worker(object):
                 return False  
         else:
             print('Create new graph {} on HyperDex at {}:{}'.format(graph_name, self.hyperdex_ip, self.hyperdex_port))
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             try:
                 self.graphs[graph_name].create_vertex_type(RequestVertexType(type_name, *vertex_type_def))
                 return True
@@ -195,19 +207,41 @@ class Worker(object):
                 return False
         else:
             print('Create new graph {} on HyperDex at {}:{}'.format(graph_name, self.hyperdex_ip, self.hyperdex_port))
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             try:
                 self.graphs[graph_name].create_edge_type(RequestEdgeType(type_name, *edge_type_def))
                 return True
             except:
                 return False
 
+    def create_schema(self, graph_name, type_defs):
+        #type_defs is a list of ('vertex'/'edge', type_name, type_def)
+        print('[Info] Create schema of {} types'.format(len(type_defs)))
+        requested_types = []
+        for kind, type_name, type_def in type_defs:
+            if(kind == 'vertex'):
+                requested_types.append(RequestVertexType(type_name, *type_def))
+            elif(kind == 'edge'):
+                requested_types.append(RequestEdgeType(type_name, *type_def))
+            else:
+                return False
+        if(not self.graphs.has_key(graph_name)):
+            print('Create new graph {} on HyperDex at {}:{}'.format(graph_name, self.hyperdex_ip, self.hyperdex_port))
+            self.graphs[graph_name] = self._open_graph(graph_name)
+        try:
+            self.graphs[graph_name].create_schema(requested_types)
+            return True
+        except Exception, e:
+            traceback.print_exc()
+            print(e)
+            return False
+
     def insert_vertex(self, graph_name, vertex_type, attributes):
         if(self.graphs.has_key(graph_name)):
             return self.graphs[graph_name].insert_vertex(\
                 RequestVertex(VertexType(self.graphs[graph_name]._storage , vertex_type.split(':', 1)[1]),attributes))._uid
         else:
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             return self.graphs[graph_name].insert_vertex(\
                 RequestVertex(VertexType(self.graphs[graph_name]._storage , vertex_type.split(':', 1)[1]),attributes))._uid
             
@@ -222,13 +256,27 @@ class Worker(object):
                 return False
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             try:
                 self.graphs[graph_name].get_vertex(uid, vertex_type)
                 return True
             except:
                 return False
     
+    def get_vertices(self, graph_name, vertices):
+        #all vertices are read at once, missing ones are False
+        if not self.graphs.has_key(graph_name):
+            print('Create new graph ' + graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
+        return [vertex is not None for vertex in self.graphs[graph_name].get_vertices(vertices)]
+    
+    def get_edges(self, graph_name, edges):
+        #all edges are read at once, missing ones are False
+        if not self.graphs.has_key(graph_name):
+            print('Create new graph ' + graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
+        return [edge is not None for edge in self.graphs[graph_name].get_edges(edges)]
+    
     def get_type_definition(self, graph_name, type_name):
         print(type_name)
         t = type_name.split(':', 1)
@@ -258,7 +306,7 @@ class Worker(object):
                 raise Exception()
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 return self.graphs[graph_name].get_vertex_type(t[1]).count()
             elif(t[0] == 'edge'):
@@ -280,7 +328,7 @@ class Worker(object):
                 raise Exception()
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 return self.graphs[graph_name].get_vertex_type(t[1]).get_vertices()
             elif(t[0] == 'edge'):
@@ -302,7 +350,7 @@ class Worker(object):
                 raise Exception('Something went wrong.')
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 self.graphs[graph_name].get_vertex_type(t[1]).remove()
             elif(t[0] == 'edge'):
@@ -326,7 +374,7 @@ class Worker(object):
                 raise Exception()
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 return Vertex(uid, t[1], self.graphs[graph_name]._storage).get_property(key)
             elif(t[0] == 'edge'):
@@ -348,7 +396,7 @@ class Worker(object):
                 raise Exception()
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 return Vertex(uid, t[1], self.graphs[graph_name]._storage).set_property(key, value)
             elif(t[0] == 'edge'):
@@ -370,7 +418,7 @@ class Worker(object):
                 raise Exception()
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             if(t[0] == 'vertex'):
                 return Vertex(uid, t[1], self.graphs[graph_name]._storage).get_property_keys()
             elif(t[0] == 'edge'):
@@ -389,7 +437,7 @@ class Worker(object):
                        edge_type, struct_attr, unstruc_attr)._uid
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             return Vertex(uid, type_name, self.graphs[graph_name]._storage)\
             .add_edge(Vertex(target_uid, target_type, self.graphs[graph_name]._storage),\
                        edge_type, struct_attr, unstruc_attr)._uid
@@ -402,7 +450,7 @@ class Worker(object):
             .rm_edge(Edge(edge_uid, edge_type, self.graphs[graph_name]._storage))
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             Vertex(uid, type_name, self.graphs[graph_name]._storage)\
             .rm_edge(Edge(edge_uid, edge_type, self.graphs[graph_name]._storage))
     
@@ -483,7 +531,7 @@ class Worker(object):
             return (v._uid, v._element_type)
         else:
             print('Create new graph ' + graph_name)
-            self.graphs[graph_name] = HyperDexGraph(self.hyperdex_ip, self.hyperdex_port, graph_name)
+            self.graphs[graph_name] = self._open_graph(graph_name)
             v = Edge(uid, type_name,  self.graphs[graph_name]._storage).get_source()
             return (v._uid, v._element_type)
     
@@ -21,6 +21,11 @@ class WorkerProcess(object):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
         return self.pyro.say_hello()
 
+    def get_cache_stats(self, graph_name):
+        if(self.pyro is None):
+            self.pyro = Pyro4.Proxy(self.proxy_uri)
+        return self.pyro.get_cache_stats(graph_name)
+
     def shutdown(self, code):
         if(self.pyro is None):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
@@ -48,6 +53,11 @@ class WorkerProcess(object):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
         return self.pyro.create_edge_type(graph_name, type_name, edge_type_def)
 
+    def create_schema(self, graph_name, type_defs):
+        if(self.pyro is None):
+            self.pyro = Pyro4.Proxy(self.proxy_uri)
+        return self.pyro.create_schema(graph_name, type_defs)
+
     def insert_vertex(self, graph_name, vertex_type, attributes):
         if(self.pyro is None):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
@@ -58,6 +68,16 @@ class WorkerProcess(object):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
         return self.pyro.get_vertex(graph_name, uid, vertex_type)
     
+    def get_vertices(self, graph_name, vertices):
+        if(self.pyro is None):
+            self.pyro = Pyro4.Proxy(self.proxy_uri)
+        return self.pyro.get_vertices(graph_name, vertices)
+    
+    def get_edges(self, graph_name, edges):
+        if(self.pyro is None):
+            self.pyro = Pyro4.Proxy(self.proxy_uri)
+        return self.pyro.get_edges(graph_name, edges)
+    
     def get_type_definition(self, graph_name, type_name):
         if(self.pyro is None):
             self.pyro = Pyro4.Proxy(self.proxy_uri)
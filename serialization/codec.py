@@ -0,0 +1,390 @@
+"""
+.. module:: codec.py
+   :platform: Linux
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Every encoded value starts with a version byte, which identifies the codec it has
+been encoded with. Values pickled before there were codecs start with the pickle
+protocol marker 0x80, they are decoded as such. Hence, a value can always be decoded
+no matter which codec is currently selected.
+"""
+import cPickle
+import struct
+import threading
+import zlib
+try:
+    #the C implementation of msgpack is much faster than the one of this module
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+PICKLE = '\x80'
+BINARY = '\x01'
+COMPRESSED = '\x02'
+
+#data types of the binary codec, which are not covered by msgpack itself
+EXT_TUPLE = 1
+EXT_SET = 2
+EXT_FROZENSET = 3
+EXT_PICKLE = 127
+
+_codecs = {}
+_versions = {}
+#a msgpack packer allocates a large buffer, each thread keeps its own for each level of
+#nested extension types
+_packers = threading.local()
+
+
+class CodecException(Exception):
+
+    def __init__(self, message):
+        self.value = message
+
+    def __str__(self, *args, **kwargs):
+        return self.value
+
+
+class PickleCodec(object):
+    '''
+    The PickleCodec stores values as cPickle does, this is the format of all values
+    stored before there were codecs.
+    '''
+    name = 'pickle'
+    version = PICKLE
+
+    def encode(self, value):
+        return cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        return cPickle.loads(data)
+
+
+class BinaryCodec(object):
+    '''
+    The BinaryCodec stores values in the msgpack format, which is compact and does not
+    need a schema. Tuples and sets are stored as extension types, any other value
+    which msgpack cannot represent is pickled into an extension type.
+    
+    The msgpack package is used if it is installed, otherwise the values are encoded
+    by this module. Their output is compatible, each decodes what the other encodes,
+    but it is not necessarily identical byte by byte.
+    '''
+    name = 'binary'
+    version = BINARY
+
+    def __init__(self, native=True):
+        '''
+        Constructor.
+
+        Args:
+            native: Use the msgpack package if it is installed (bool).
+        '''
+        self._native = native and msgpack is not None
+
+    def encode(self, value):
+        if self._native:
+            return BINARY + _packb(value)
+        parts = [BINARY]
+        _pack(value, parts)
+        return ''.join(parts)
+
+    def decode(self, data):
+        if self._native:
+            return msgpack.unpackb(data[1:], raw=False, ext_hook=_from_ext)
+        value, offset = _unpack(data, 1)
+        if offset != len(data):
+            raise CodecException('Trailing data after {} of {} bytes'.format(offset, len(data)))
+        return value
+
+
+class ThresholdCompressor(object):
+    '''
+    The ThresholdCompressor compresses the values of another codec with zlib, but only
+    if they are larger than the threshold. Small values would barely shrink and the
+    compression is not for free.
+    '''
+    version = COMPRESSED
+
+    def __init__(self, codec, threshold=1024, level=1):
+        '''
+        Constructor.
+
+        Args:
+            codec: The codec encoding the values (codec).
+            threshold: The size in bytes from which values are compressed (int).
+            level: The zlib compression level (int).
+        '''
+        self.codec = codec
+        self.name = codec.name + '+zlib'
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, value):
+        data = self.codec.encode(value)
+        if len(data) < self.threshold:
+            return data
+        return COMPRESSED + zlib.compress(data, self.level)
+
+    def decode(self, data):
+        return decode(zlib.decompress(buffer(data, 1)))
+
+
+def register(codec):
+    '''
+    Makes a codec available by its name and its version byte.
+
+    Args:
+        codec: An object providing name, version, encode(value) and decode(data) (codec).
+    '''
+    _codecs[codec.name] = codec
+    if codec.version in _versions and _versions[codec.version].name != codec.name \
+            and codec.version != COMPRESSED:
+        raise CodecException('Version byte of codec {} is already taken'.format(codec.name))
+    _versions.setdefault(codec.version, codec)
+
+
+def get_codec(name):
+    '''
+    Returns the registered codec of the given name.
+
+    Args:
+        name: The name of the codec, e.g. pickle, binary or binary+zlib (str).
+
+    Return:
+        The codec (codec).
+    '''
+    if isinstance(name, basestring):
+        try:
+            return _codecs[name]
+        except KeyError:
+            raise CodecException('Unknown codec ' + name)
+    return name
+
+
+def decode(data):
+    '''
+    Decodes a value with the codec it has been encoded with.
+
+    Args:
+        data: The encoded value (str).
+
+    Return:
+        The decoded value (any type).
+    '''
+    if len(data) == 0:
+        raise CodecException('Cannot decode an empty value')
+    try:
+        return _versions[data[0]].decode(data)
+    except KeyError:
+        raise CodecException('Unknown codec version {}'.format(ord(data[0])))
+
+
+def _to_ext(value):
+    kind = type(value)
+    if kind is tuple:
+        return msgpack.ExtType(EXT_TUPLE, _packb(list(value)))
+    if kind is set:
+        return msgpack.ExtType(EXT_SET, _packb(list(value)))
+    if kind is frozenset:
+        return msgpack.ExtType(EXT_FROZENSET, _packb(list(value)))
+    return msgpack.ExtType(EXT_PICKLE, cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL))
+
+
+def _packb(value):
+    stack = _packers.__dict__.setdefault('stack', [])
+    depth = _packers.__dict__.get('depth', 0)
+    if depth == len(stack):
+        stack.append(msgpack.Packer(use_bin_type=True, strict_types=True, default=_to_ext))
+    _packers.depth = depth + 1
+    try:
+        return stack[depth].pack(value)
+    finally:
+        _packers.depth = depth
+
+
+def _from_ext(ext_type, data):
+    if ext_type == EXT_PICKLE:
+        return cPickle.loads(data)
+    return _ext_value(ext_type, msgpack.unpackb(data, raw=False, ext_hook=_from_ext))
+
+
+def _ext_value(ext_type, items):
+    if ext_type == EXT_TUPLE:
+        return tuple(items)
+    if ext_type == EXT_SET:
+        return set(items)
+    if ext_type == EXT_FROZENSET:
+        return frozenset(items)
+    raise CodecException('Unknown extension type {}'.format(ext_type))
+
+
+def _pack(value, parts):
+    kind = type(value)
+    if value is None:
+        parts.append('\xc0')
+    elif kind is bool:
+        parts.append('\xc3' if value else '\xc2')
+    elif kind is int or kind is long:
+        _pack_int(value, parts)
+    elif kind is float:
+        parts.append('\xcb' + struct.pack('>d', value))
+    elif kind is str:
+        size = len(value)
+        if size < 0x100:
+            parts.append('\xc4' + chr(size))
+        elif size < 0x10000:
+            parts.append('\xc5' + struct.pack('>H', size))
+        else:
+            parts.append('\xc6' + struct.pack('>I', size))
+        parts.append(value)
+    elif kind is unicode:
+        value = value.encode('utf-8')
+        size = len(value)
+        if size < 32:
+            parts.append(chr(0xa0 | size))
+        elif size < 0x100:
+            parts.append('\xd9' + chr(size))
+        elif size < 0x10000:
+            parts.append('\xda' + struct.pack('>H', size))
+        else:
+            parts.append('\xdb' + struct.pack('>I', size))
+        parts.append(value)
+    elif kind is list:
+        _pack_header(len(value), 0x90, '\xdc', '\xdd', parts)
+        for item in value:
+            _pack(item, parts)
+    elif kind is dict:
+        _pack_header(len(value), 0x80, '\xde', '\xdf', parts)
+        for key, item in value.iteritems():
+            _pack(key, parts)
+            _pack(item, parts)
+    elif kind is tuple:
+        _pack_ext(EXT_TUPLE, list(value), parts)
+    elif kind is set:
+        _pack_ext(EXT_SET, list(value), parts)
+    elif kind is frozenset:
+        _pack_ext(EXT_FROZENSET, list(value), parts)
+    else:
+        _pack_ext(EXT_PICKLE, cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL), parts, False)
+
+
+def _pack_int(value, parts):
+    if 0 <= value < 0x80:
+        parts.append(chr(value))
+    elif -32 <= value < 0:
+        parts.append(chr(value & 0xff))
+    elif -0x80000000 <= value < 0x80000000:
+        parts.append('\xd2' + struct.pack('>i', value))
+    elif -0x8000000000000000 <= value < 0x8000000000000000:
+        parts.append('\xd3' + struct.pack('>q', value))
+    else:
+        #msgpack cannot represent arbitrary precision
+        _pack_ext(EXT_PICKLE, cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL), parts, False)
+
+
+def _pack_header(size, fix, marker16, marker32, parts):
+    if size < 16:
+        parts.append(chr(fix | size))
+    elif size < 0x10000:
+        parts.append(marker16 + struct.pack('>H', size))
+    else:
+        parts.append(marker32 + struct.pack('>I', size))
+
+
+def _pack_ext(ext_type, value, parts, nested=True):
+    if nested:
+        inner = []
+        _pack(value, inner)
+        value = ''.join(inner)
+    parts.append('\xc9' + struct.pack('>Ib', len(value), ext_type))
+    parts.append(value)
+
+
+def _unpack(data, offset):
+    marker = ord(data[offset])
+    offset += 1
+    if marker < 0x80:
+        return marker, offset
+    if marker >= 0xe0:
+        return marker - 0x100, offset
+    if 0xa0 <= marker <= 0xbf:
+        size = marker & 0x1f
+        return data[offset:offset + size].decode('utf-8'), offset + size
+    if 0x90 <= marker <= 0x9f:
+        return _unpack_list(data, offset, marker & 0x0f)
+    if 0x80 <= marker <= 0x8f:
+        return _unpack_dict(data, offset, marker & 0x0f)
+    if marker == 0xc0:
+        return None, offset
+    if marker == 0xc2:
+        return False, offset
+    if marker == 0xc3:
+        return True, offset
+    if marker in _NUMBERS:
+        number = _NUMBERS[marker]
+        return number.unpack_from(data, offset)[0], offset + number.size
+    if marker in (0xc4, 0xc5, 0xc6):
+        size, offset = _unpack_size(data, offset, marker - 0xc4)
+        return data[offset:offset + size], offset + size
+    if marker in (0xd9, 0xda, 0xdb):
+        size, offset = _unpack_size(data, offset, marker - 0xd9)
+        return data[offset:offset + size].decode('utf-8'), offset + size
+    if marker in (0xdc, 0xdd):
+        size, offset = _unpack_size(data, offset, marker - 0xdb)
+        return _unpack_list(data, offset, size)
+    if marker in (0xde, 0xdf):
+        size, offset = _unpack_size(data, offset, marker - 0xdd)
+        return _unpack_dict(data, offset, size)
+    if marker in (0xc7, 0xc8, 0xc9):
+        size, offset = _unpack_size(data, offset, marker - 0xc7)
+    elif 0xd4 <= marker <= 0xd8:
+        #fixext of 1, 2, 4, 8 or 16 bytes
+        size = 1 << (marker - 0xd4)
+    else:
+        raise CodecException('Unknown type marker {}'.format(marker))
+    ext_type = struct.unpack_from('>b', data, offset)[0]
+    offset += 1
+    end = offset + size
+    if ext_type == EXT_PICKLE:
+        return cPickle.loads(data[offset:end]), end
+    return _ext_value(ext_type, _unpack(data, offset)[0]), end
+
+
+_NUMBERS = {0xca : struct.Struct('>f'), 0xcb : struct.Struct('>d'),
+            0xcc : struct.Struct('>B'), 0xcd : struct.Struct('>H'),
+            0xce : struct.Struct('>I'), 0xcf : struct.Struct('>Q'),
+            0xd0 : struct.Struct('>b'), 0xd1 : struct.Struct('>h'),
+            0xd2 : struct.Struct('>i'), 0xd3 : struct.Struct('>q')}
+
+
+def _unpack_size(data, offset, width):
+    #width 0, 1 and 2 stand for 8, 16 and 32 bit
+    if width == 0:
+        return ord(data[offset]), offset + 1
+    if width == 1:
+        return struct.unpack_from('>H', data, offset)[0], offset + 2
+    return struct.unpack_from('>I', data, offset)[0], offset + 4
+
+
+def _unpack_list(data, offset, size):
+    result = []
+    for i in xrange(size):
+        item, offset = _unpack(data, offset)
+        result.append(item)
+    return result, offset
+
+
+def _unpack_dict(data, offset, size):
+    result = {}
+    for i in xrange(size):
+        key, offset = _unpack(data, offset)
+        result[key], offset = _unpack(data, offset)
+    return result, offset
+
+
+register(PickleCodec())
+register(BinaryCodec())
+register(ThresholdCompressor(get_codec('pickle')))
+register(ThresholdCompressor(get_codec('binary')))
@@ -0,0 +1,78 @@
+"""
+.. module:: pyroserializer.py
+   :platform: Linux
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+Makes the codecs available as Pyro4 serializers, so that the messages between the
+clients, the server and its workers can be encoded with them.
+"""
+import copy_reg
+import inspect
+import Pyro4
+import Pyro4.util
+from serialization import codec as codecs
+
+
+#Pyro4 identifies serializers by a number, these are far from its own ones
+SERIALIZER_ID_BASE = 64
+
+
+class CodecSerializer(Pyro4.util.SerializerBase):
+    '''
+    The CodecSerializer encodes the Pyro4 messages with one of the codecs.
+    '''
+
+    def __init__(self, codec, serializer_id):
+        self.codec = codecs.get_codec(codec)
+        self.serializer_id = serializer_id
+
+    def dumps(self, data):
+        return self.codec.encode(data)
+
+    def loads(self, data):
+        return codecs.decode(data)
+
+    def dumpsCall(self, obj, method, vargs, kwargs):
+        return self.codec.encode((obj, method, vargs, kwargs))
+
+    def loadsCall(self, data):
+        return codecs.decode(data)
+
+    @classmethod
+    def register_type_replacement(cls, object_type, replacement_function):
+        #objects unknown to msgpack are pickled, i.e. the replacement is done by pickle
+        if object_type is type or not inspect.isclass(object_type):
+            raise ValueError('Cannot replace objects of {}'.format(object_type))
+        def reduce_replaced(obj):
+            return replacement_function(obj).__reduce__()
+        try:
+            copy_reg.pickle(object_type, reduce_replaced)
+        except TypeError:
+            pass
+
+
+def install(codec):
+    '''
+    Registers the given codec as Pyro4 serializer, named after the codec. This raises a
+    CodecException, if Pyro4 does not keep its serializers where they are expected.
+
+    Args:
+        codec: The name of the codec, e.g. binary+zlib (str).
+
+    Return:
+        The name of the serializer to be used as Pyro4.config.SERIALIZER (str).
+    '''
+    name = codecs.get_codec(codec).name
+    #Pyro4 has no public registry of serializers
+    if not hasattr(Pyro4.util, '_serializers') or not hasattr(Pyro4.util, '_serializers_by_id'):
+        raise codecs.CodecException('Cannot register codec {} with Pyro4 {}'.format(name, Pyro4.__version__))
+    serializers = Pyro4.util._serializers
+    if name not in serializers:
+        serializer = CodecSerializer(name, SERIALIZER_ID_BASE + len(serializers))
+        serializers[name] = serializer
+        Pyro4.util._serializers_by_id[serializer.serializer_id] = serializer
+    accepted = getattr(Pyro4.config, 'SERIALIZERS_ACCEPTED', None)
+    if accepted is not None:
+        accepted.add(name)
+    return name
@@ -6,11 +6,34 @@
 
 
 """
-import cPickle
+from serialization import codec as codecs
 
 
-def serialize(value):
-    return cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+#the codec of graphs which do not select one, it keeps the values readable for older workers
+DEFAULT_CODEC = 'pickle'
+
+
+def serialize(value, codec=None):
+    '''
+    Serializes the given value.
+
+    Args:
+        value: The value to be serialized (any type).
+        codec: The codec or its name, None for the default codec (codec/str).
+
+    Return:
+        The serialized value, tagged with the version byte of the codec (str).
+    '''
+    return codecs.get_codec(codec or DEFAULT_CODEC).encode(value)
 
 def deserialize(value):
-    return cPickle.loads(value)
\ No newline at end of file
+    '''
+    Deserializes the given value with the codec it has been serialized with.
+
+    Args:
+        value: The serialized value (str).
+
+    Return:
+        The value (any type).
+    '''
+    return codecs.decode(value)
@@ -0,0 +1,52 @@
+"""
+.. module:: testcodec.py
+   :platform: Linux
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+import unittest
+import cPickle
+from serialization import codec, serializer
+
+
+VALUES = [None, True, 0, -1, 200, -70000, 2**40, 2**70, 1.5, 'Gus', u'M\xfcnchen', 'x' * 70000,
+          [1, 'a'], (1, (2, 3)), set([1, 'a']), frozenset([2]), {'a' : {1 : [u'b', (None,)]}}]
+
+
+class Test(unittest.TestCase):
+
+    def test_roundtrip(self):
+        for name in ['pickle', 'binary', 'pickle+zlib', 'binary+zlib']:
+            for value in VALUES:
+                self.assertEqual(value, codec.decode(codec.get_codec(name).encode(value)))
+
+    def test_pure_and_native(self):
+        native = codec.BinaryCodec()
+        pure = codec.BinaryCodec(native=False)
+        for value in VALUES:
+            self.assertEqual(value, pure.decode(native.encode(value)))
+            self.assertEqual(value, native.decode(pure.encode(value)))
+            self.assertEqual(type(value), type(pure.decode(pure.encode(value))))
+
+    def test_legacy_pickle(self):
+        value = {'nick' : 'Goose', 'age' : 76}
+        self.assertEqual(value, serializer.deserialize(cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)))
+        self.assertEqual(serializer.serialize(value), cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL))
+
+    def test_threshold(self):
+        compressor = codec.get_codec('binary+zlib')
+        self.assertEqual(codec.BINARY, compressor.encode('small')[0])
+        large = compressor.encode('x' * 70000)
+        self.assertEqual(codec.COMPRESSED, large[0])
+        self.assertTrue(len(large) < 1000)
+
+    def test_unknown(self):
+        self.assertRaises(codec.CodecException, codec.get_codec, 'unknown')
+        self.assertRaises(codec.CodecException, codec.decode, '\x7f')
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
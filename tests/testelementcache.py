@@ -0,0 +1,80 @@
+"""
+.. module:: testelementcache.py
+   :platform: Linux
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+import unittest
+from graphstore.elementcache import ElementCache
+
+
+SPACE = 'test_graph_User'
+
+
+class Test(unittest.TestCase):
+
+    def test_lru(self):
+        cache = ElementCache(max_entries=2)
+        for uid in xrange(3):
+            cache.fill(SPACE, uid, {'name' : 'User{}'.format(uid)})
+        self.assertEqual((False, None), cache.get(SPACE, 0))
+        #reading an element makes it the most recently used one
+        self.assertEqual((True, {'name' : 'User1'}), cache.get(SPACE, 1))
+        cache.fill(SPACE, 3, {'name' : 'User3'})
+        self.assertFalse(cache.get(SPACE, 2)[0])
+        self.assertTrue(cache.get(SPACE, 1)[0])
+        stats = cache.stats()
+        self.assertEqual((2, 2, 2), (stats['hits'], stats['misses'], stats['evictions']))
+
+    def test_bytes(self):
+        cache = ElementCache(max_bytes=1000)
+        cache.fill(SPACE, 1, {'value' : 'x' * 600})
+        cache.fill(SPACE, 2, {'value' : 'y' * 600})
+        self.assertFalse(cache.get(SPACE, 1)[0])
+        self.assertTrue(cache.get(SPACE, 2)[0])
+        #an element larger than the cache is not cached at all
+        cache.fill(SPACE, 3, {'value' : 'z' * 2000})
+        self.assertFalse(cache.get(SPACE, 3)[0])
+        self.assertTrue(600 < cache.stats()['bytes'] < 1000)
+
+    def test_projection(self):
+        cache = ElementCache()
+        cache.fill(SPACE, 1, {'name' : 'Gus'}, ['name'])
+        cache.fill(SPACE, 1, {'age' : 76}, ['age'])
+        self.assertEqual((True, {'name' : 'Gus', 'age' : 76}), cache.get(SPACE, 1, ['name', 'age']))
+        #the element has not been read completely
+        self.assertFalse(cache.get(SPACE, 1)[0])
+        self.assertFalse(cache.get(SPACE, 1, ['nick'])[0])
+        cache.fill(SPACE, 1, {'name' : 'Gus', 'age' : 76, 'nick' : 'Goose'})
+        self.assertTrue(cache.get(SPACE, 1)[0])
+
+    def test_copies(self):
+        cache = ElementCache()
+        cache.fill(SPACE, 1, {'outgoing_edges' : {5 : 'knows'}})
+        cache.get(SPACE, 1)[1]['outgoing_edges'].pop(5)
+        self.assertEqual({5 : 'knows'}, cache.get(SPACE, 1)[1]['outgoing_edges'])
+
+    def test_invalidation(self):
+        cache = ElementCache()
+        cache.fill(SPACE, 1, {'name' : 'Gus'})
+        version = cache.version()
+        cache.invalidate(SPACE, 1)
+        self.assertFalse(cache.get(SPACE, 1)[0])
+        #a read issued before the write must not fill the cache
+        cache.fill(SPACE, 1, {'name' : 'Gus'}, version=version)
+        self.assertFalse(cache.get(SPACE, 1)[0])
+        cache.fill(SPACE, 2, {'name' : 'Scrooge'}, version=version)
+        self.assertTrue(cache.get(SPACE, 2)[0])
+        cache.fill(SPACE, 1, {'name' : 'Goose'}, version=cache.version())
+        self.assertEqual({'name' : 'Goose'}, cache.get(SPACE, 1)[1])
+        cache.fill('test_graph_Movie', 1, {'title' : 'Up'})
+        cache.invalidate_space(SPACE)
+        self.assertFalse(cache.get(SPACE, 2)[0])
+        self.assertTrue(cache.get('test_graph_Movie', 1)[0])
+        self.assertEqual(3, cache.stats()['invalidations'])
+
+
+if __name__ == "__main__":
+    unittest.main()
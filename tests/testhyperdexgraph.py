@@ -10,10 +10,17 @@ import unittest
 
 from graph.hyperdexgraph import HyperDexGraph
 from hyperdex.admin import Admin
-from hyperdex.client import Client
+from hyperdex.client import Client, HyperClientException
 from graph.requestgraphelements import RequestVertexType, RequestEdgeType,\
     RequestVertex
+from graphstore import readiness
+from graphstore.graphexception import TypeNotFoundException, ElementNotFoundException
+from graphstore.adjacency import MARKER
+from graph import snapshot
 import os
+import shutil
+import tempfile
+import threading
 from pydevsrc import pydevd
 
 
@@ -30,6 +37,27 @@ vertex_type = 'testvertex'
 edge_type = 'testedge'
 GRAPH = 'test_graph'
 
+
+class ReadRecorder(object):
+    '''
+    Wraps a Client and records the attributes of each read.
+    '''
+
+    def __init__(self, client):
+        self.client = client
+        self.reads = []
+
+    def __getattr__(self, name):
+        if name == 'async_get':
+            self.reads.append(None)
+        elif name == 'async_get_partial':
+            def partial(space, key, attributes):
+                self.reads.append(set(attributes))
+                return self.client.async_get_partial(space, key, attributes)
+            return partial
+        return getattr(self.client, name)
+
+
 class Test(unittest.TestCase):
 
 
@@ -45,6 +73,7 @@ class Test(unittest.TestCase):
         self.hyperdex.rm_space(GENERIC_VERTEX)
         self.hyperdex.rm_space('id')
         self.hyperdex.rm_space(GRAPH + '_id_sys')
+        self.hyperdex.rm_space(GRAPH + '_adjacency')
         
         
 
@@ -55,7 +84,7 @@ class Test(unittest.TestCase):
         self.assertDictEqual({'age': 'int', 'outgoing_edges': 'map(int, string)', 'incoming_edges': 'map(int, string)', 'name': 'string'},
                              vertext1.get_type_definition())
         self.assertEqual(vertex_type, vertext1.get_type_name())
-        os.system('hyperdex wait-until-stable -h {} -p {}'.format(ADDRESS, PORT))
+        readiness.wait_for_space(self.hyperdex_client, GRAPH + '_' + vertex_type, 1)
         vertext1.remove()
         
     def test_create_edge_type(self):
@@ -64,9 +93,673 @@ class Test(unittest.TestCase):
         edge1 = self.g.create_edge_type(req1)
         self.assertEqual({'source_vertex_type': 'string', 'age': 'int', 'name': 'string', 'source_uid': 'int', 'target': 'map(int, string)'},
                           edge1.get_type_definition())
-        os.system('hyperdex wait-until-stable -h {} -p {}'.format(ADDRESS, PORT))
+        readiness.wait_for_space(self.hyperdex_client, GRAPH + '_' + edge_type, 1)
         edge1.remove()
         
+    def test_wait_until_stable(self):
+        self.assertTrue(readiness.wait_until_stable(self.hyperdex))
+        #an admin call which does not return is abandoned at the deadline, then the space is probed
+        class Unstable(object):
+            def wait_until_stable(self):
+                threading.Event().wait()
+        self.assertFalse(readiness.wait_until_stable(Unstable(), timeout=0.05))
+        self.assertLess(readiness.wait_for_space(self.hyperdex_client, GENERIC_VERTEX, 1, timeout=0.05,
+                                                 hyperdex_admin=Unstable()), 1.0)
+        
+    def test_create_schema(self):
+        types = self.g.create_schema([RequestVertexType('User', ('string', 'name'), ('int', 'age')),
+                                      RequestVertexType('Movie', ('string', 'title')),
+                                      RequestEdgeType('rates', ('int', 'stars'))])
+        self.assertEqual(['User', 'Movie', 'rates'], [t.get_type_name() for t in types])
+        self.assertDictEqual({'age': 'int', 'outgoing_edges': 'map(int, string)', 'incoming_edges': 'map(int, string)', 'name': 'string'},
+                             self.g.get_vertex_type('User').get_type_definition())
+        self.assertDictEqual({'source_vertex_type': 'string', 'stars': 'int', 'source_uid': 'int', 'target': 'map(int, string)'},
+                             self.g.get_edge_type('rates').get_type_definition())
+        u1 = self.g.insert_vertex(RequestVertex(types[0], {'name':'Gus', 'age':76}))
+        m1 = self.g.insert_vertex(RequestVertex(types[1], {'title':'DuckTails'}))
+        u1.add_edge(m1, types[2], {'stars':4})
+        self.assertEqual(4, m1.get_incoming_edges(types[2])[0].stars)
+        for t in types:
+            t.remove()
+
+    def test_subspaces(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'age':76}))
+        self.g.search_vertex(user, ('age', 76))
+        self.g.search_vertex(user, ('age', 76), ('name', 'Gus'))
+        self.g.search_vertex(user, ('incoming_edges', {}))
+        self.assertEqual([('age',), ('name',)], self.g.suggest_subspaces(user))
+        self.assertEqual([('age',)], self.g.suggest_subspaces('User', 1))
+        user.remove()
+        #maps cannot be hashed into a subspace
+        self.assertRaises(TypeError, self.g.create_vertex_type, RequestVertexType('User', ('string', 'name')).add_subspace('outgoing_edges'))
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')).add_subspace('age'))
+        self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'age':76}))
+        self.assertEqual(1, len(self.g.search_vertex(user, ('age', 76))))
+        user.remove()
+
+    def test_insert_vertices(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        vertices = [{'name':'User{}'.format(i), 'age':i, 'nick':'u{}'.format(i)} for i in xrange(100)]
+        #properties which cannot be processed
+        vertices[10] = 'ten'
+        vertices[20] = None
+        result = self.g.insert_vertices(user, vertices, batch_size=16)
+        self.assertEqual(100, len(result))
+        self.assertItemsEqual([10, 20], result.errors.keys())
+        self.assertIsNone(result[10])
+        self.assertEqual(98, len(set(uid for uid in result if uid is not None)))
+        for i in [0, 15, 16, 99]:
+            v = self.g.get_vertex(result[i], 'User')
+            self.assertEqual(i, v.age)
+            self.assertEqual('u{}'.format(i), v.nick)
+        user.remove()
+        
+    def test_add_edges(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows', ('int', 'since')))
+        uids = self.g.insert_vertices(user, [{'name':'User{}'.format(i)} for i in xrange(10)]).results
+        #everybody knows everybody else
+        edges = [(src, 'User', {tar : 'User'}, {'since':src, 'how':'school'}) for src in uids for tar in uids if src != tar]
+        edges.insert(5, (uids[0], 'User'))
+        result = self.g.add_edges(knows, edges, batch_size=40)
+        self.assertEqual(91, len(result))
+        self.assertEqual([5], result.errors.keys())
+        for uid in uids:
+            v = self.g.get_vertex(uid, 'User')
+            self.assertEqual(9, len(v.get_outgoing_edges(knows)))
+            self.assertEqual(9, len(v.get_incoming_edges(knows)))
+        e = v.get_outgoing_edges(knows)[0]
+        self.assertEqual(uids[-1], e.since)
+        self.assertEqual('school', e.how)
+        #an edge to a removed vertex is removed from its source again
+        self.g.get_vertex(uids[9], 'User').remove()
+        result = self.g.add_edges(knows, [(uids[0], 'User', {uids[9] : 'User'}, {}), (uids[1], 'User', {uids[2] : 'User'}, {})])
+        self.assertEqual([0], result.errors.keys())
+        self.assertIsNone(result.results[0])
+        self.assertEqual(9, len(self.g.get_vertex(uids[1], 'User').get_outgoing_edges(knows)))
+        self.assertEqual(8, len(self.g.get_vertex(uids[0], 'User').get_outgoing_edges(knows)))
+        self.assertEqual(8 * 9 + 1, self.g._storage.count_elements('knows'))
+        knows.remove()
+        user.remove()
+        
+    def test_uncertain_puts(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        storage = self.g._storage
+        #the third put is applied, but times out, the fourth one is rejected
+        puts = []
+        async_put = storage.hyperdex_client.async_put
+        def put(space, key, attributes):
+            puts.append(key)
+            if len(puts) == 4:
+                raise HyperClientException('HYPERDEX_CLIENT_UNKNOWNATTR')
+            deferred = async_put(space, key, attributes)
+            if len(puts) == 3:
+                deferred.e = HyperClientException('HYPERDEX_CLIENT_TIMEOUT')
+            return deferred
+        storage.hyperdex_client.async_put = put
+        result = self.g.insert_vertices(user, [{'name':'User{}'.format(i)} for i in xrange(5)])
+        self.assertItemsEqual([2, 3], result.errors.keys())
+        storage.sysadmin.flush_obsolete_ids()
+        #only the id of the rejected vertex is recycled
+        recycled = storage.sysadmin.get_next_ids(10)
+        self.assertIn(puts[3], recycled)
+        self.assertNotIn(puts[2], recycled)
+        uids = [uid for uid in result if uid is not None]
+        del puts[:]
+        result = self.g.add_edges(knows, [(uids[0], 'User', {uid : 'User'}, {}) for uid in uids + uids[:1]])
+        self.assertItemsEqual([2, 3], result.errors.keys())
+        #the edge whose put timed out is deleted again
+        self.assertEqual(2, len(self.g.get_vertex(uids[0], 'User').get_outgoing_edges(knows)))
+        self.assertEqual(2, storage.count_elements('knows'))
+        del storage.hyperdex_client.async_put
+        knows.remove()
+        user.remove()
+        
+    def test_remove_vertex(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus'}))
+        u2 = self.g.insert_vertex(RequestVertex(user, {'name':'Scrooge'}))
+        u3 = self.g.insert_vertex(RequestVertex(user, {'name':'Donald'}))
+        e1 = u1.add_edge(u2, knows)
+        u1.add_edge([u2, u3], knows)
+        u3.add_edge(u1, knows)
+        u1.add_edge(u1, knows)
+        e2 = u2.add_edge(u3, knows)
+        sysadmin = self.g._storage.sysadmin
+        sysadmin.flush_obsolete_ids()
+        u1.remove()
+        self.assertRaises(ElementNotFoundException, self.g.get_vertex, u1._uid, 'User')
+        #setting a property does not bring a removed vertex back
+        self.assertRaises(ElementNotFoundException, u1.set_property, 'name', 'Zombie')
+        self.assertRaises(ElementNotFoundException, u1.set_property, 'nick', 'Zombie')
+        self.assertRaises(ElementNotFoundException, self.g.get_vertex, u1._uid, 'User')
+        self.assertEqual([], u2.get_incoming_edges())
+        self.assertEqual([e2._uid], [e._uid for e in u3.get_incoming_edges()])
+        self.assertEqual([], u3.get_outgoing_edges())
+        self.assertIsNone(self.g._storage.get_graph_element(e1._uid, 'knows'))
+        #the ids of the vertex and its four edges are recycled
+        self.assertItemsEqual([u1._uid, e1._uid], [uid for uid in sysadmin.get_next_ids(5) if uid in (u1._uid, e1._uid)])
+        knows.remove()
+        user.remove()
+
+    def test_remove_types(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        rates = self.g.create_edge_type(RequestEdgeType('rates'))
+        users = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i)})) for i in xrange(6)]
+        m = self.g.insert_vertex(RequestVertex(movie, {'title':'Up'}))
+        for u in users:
+            u.add_edge(m, rates)
+        friendship = users[0].add_edge(users[1:3], knows)
+        users[3].add_edge(users[0], knows)
+        reported = []
+        #the edges are removed from their vertices, four threads scan single edges
+        self.assertEqual(2, self.g._storage.rm_edge_type('knows', parallelism=4, chunk_size=1,
+                                                         progress=lambda done, elapsed: reported.append(done)))
+        self.assertEqual([1, 2], reported)
+        self.assertEqual(['rates'], [e._element_type for e in users[0].get_outgoing_edges()])
+        self.assertEqual([], users[0].get_incoming_edges())
+        self.assertEqual([], users[1].get_incoming_edges())
+        #the vertices are removed together with their edges
+        self.assertEqual(6, user.remove())
+        self.assertEqual([], m.get_incoming_edges())
+        self.assertEqual(0, self.g._storage.count_elements('rates'))
+        #the ids of the edges and the vertices are recycled
+        recycled = [u._uid for u in users] + [friendship._uid]
+        self.assertEqual(7, len(set(recycled) & set(self.g._storage.sysadmin.get_next_ids(14))))
+        rates.remove()
+        movie.remove()
+
+    def test_remove_edge_type_without_cleanup(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        rates = self.g.create_edge_type(RequestEdgeType('rates'))
+        users = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i)})) for i in xrange(3)]
+        users[0].add_edge(users[1], knows)
+        users[0].add_edge(users[2], rates)
+        self.assertIsNone(self.g._storage.rm_edge_type('knows', cleanup=False))
+        #the vertices still refer to the edges of the dropped type
+        users[0].remove()
+        self.assertEqual([], users[2].get_incoming_edges())
+        self.assertEqual(0, self.g._storage.count_elements('rates'))
+        rates.remove()
+        user.remove()
+
+    def test_set_properties(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'age':76}))
+        u2 = self.g.insert_vertex(RequestVertex(user, {'name':'Scrooge'}))
+        u1.add_edge(u2, knows)
+        u1.set_properties({'age':77, 'nick':'Goose', 'friends':['Donald']})
+        u1.nick = 'Gussy'
+        u1.age = 78
+        self.assertEqual(78, u1.age)
+        self.assertEqual('Gussy', u1.nick)
+        self.assertEqual(['Donald'], u1.friends)
+        self.assertEqual('Gus', u1.name)
+        self.assertEqual(1, len(u1.get_outgoing_edges()))
+        self.assertRaises(TypeError, u1.set_property, 'outgoing_edges', {})
+        knows.remove()
+        user.remove()
+        
+    def test_projection(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'age':76, 'nick':'Goose'}))
+        u2 = self.g.insert_vertex(RequestVertex(user, {'name':'Scrooge'}))
+        u1.add_edge(u2, knows)
+        requests = self.g._storage.requests
+        recorder = requests.hyperdex_client = ReadRecorder(requests.hyperdex_client)
+        self.assertEqual(76, u1.age)
+        self.assertEqual('Goose', u1.get_property('nick'))
+        self.assertEqual(set(['name', 'age', 'nick', 'incoming_edges', 'outgoing_edges']), u1.get_property_keys())
+        self.assertEqual('Gus', self.g.get_vertex(u1._uid, 'User').name)
+        self.assertNotIn(None, recorder.reads)
+        for attributes in recorder.reads:
+            self.assertFalse(attributes & set(['incoming_edges', 'outgoing_edges']))
+        self.assertEqual(1, len(u1.get_outgoing_edges()))
+        requests.hyperdex_client = recorder.client
+        knows.remove()
+        user.remove()
+
+    def test_snapshot(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'age':76, 'nick':'Goose'}))
+        requests = self.g._storage.requests
+        recorder = requests.hyperdex_client = ReadRecorder(requests.hyperdex_client)
+        #the existence check reads the snapshot, the properties need no further reads
+        v = self.g.get_vertex(u1._uid, 'User', snapshot=True)
+        self.assertEqual('Gus 76 Goose', '{} {} {}'.format(v.name, v.age, v.nick))
+        self.assertEqual(set(['name', 'age', 'nick', 'incoming_edges', 'outgoing_edges']), v.get_property_keys())
+        self.assertEqual(1, len(recorder.reads))
+        self.assertFalse(recorder.reads[0] & set(['incoming_edges', 'outgoing_edges']))
+        #changes through the handle are applied to the snapshot, others need a refresh
+        v.set_properties({'age':77, 'friends':['Donald']})
+        self.assertEqual((77, ['Donald']), (v.age, v.friends))
+        u1.nick = 'G'
+        self.assertEqual('Goose', v.nick)
+        v.refresh()
+        self.assertEqual('G', v.nick)
+        #a snapshot older than max_age is reloaded
+        v.snapshot(max_age=0)
+        v._loaded_at -= 1
+        u1.age = 78
+        self.assertEqual(78, v.age)
+        requests.hyperdex_client = recorder.client
+        #bulk readers take the properties from the search
+        vertices = user.get_vertices(snapshot=True)
+        self.assertEqual(['G'], [vertex.nick for vertex in vertices])
+        self.assertNotIn('graph_uid', vertices[0].get_property_keys())
+        user.remove()
+
+    def test_get_vertices(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        uids = self.g.insert_vertices(user, [{'name':'User{}'.format(i)} for i in xrange(100)]).results
+        edges = self.g.add_edges(knows, [(uids[0], 'User', {uid : 'User'}, {}) for uid in uids[1:]]).results
+        requested = [(uid, 'User') for uid in reversed(uids)]
+        requested.insert(3, (uids[0] - 1000, user))
+        result = self.g.get_vertices(requested)
+        self.assertEqual(101, len(result))
+        self.assertEqual([3], result.errors.keys())
+        self.assertIsInstance(result.errors[3], ElementNotFoundException)
+        self.assertIsNone(result[3])
+        self.assertEqual(list(reversed(uids)), [v._uid for v in result if v is not None])
+        #the targets of the edges are taken from their snapshots
+        result = self.g.get_edges([(edge, knows) for edge in edges], snapshot=True)
+        self.assertTrue(result.succeeded())
+        requests = self.g._storage.requests
+        recorder = requests.hyperdex_client = ReadRecorder(requests.hyperdex_client)
+        self.assertEqual(uids[1:], [e.get_target()[0]._uid for e in result])
+        self.assertEqual(0, len(recorder.reads))
+        requests.hyperdex_client = recorder.client
+        #an unknown type does not fail the other vertices
+        result = self.g.get_vertices([(uids[0], 'User'), (uids[1], 'Unknown')], snapshot=True)
+        self.assertEqual('User0', result[0].name)
+        self.assertEqual([1], result.errors.keys())
+        knows.remove()
+        user.remove()
+
+    def test_element_cache(self):
+        g = HyperDexGraph(ADDRESS, PORT, GRAPH, cache=True)
+        self.assertIsNone(self.g.get_cache_stats())
+        user = g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        knows = g.create_edge_type(RequestEdgeType('knows'))
+        u1 = g.insert_vertex(RequestVertex(user, {'name':'Gus'}))
+        u2 = g.insert_vertex(RequestVertex(user, {'name':'Scrooge'}))
+        before = g.get_cache_stats()
+        self.assertEqual('Gus', g.get_vertex(u1._uid, 'User').name)
+        self.assertEqual('Gus', g.get_vertex(u1._uid, 'User').name)
+        stats = g.get_cache_stats()
+        self.assertEqual(2, stats['hits'] - before['hits'])
+        #the writes of this process invalidate the cached elements
+        u1.name = 'Goose'
+        self.assertEqual('Goose', u1.name)
+        u1.add_edge(u2, knows)
+        self.assertEqual(1, len(u2.get_incoming_edges()))
+        g.add_edges(knows, [(u2._uid, 'User', {u1._uid : 'User'}, {})])
+        self.assertEqual(1, len(u1.get_incoming_edges()))
+        u1.remove()
+        self.assertRaises(ElementNotFoundException, g.get_vertex, u1._uid, 'User')
+        self.assertEqual([], u2.get_incoming_edges())
+        knows.remove()
+        user.remove()
+        self.assertEqual(0, g.get_cache_stats()['entries'])
+
+    def test_traverse(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        rates = self.g.create_edge_type(RequestEdgeType('rates'))
+        u = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i)})) for i in xrange(7)]
+        m = self.g.insert_vertex(RequestVertex(movie, {'title':'Up'}))
+        u[0].add_edge([u[1], u[2]], knows)
+        u[0].add_edge(u[3], knows)
+        u[1].add_edge([u[4], u[5]], knows)
+        u[3].add_edge(u[6], knows)
+        u[6].add_edge(u[0], knows)
+        u[4].add_edge(m, rates)
+        levels = [(depth, set(v._uid for v in vertices)) for depth, vertices in self.g.traverse(u[0])]
+        self.assertEqual([(0, set([u[0]._uid])), (1, set(v._uid for v in u[1:4])),
+                          (2, set(v._uid for v in u[4:7])), (3, set([m._uid]))], levels)
+        self.assertEqual(3, len(list(self.g.traverse(u[0], edge_types=[knows]))))
+        self.assertEqual(2, len(list(self.g.traverse(u[0], max_depth=1))))
+        self.assertEqual(5, sum(len(vertices) for _, vertices in self.g.traverse(u[0], max_vertices=5)))
+        levels = [[v._uid for v in vertices] for _, vertices in self.g.traverse(m, 'incoming_edges')]
+        self.assertEqual([[m._uid], [u[4]._uid], [u[1]._uid], [u[0]._uid], [u[6]._uid], [u[3]._uid]], levels)
+        levels = list(self.g.traverse([u[2], u[5]], 'both', max_depth=1))
+        self.assertEqual(set([u[0]._uid, u[1]._uid]), set(v._uid for v in levels[1][1]))
+        self.assertEqual('User0', [v for v in levels[1][1] if v._uid == u[0]._uid][0].name)
+        #the incoming edges of a paged vertex are read with all its pages
+        adjacency = self.g._storage.adjacency
+        adjacency.threshold = 10
+        adjacency.pages = 4
+        fans = self.g.insert_vertices(user, [{'name':'Fan{}'.format(i)} for i in xrange(20)]).results
+        self.g.add_edges(rates, [(uid, 'User', {m._uid:'Movie'}, {}) for uid in fans])
+        m.get_incoming_edges()
+        self.assertEqual({MARKER:'4'}, self.hyperdex_client.get(GRAPH + '_Movie', m._uid)['incoming_edges'])
+        self.assertEqual(21, len(list(self.g.traverse(m, 'incoming_edges', max_depth=1))[1][1]))
+        #the edge has been removed, but not yet from the edges of its source
+        removed = u[3].get_outgoing_edges()[0]
+        self.g._storage.requests.execute('delete', GRAPH + '_knows', removed._uid)
+        self.assertEqual([[u[3]._uid]], [[v._uid for v in vertices] for _, vertices in self.g.traverse(u[3])])
+        self.assertRaises(ValueError, self.g.traverse, u[0], 'sideways')
+        knows.remove()
+        rates.remove()
+        movie.remove()
+        user.remove()
+
+    def test_shortest_path(self):
+        town = self.g.create_vertex_type(RequestVertexType('Town', ('string', 'name')))
+        road = self.g.create_edge_type(RequestEdgeType('road', ('int', 'length')))
+        ferry = self.g.create_edge_type(RequestEdgeType('ferry'))
+        t = dict((name, self.g.insert_vertex(RequestVertex(town, {'name':name}))) for name in 'abcdef')
+        for source, target, length in [('a', 'b', 7), ('a', 'c', 9), ('a', 'f', 14), ('b', 'c', 10), ('b', 'd', 15),
+                                       ('c', 'd', 11), ('c', 'f', 2), ('f', 'e', 9), ('d', 'e', 6)]:
+            t[source].add_edge(t[target], road, {'length':length})
+        for bidirectional in (False, True):
+            for wave_size in (1, 64):
+                path = self.g.shortest_path(t['a'], t['e'], road, 'length', bidirectional, wave_size=wave_size)
+                self.assertEqual(20, path.cost)
+                self.assertEqual(['a', 'c', 'f', 'e'], [v.name for v in path.vertices])
+                self.assertEqual([t['a']._uid, t['c']._uid, t['f']._uid], [e.get_source()._uid for e in path.edges])
+                self.assertTrue(path.expanded > 0 and path.round_trips > 0)
+        path = self.g.shortest_path(t['a'], t['e'], road, 'length', heuristic=lambda uid, vertex_type: 0)
+        self.assertEqual(20, path.cost)
+        #without a weight the path with the fewest edges is returned
+        path = self.g.shortest_path(t['a'], t['e'], 'road')
+        self.assertEqual((2, ['a', 'f', 'e']), (path.cost, [v.name for v in path.vertices]))
+        path = self.g.shortest_path(t['e'], t['a'], road, 'length', True)
+        self.assertFalse(path.found())
+        self.assertEqual([], path.vertices)
+        self.assertEqual(0, self.g.shortest_path(t['a'], t['a'], road, 'length').cost)
+        #an unstructured weight and edges without a weight
+        t['b'].add_edge(t['e'], ferry, {}, {'length':3})
+        t['a'].add_edge(t['e'], ferry)
+        path = self.g.shortest_path(t['a'], t['e'], weight='length', bidirectional=True)
+        self.assertEqual((10, ['a', 'b', 'e']), (path.cost, [v.name for v in path.vertices]))
+        t['d'].add_edge(t['a'], road, {'length':-1})
+        self.assertRaises(ValueError, self.g.shortest_path, t['d'], t['e'], road, 'length')
+        self.assertRaises(ValueError, self.g.shortest_path, t['a'], t['e'], bidirectional=True,
+                          heuristic=lambda uid, vertex_type: 0)
+        ferry.remove()
+        road.remove()
+        town.remove()
+
+    def test_export_csr(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        rates = self.g.create_edge_type(RequestEdgeType('rates', ('int', 'stars')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        u = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i), 'age':20 + i})) for i in xrange(3)]
+        m = [self.g.insert_vertex(RequestVertex(movie, {'title':title})) for title in ('Up', 'Cars')]
+        stars = {}
+        for source, target, count in [(0, 0, 5), (0, 1, 3), (1, 0, 4)]:
+            stars[u[source].add_edge(m[target], rates, {'stars':count})._uid] = count
+        u[0].add_edge([u[1], u[2]], knows)
+        #the vertex is gone, but not yet from the edges
+        self.hyperdex_client.delete(GRAPH + '_User', u[2]._uid)
+        graph = self.g.export_csr({'User' : ['age']}, {'rates' : ['stars']})
+        self.assertEqual(4, graph.count_vertices())
+        self.assertEqual(4, graph.count_entries())
+        uid = lambda dense: graph.uids[dense]
+        self.assertEqual(sorted([m[0]._uid, m[1]._uid, u[1]._uid]),
+                         sorted(uid(t) for t in graph.neighbors(graph.index[u[0]._uid])))
+        self.assertEqual(0, graph.out_degree(graph.index[m[0]._uid]))
+        self.assertEqual(['Movie', 'User', 'generic_vertex'], graph.vertex_type_names)
+        self.assertEqual('User', graph.vertex_type_names[graph.vertex_types[graph.index[u[1]._uid]]])
+        self.assertEqual({u[0]._uid : 20, u[1]._uid : 21},
+                         dict((uid(row), age) for row, age in zip(graph.rows['User'], graph.columns['User']['age'])))
+        self.assertEqual(stars, dict((graph.edges[entry], count) for entry, count
+                                     in zip(graph.rows['rates'], graph.columns['rates']['stars'])))
+        self.assertTrue(all(graph.edge_type_names[graph.edge_types[entry]] == 'rates' for entry in graph.rows['rates']))
+        reverse = graph.reverse()
+        self.assertEqual(sorted([u[0]._uid, u[1]._uid]), sorted(uid(t) for t in reverse.neighbors(graph.index[m[0]._uid])))
+        self.assertEqual(stars, dict((reverse.edges[entry], count) for entry, count
+                                     in zip(reverse.rows['rates'], reverse.columns['rates']['stars'])))
+        self.assertRaises(ValueError, self.g.export_csr, {'User' : ['nick']})
+        knows.remove()
+        rates.remove()
+        movie.remove()
+        user.remove()
+
+    def test_graph_snapshot(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name'), ('int', 'age')))
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        rates = self.g.create_edge_type(RequestEdgeType('rates', ('int', 'stars')))
+        knows = self.g.create_edge_type(RequestEdgeType('knows'))
+        u = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i), 'age':20 + i})) for i in xrange(3)]
+        m = self.g.insert_vertex(RequestVertex(movie, {'title':'Up'}))
+        u[0].add_edge(m, rates, {'stars':5})
+        u[1].add_edge(m, rates, {'stars':4})
+        u[0].add_edge([u[1], u[2]], knows)
+        path = os.path.join(tempfile.mkdtemp(), 'test_graph')
+        try:
+            self.g.create_snapshot(path, {'User' : ['name', 'age']}, {'rates' : ['stars']})
+            first = snapshot.load(path)
+            self.assertEqual(GRAPH, first.graph_name)
+            self.assertEqual(['Movie', 'User', 'generic_vertex'], first.header['vertex_types'])
+            graph = first.graph
+            self.assertEqual((4, 4), (graph.count_vertices(), graph.count_entries()))
+            neighbors = lambda graph, vertex: sorted(graph.uids[t] for t in graph.neighbors(graph.index[vertex._uid]))
+            self.assertEqual(sorted([m._uid, u[1]._uid, u[2]._uid]), neighbors(graph, u[0]))
+            self.assertEqual([('User0', 20), ('User1', 21), ('User2', 22)],
+                             sorted(zip(graph.columns['User']['name'], graph.columns['User']['age'])))
+            self.assertEqual([4, 5], sorted(graph.columns['rates']['stars']))
+            #only the types with inserted or removed elements are scanned again
+            m2 = self.g.insert_vertex(RequestVertex(movie, {'title':'Cars'}))
+            u[2].add_edge(m2, rates, {'stars':3})
+            refreshed, scanned = self.g.refresh_snapshot(path)
+            self.assertEqual(['Movie', 'rates'], scanned)
+            #the path links to the latest version, the previous one is removed
+            self.assertTrue(os.path.islink(path))
+            self.assertEqual([os.path.basename(path), os.readlink(path)], sorted(os.listdir(os.path.dirname(path))))
+            graph = refreshed.graph
+            self.assertEqual((5, 5), (graph.count_vertices(), graph.count_entries()))
+            self.assertEqual([m2._uid], neighbors(graph, u[2]))
+            self.assertEqual(sorted([m._uid, u[1]._uid, u[2]._uid]), neighbors(graph, u[0]))
+            self.assertEqual([3, 4, 5], sorted(graph.columns['rates']['stars']))
+            self.assertEqual(['User0', 'User1', 'User2'], sorted(graph.columns['User']['name']))
+            #the first snapshot stays readable while it is mapped
+            self.assertEqual(4, len(list(first.graph.uids)))
+            u[1].remove()
+            refreshed, scanned = self.g.refresh_snapshot(path)
+            self.assertEqual(['User', 'knows', 'rates'], scanned)
+            graph = refreshed.graph
+            #the edge to the removed vertex has been removed as a whole
+            self.assertEqual((4, 2), (graph.count_vertices(), graph.count_entries()))
+            self.assertEqual([m._uid], neighbors(graph, u[0]))
+            self.assertEqual(sorted([m._uid, m2._uid]), sorted(graph.uids[row] for row in graph.rows['Movie']))
+            self.assertEqual([], self.g.refresh_snapshot(path)[1])
+            #a removal and an insertion of the recycled id keep the number of edges
+            removed = u[0].get_outgoing_edges(rates)[0]
+            u[0].rm_edge(removed)
+            self.assertEqual(removed._uid, u[2].add_edge(m, rates, {'stars':1})._uid)
+            refreshed, scanned = self.g.refresh_snapshot(path)
+            self.assertEqual(['rates'], scanned)
+            graph = refreshed.graph
+            self.assertEqual([], neighbors(graph, u[0]))
+            self.assertEqual(sorted([m._uid, m2._uid]), neighbors(graph, u[2]))
+            self.assertEqual([1, 3], sorted(graph.columns['rates']['stars']))
+            #a removed target changes the removal counter of the edge type
+            friendship = u[2].add_edge([u[0], m2], knows)
+            self.g.refresh_snapshot(path)
+            friendship.remove_target(u[0])
+            refreshed, scanned = self.g.refresh_snapshot(path)
+            self.assertEqual(['knows'], scanned)
+            self.assertNotIn(u[0]._uid, neighbors(refreshed.graph, u[2]))
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+        knows.remove()
+        rates.remove()
+        movie.remove()
+        user.remove()
+
+    def test_paged_adjacency(self):
+        adjacency = self.g._storage.adjacency
+        adjacency.threshold = 10
+        adjacency.pages = 4
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        rates = self.g.create_edge_type(RequestEdgeType('rates'))
+        m = self.g.insert_vertex(RequestVertex(movie, {'title':'Up'}))
+        users = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i)})) for i in xrange(30)]
+        edges = [u.add_edge(m, rates) for u in users[:11]]
+        #the incoming edges have been moved to the pages by the writer, the next edge is paged
+        stored = self.hyperdex_client.get(GRAPH + '_Movie', m._uid)
+        self.assertEqual({MARKER:'4'}, stored['incoming_edges'])
+        edges.append(users[11].add_edge(m, rates))
+        self.assertEqual({MARKER:'4'}, self.hyperdex_client.get(GRAPH + '_Movie', m._uid)['incoming_edges'])
+        self.assertEqual(12, len(m.get_incoming_edges()))
+        #a worker which does not know the pages yet adds inline
+        g = HyperDexGraph(ADDRESS, PORT, GRAPH)
+        g.get_vertex(users[12]._uid, 'User').add_edge(g.get_vertex(m._uid, 'Movie'), 'rates')
+        #appends of this worker touch a single page
+        edges.append(users[13].add_edge(m, rates))
+        self.assertEqual(2, len(self.hyperdex_client.get(GRAPH + '_Movie', m._uid)['incoming_edges']))
+        self.g.add_edges(rates, [(u._uid, 'User', {m._uid:'Movie'}, {}) for u in users[14:]])
+        incoming = m.get_incoming_edges(rates)
+        self.assertEqual(30, len(incoming))
+        self.assertEqual(30, len(set(e._uid for e in incoming)))
+        self.assertEqual(30, len(m.get_property('incoming_edges')))
+        m.rm_edge(edges[0])
+        edges[1].remove()
+        self.assertEqual(28, len(list(m.iter_incoming_edges())))
+        self.assertEqual(1, len(users[5].get_outgoing_edges()))
+        #the removal of a vertex with several edges to the paged one
+        users[20].add_edge(m, rates)
+        users[20].remove()
+        self.assertEqual(27, len(m.get_incoming_edges()))
+        self.assertEqual(4, self.hyperdex_client.count(GRAPH + '_adjacency', {}))
+        m.remove()
+        self.assertEqual(0, self.hyperdex_client.count(GRAPH + '_adjacency', {}))
+        self.assertEqual(0, len(users[5].get_outgoing_edges()))
+        rates.remove()
+        user.remove()
+        movie.remove()
+    
+    def test_page_concurrent_removal(self):
+        adjacency = self.g._storage.adjacency
+        adjacency.threshold = 100
+        adjacency.pages = 4
+        movie = self.g.create_vertex_type(RequestVertexType('Movie', ('string', 'title')))
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        rates = self.g.create_edge_type(RequestEdgeType('rates'))
+        m = self.g.insert_vertex(RequestVertex(movie, {'title':'Up'}))
+        users = [self.g.insert_vertex(RequestVertex(user, {'name':'User{}'.format(i)})) for i in xrange(8)]
+        edges = [u.add_edge(m, rates) for u in users]
+        #an edge is removed after the edges have been moved to the pages, before they are replaced
+        execute = adjacency.requests.execute
+        def remove_first(operation, *args):
+            if operation == 'cond_put' and adjacency.requests.execute is remove_first:
+                del adjacency.requests.execute
+                self.hyperdex_client.map_remove(GRAPH + '_Movie', m._uid, {'incoming_edges' : edges[0]._uid})
+            return execute(operation, *args)
+        adjacency.requests.execute = remove_first
+        self.assertEqual(({}, 4), adjacency.page('Movie', m._uid, 'incoming_edges'))
+        paged = {}
+        for page in self.hyperdex_client.search(GRAPH + '_adjacency', {}):
+            paged.update(page['edges'])
+        self.assertItemsEqual([e._uid for e in edges[1:]], paged.keys())
+        self.assertEqual(7, len(m.get_incoming_edges()))
+        m.remove()
+        rates.remove()
+        user.remove()
+        movie.remove()
+    
+    def test_unstructured_per_key(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'nick':'Goose', 'age':76}))
+        stored = self.hyperdex_client.get(GRAPH + '_User', u1._uid)
+        self.assertItemsEqual(['nick', 'age'], stored['unstructured'].keys())
+        u1.age = 77
+        self.assertEqual(77, u1.get_property('age'))
+        self.assertEqual(set(['name', 'nick', 'age', 'incoming_edges', 'outgoing_edges']), u1.get_property_keys())
+        self.assertNotIn('unstructured', user.get_type_definition())
+        user.remove()
+    
+    def test_migrate_unstructured(self):
+        #a type created before the per-key layout existed
+        storage = self.g._storage
+        storage.typeadmin.create_element_type('User', [('string', 'name'), ('map(int, string)', 'incoming_edges'), 
+                                                       ('map(int, string)', 'outgoing_edges')])
+        storage.sysadmin.add_vertex_type('User')
+        user = self.g.get_vertex_type('User')
+        uids = self.g.insert_vertices(user, [{'name':'User{}'.format(i), 'nick':'u{}'.format(i)} for i in xrange(10)]).results
+        self.assertNotEqual('', self.hyperdex_client.get(GRAPH + '_User', uids[0])['value'])
+        self.assertEqual(10, self.g.migrate_element_type(user))
+        self.assertEqual(0, self.g.migrate_element_type(user))
+        stored = self.hyperdex_client.get(GRAPH + '_User', uids[0])
+        self.assertEqual('', stored['value'])
+        self.assertEqual(['nick'], stored['unstructured'].keys())
+        v = self.g.get_vertex(uids[3], 'User')
+        self.assertEqual('User3', v.name)
+        self.assertEqual('u3', v.nick)
+        v.nick = 'three'
+        self.assertEqual('three', v.nick)
+        user.remove()
+    
+    def test_resume_migration(self):
+        storage = self.g._storage
+        storage.typeadmin.create_element_type('User', [('string', 'name'), ('map(int, string)', 'incoming_edges'), 
+                                                       ('map(int, string)', 'outgoing_edges')])
+        storage.sysadmin.add_vertex_type('User')
+        user = self.g.get_vertex_type('User')
+        uids = self.g.insert_vertices(user, [{'name':'User{}'.format(i), 'nick':'u{}'.format(i)} for i in xrange(10)]).results
+        copy_elements = storage._copy_elements
+        def interrupted(source_type, target_type, schema, max_in_flight):
+            if source_type == 'User_migration':
+                raise RuntimeError('interrupted')
+            return copy_elements(source_type, target_type, schema, max_in_flight)
+        #the migration stops after the original hyperspace has been recreated empty
+        storage._copy_elements = interrupted
+        try:
+            self.assertRaises(RuntimeError, self.g.migrate_element_type, user, [('name',)])
+        finally:
+            storage._copy_elements = copy_elements
+        self.assertIsNone(self.hyperdex_client.get(GRAPH + '_User', uids[3]))
+        self.assertEqual(10, self.g.migrate_element_type(user, [('name',)]))
+        self.assertIsNone(storage.typeadmin.get_type_description('User_migration'))
+        v = self.g.get_vertex(uids[3], 'User')
+        self.assertEqual(('User3', 'u3'), (v.name, v.nick))
+        self.assertEqual(0, self.g.migrate_element_type(user))
+        user.remove()
+    
+    def test_codec(self):
+        user = self.g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        u1 = self.g.insert_vertex(RequestVertex(user, {'name':'Gus', 'nick':'Goose'}))
+        #a graph writing with another codec still reads the values written before
+        g = HyperDexGraph(ADDRESS, PORT, GRAPH, codec='binary+zlib')
+        u2 = g.insert_vertex(RequestVertex(g.get_vertex_type('User'), {'name':'Ann', 'tags':('a', 'b')}))
+        stored = self.hyperdex_client.get(GRAPH + '_User', u2._uid)
+        self.assertEqual('\x01', stored['unstructured']['tags'][0])
+        self.assertEqual(('a', 'b'), g.get_vertex(u2._uid, 'User').tags)
+        self.assertEqual(('a', 'b'), u2.tags)
+        self.assertEqual('Goose', g.get_vertex(u1._uid, 'User').nick)
+        self.assertEqual(('a', 'b'), self.g.get_vertex(u2._uid, 'User').tags)
+        user.remove()
+        
+    def test_fast_open(self):
+        lazy = 'test_lazy_graph'
+        g = HyperDexGraph(ADDRESS, PORT, lazy, fast_open=True)
+        #nothing is created before the first write
+        self.assertRaises(HyperClientException, self.hyperdex_client.get, lazy + '_system', 'vertex_types')
+        self.assertRaises(TypeNotFoundException, g.get_vertex_type, 'User')
+        user = g.create_vertex_type(RequestVertexType('User', ('string', 'name')))
+        u1 = g.insert_vertex(RequestVertex(user, {'name':'Gus'}))
+        #an existing graph is opened without validation
+        g = HyperDexGraph(ADDRESS, PORT, lazy, fast_open=True)
+        self.assertEqual('Gus', g.get_vertex(u1._uid, 'User').name)
+        u1.remove()
+        user.remove()
+        for space in ['_space_description', '_system', '_generic_vertex', '_id_sys']:
+            self.hyperdex.rm_space(lazy + space)
+        
     def test_get_vertex_type(self):
         req1 = RequestVertexType(vertex_type, ('string', 'name'), ('int', 'age'))
         self.g.create_vertex_type(req1)
@@ -180,6 +873,9 @@ class Test(unittest.TestCase):
         self.assertEqual(80, u3.age)
         self.assertEqual({'attr1': set([1,2,3,4]), 'attr2': [5,6,7,8]}, u5.get_property('props'))
         self.assertEqual(5,user.count())
+        #the plain vertex as stored in the space of its type
+        self.assertEqual('Gus', self.g._storage.get_vertex(u4._uid, 'User')['first'])
+        self.assertRaises(ElementNotFoundException, self.g._storage.get_vertex, u4._uid - 100, 'User')
         user.remove()
         
         
@@ -6,7 +6,10 @@
 
 
 """
+import gc
 import unittest
+import weakref
+from graphstore import idpool
 from graphstore.sysadmin import SysAdmin
 from hyperdex.client import Client
 from hyperdex.admin import Admin as HAdmin
@@ -70,6 +73,66 @@ class Test(unittest.TestCase):
         self.test_add_edge_type()
         self.assertEqual(self.sysadmin.is_edge_type(edge_type), True)
         self.assertEqual(self.sysadmin.is_edge_type('bla'), False)
+    
+    def test_type_catalog_refresh(self):
+        self.test_add_vertex_type()
+        self.assertTrue(self.sysadmin.is_vertex_type(vertex_type))
+        version = self.sysadmin.get_type_version()
+        self.assertTrue(self.sysadmin.is_vertex_type(vertex_type))
+        self.assertEqual(version, self.sysadmin.get_type_version())
+        #another worker adds a type, the version stamp changes
+        other = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        other.add_edge_type(edge_type)
+        self.assertTrue(self.sysadmin.is_edge_type(edge_type))
+        self.assertNotEqual(version, self.sysadmin.get_type_version())
+        #the stamp is read even if no type has been looked up yet
+        fresh = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        self.assertEqual(self.sysadmin.get_type_version(), fresh.get_type_version())
+    
+    def test_type_version_key(self):
+        #the version stamp must not be the id counter of another graph
+        other = SysAdmin(ADDRESS, PORT, GRAPH + '_type_version', self.hyperdex_client, self.hyperdex_admin)
+        other.get_next_ids(10)
+        counter = self.hyperdex_client.get('id', GRAPH + '_type_version')
+        self.sysadmin.add_vertex_type(vertex_type)
+        self.assertEqual(counter, self.hyperdex_client.get('id', GRAPH + '_type_version'))
+    
+    def test_recycle_obsolete_ids(self):
+        uids = [self.sysadmin.get_next_id() for i in xrange(1000)]
+        self.sysadmin.add_obsolete_ids(uids)
+        self.sysadmin.flush_obsolete_ids()
+        #another worker draws the recycled ids from the shards
+        other = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        recycled = set(other.get_next_id() for i in xrange(1000))
+        self.assertTrue(recycled <= set(uids))
+        self.assertEqual(1000, len(recycled))
+        self.assertNotIn(other.get_next_id(), uids)
+    
+    def test_recycle_from_any_shard(self):
+        other = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        #a single obsolete id in the shard probed last
+        shard = (other._id_pool._next_shard - 1) % idpool.SHARDS
+        uid = [u for u in (self.sysadmin.get_next_id() for i in xrange(100)) if u % idpool.SHARDS == shard][0]
+        self.sysadmin.add_obsolete_ids([uid])
+        self.sysadmin.flush_obsolete_ids()
+        self.assertEqual(uid, other.get_next_id())
+    
+    def test_flush_at_exit(self):
+        uids = [self.sysadmin.get_next_id() for i in xrange(10)]
+        other = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        other.add_obsolete_ids(uids)
+        #the buffered ids of the live pools are flushed at exit
+        idpool._flush_all()
+        flushed = set()
+        for shard in xrange(idpool.SHARDS):
+            stored = self.hyperdex_client.get(GRAPH + '_id_sys', other._id_pool.shard_key(shard))
+            flushed.update(stored['value'] if stored is not None else [])
+        self.assertTrue(set(uids) <= flushed)
+        #a discarded pool is not kept alive
+        pool = weakref.ref(other._id_pool)
+        del other
+        gc.collect()
+        self.assertIsNone(pool())
         
 
 
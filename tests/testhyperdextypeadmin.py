@@ -7,9 +7,10 @@
 
 """
 import unittest
+from graphstore.schemacache import SCHEMAS
 from graphstore.typeadmin import TypeAdmin
-from hyperdex.client import Client
-from hyperdex.admin import Admin
+from hyperdex.client import Client, HyperClientException
+from hyperdex.admin import Admin, HyperDexAdminException
 from pydevsrc import pydevd
 
 
@@ -55,6 +56,38 @@ class Test(unittest.TestCase):
         attributes  = [('string', 'name'), ('int', 'age')]
         self.typeadmin.create_element_type(vertex_type, attributes)
         self.typeadmin.remove_element_type(vertex_type)
+    
+    def test_create_element_types_rollback(self):
+        attributes  = [('string', 'name')]
+        self.typeadmin.create_element_type('existing', attributes)
+        #the second type exists already, the first one is not left behind
+        self.assertRaises(HyperDexAdminException, self.typeadmin.create_element_types,
+                          [('added', attributes, None), ('existing', attributes, None)])
+        self.assertRaises(HyperClientException, self.hyperdex_client.get, GRAPH + '_added', 0)
+        self.typeadmin.create_element_types([('added', attributes, None)])
+        self.assertIsNotNone(self.typeadmin.get_type_description('added'))
+        self.typeadmin.remove_element_type('added')
+        self.typeadmin.remove_element_type('existing')
+    
+    def test_get_type_schema(self):
+        attributes  = [('string', 'name'), ('int', 'age')]
+        self.typeadmin.create_element_type(vertex_type, attributes)
+        schema = self.typeadmin.get_type_schema(vertex_type, 1)
+        self.assertDictEqual({'name':'string', 'age':'int'}, schema.get_definition())
+        self.assertIs(schema, self.typeadmin.get_type_schema(vertex_type, 1))
+        self.assertEqual(({'name':'Gus', 'age':76}, {'comment':'Bla'}),
+                         schema.split({'name':'Gus', 'age':76, 'comment':'Bla'}))
+        #a type which is created again is not served from the cache
+        self.typeadmin.remove_element_type(vertex_type)
+        self.assertIsNone(self.typeadmin.get_type_schema(vertex_type))
+        self.typeadmin.create_element_type(vertex_type, [('string', 'name')])
+        self.assertDictEqual({'name':'string'}, self.typeadmin.get_type_schema(vertex_type).get_definition())
+        #a schema loaded with another version stamp or without one is reloaded
+        schema = self.typeadmin.get_type_schema(vertex_type, 1)
+        self.assertIsNot(schema, self.typeadmin.get_type_schema(vertex_type, 2))
+        SCHEMAS.put(GRAPH, vertex_type, schema)
+        self.assertIsNot(schema, self.typeadmin.get_type_schema(vertex_type, 2))
+        self.typeadmin.remove_element_type(vertex_type)
         
 
 
@@ -0,0 +1,113 @@
+"""
+.. module:: testidallocator.py
+   :platform: Linux
+
+.. moduleauthor:: Michael Schilonka <michael@schilonka.de>
+
+
+"""
+import unittest
+import multiprocessing as mp
+from graphstore.sysadmin import SysAdmin
+from graphstore.idallocator import IdAllocator
+from hyperdex.client import Client
+from hyperdex.admin import Admin as HAdmin
+
+
+
+SYSTEM = 'test_graph_system'
+ADDRESS = '192.168.100.26'
+PORT = 1990
+GRAPH = 'test_graph'
+INSERTS = 10000
+
+
+class CountingClient(object):
+    '''
+    Wraps a Client and counts the requests sent to the id counter.
+    '''
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        def counted(space, *args):
+            if space == 'id':
+                self.requests += 1
+            return attr(space, *args)
+        return counted
+
+
+def _allocate(queue, count):
+    sysadmin = SysAdmin(ADDRESS, PORT, GRAPH, Client(ADDRESS, PORT), HAdmin(ADDRESS, PORT))
+    queue.put([sysadmin.get_next_id() for i in xrange(count)])
+
+
+class Test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.hyperdex_client = Client(ADDRESS, PORT)
+        self.hyperdex_admin = HAdmin(ADDRESS, PORT)
+        self.sysadmin = SysAdmin(ADDRESS, PORT, GRAPH, self.hyperdex_client, self.hyperdex_admin)
+        self.sysadmin.validate_database()
+
+
+    def tearDown(self):
+        self.hyperdex_admin.rm_space(SYSTEM)
+        self.hyperdex_admin.rm_space('id')
+        self.hyperdex_admin.rm_space(GRAPH + '_id_sys')
+
+    def test_unique_ids(self):
+        ids = [self.sysadmin.get_next_id() for i in xrange(INSERTS)]
+        self.assertEqual(INSERTS, len(set(ids)))
+
+    def test_fewer_round_trips(self):
+        #one id per conditional write, as it used to be
+        single = CountingClient(self.hyperdex_client)
+        allocator = IdAllocator(single, 'id', GRAPH, 1, 1, 1)
+        for i in xrange(INSERTS):
+            allocator.next_id()
+        self.assertGreaterEqual(single.requests, 2 * INSERTS)
+        #leased blocks
+        leased = CountingClient(self.hyperdex_client)
+        allocator = IdAllocator(leased, 'id', GRAPH)
+        for i in xrange(INSERTS):
+            allocator.next_id()
+        self.assertEqual(leased.requests, allocator.round_trips)
+        self.assertLess(leased.requests * 50, single.requests)
+
+    def test_next_ids(self):
+        allocator = IdAllocator(self.hyperdex_client, 'id', GRAPH, 16, adaptive=False)
+        ids = [allocator.next_id()]
+        round_trips = allocator.round_trips
+        ids.extend(allocator.next_ids(100))
+        #the missing ids are leased at once
+        self.assertEqual(round_trips + 2, allocator.round_trips)
+        ids.extend(allocator.next_ids(5))
+        ids.append(allocator.next_id())
+        self.assertEqual(107, len(set(ids)))
+
+    def test_block_size_adapts(self):
+        allocator = IdAllocator(self.hyperdex_client, 'id', GRAPH, 16)
+        for i in xrange(INSERTS):
+            allocator.next_id()
+        self.assertGreater(allocator.block_size, 16)
+
+    def test_no_duplicates_across_processes(self):
+        queue = mp.Queue()
+        processes = [mp.Process(target=_allocate, args=(queue, INSERTS / 10)) for i in xrange(8)]
+        [p.start() for p in processes]
+        ids = []
+        for p in processes:
+            ids.extend(queue.get())
+        [p.join() for p in processes]
+        self.assertEqual(len(ids), len(set(ids)))
+
+
+
+if __name__ == "__main__":
+    #import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()